@@ -1,5 +1,8 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException
-from typing import List
+import json
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
 
 from app.schemas.message import Message, MessageCreate, MessageResponse
 from app.services.chat_service import chat_service
@@ -9,36 +12,57 @@ router = APIRouter()
 @router.post("/sessions", response_model=str)
 async def create_session():
     """Create a new chat session."""
-    return chat_service.create_session()
+    return await chat_service.create_session()
 
 @router.get("/sessions/{session_id}/messages", response_model=MessageResponse)
-async def get_session_messages(session_id: str):
-    """Get all messages for a session."""
-    if not chat_service.redis_service.session_exists(session_id):
+async def get_session_messages(
+    session_id: str,
+    cursor: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=100)
+):
+    """Get messages for a session, oldest first, a page at a time when limit is set."""
+    if not await chat_service.redis_service.session_exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
-    return MessageResponse(messages=chat_service.get_session_messages(session_id))
+    messages, next_cursor = await chat_service.get_session_messages(session_id, cursor, limit)
+    return MessageResponse(messages=messages, next_cursor=next_cursor)
 
 @router.delete("/sessions/{session_id}")
 async def clear_session(session_id: str):
     """Clear all messages for a session."""
-    if not chat_service.redis_service.session_exists(session_id):
+    if not await chat_service.redis_service.session_exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
-    chat_service.clear_session(session_id)
+    await chat_service.clear_session(session_id)
     return {"message": "Session cleared successfully"}
 
 @router.post("/sessions/{session_id}/messages", response_model=Message)
 async def create_message(session_id: str, message: MessageCreate):
     """Process a new message and generate a response."""
-    if not chat_service.redis_service.session_exists(session_id):
+    if not await chat_service.redis_service.session_exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
     return await chat_service.process_message(session_id, message)
 
+@router.post("/sessions/{session_id}/messages/stream")
+async def stream_message(session_id: str, message: MessageCreate):
+    """Process a new message and stream the response as Server-Sent Events."""
+    if not await chat_service.redis_service.session_exists(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    async def events():
+        async for event in chat_service.stream_message(session_id, message):
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.websocket("/ws/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
     """WebSocket endpoint for real-time chat."""
     await websocket.accept()
     
-    if not chat_service.redis_service.session_exists(session_id):
+    if not await chat_service.redis_service.session_exists(session_id):
         await websocket.close(code=4004, reason="Session not found")
         return
     
@@ -48,11 +72,9 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
             data = await websocket.receive_text()
             message = MessageCreate(content=data)
             
-            # Process message and get response
-            response = await chat_service.process_message(session_id, message)
-            
-            # Send response back to client
-            await websocket.send_text(response.content)
+            # Forward tokens to the client as they are generated
+            async for event in chat_service.stream_message(session_id, message):
+                await websocket.send_json(event)
             
     except WebSocketDisconnect:
         pass 
\ No newline at end of file
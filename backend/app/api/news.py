@@ -1,13 +1,27 @@
 from fastapi import APIRouter, HTTPException
-from app.rag.ingestion import news_service
+from app.rag.embeddings import embedding_service
+from app.services.ingestion_scheduler import ingestion_scheduler
 
 router = APIRouter()
 
-@router.post("/ingest")
+@router.post("/ingest", status_code=202)
 async def ingest_news():
-    """Ingest news articles from various sources."""
-    try:
-        await news_service.ingest_news()
-        return {"message": "News ingestion completed successfully"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+    """Queue a news ingestion run and return its job ID."""
+    job = await ingestion_scheduler.enqueue()
+    return {"job_id": job.id, "status": job.status}
+
+@router.get("/ingest/{job_id}")
+async def get_ingestion_status(job_id: str):
+    """Get the status, progress and stage timings of an ingestion job."""
+    status = await ingestion_scheduler.get_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
+
+@router.get("/embeddings/stats")
+async def embedding_stats():
+    """Get query embedding cache and batching statistics."""
+    return {
+        "query_cache": embedding_service.query_cache.get_stats() if embedding_service.query_cache else None,
+        "query_batches": embedding_service.query_batcher.get_stats() if embedding_service.query_batcher else None
+    }
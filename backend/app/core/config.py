@@ -27,9 +27,46 @@ class Settings(BaseSettings):
     REDIS_PASSWORD: Optional[str] = None
     REDIS_USERNAME: Optional[str] = None
     
-    # Vector DB settings (Qdrant Cloud)
-    QDRANT_URL: str
-    QDRANT_API_KEY: str
+    # Vector DB settings
+    VECTOR_STORE_BACKEND: str = "qdrant"  # "qdrant" or "local", which only one process can open
+    LOCAL_STORE_PATH: str = "data/vector_store"
+    ANN_MIN_VECTORS: int = 50000  # Local store searches are exact below this size
+    ANN_NPROBE: int = 8  # IVF lists scanned per search, higher is slower but more accurate
+    ANN_LISTS: Optional[int] = None  # Number of IVF lists, defaults to sqrt(vectors)
+    LOCAL_STORE_QUANTIZATION: str = "none"  # "none", "float16" or "int8"
+    QDRANT_QUANTIZATION: str = "none"  # "none" or "int8"
+    QUANTIZATION_OVERSAMPLING: float = 4.0  # Candidates rescored exactly, as a multiple of top_k
+    
+    # Partitioning by ingestion time
+    VECTOR_PARTITIONING: str = "none"  # "none", "day" or "week"
+    SEARCH_PARTITIONS: int = 4  # Most recent partitions searched
+    RETENTION_DAYS: Optional[int] = 30  # Older partitions are dropped, None keeps everything
+    
+    # Chunk texts and article metadata in SQL, vector payloads only keep filter fields
+    CHUNK_STORE_ENABLED: bool = True
+    CHUNK_CACHE_SIZE: int = 2048  # Hydrated chunks kept in process
+    
+    # Hybrid search
+    HYBRID_SEARCH_ENABLED: bool = True  # Fuse BM25 with dense search
+    LEXICAL_INDEX_PATH: str = "data/lexical_index"  # One subdirectory per partition when partitioned; only written by the lease holder
+    HYBRID_CANDIDATES: int = 20  # Chunks taken from each ranking before fusion
+    RRF_K: int = 60
+    BM25_K1: float = 1.2
+    BM25_B: float = 0.75
+    
+    # Recency
+    RECENCY_HALF_LIFE_HOURS: Optional[float] = None  # Decay scores by age, off by default
+    RECENT_QUERY_WINDOW_HOURS: int = 48  # Window searched for "latest news" questions
+    
+    # Context selection
+    CONTEXT_CANDIDATES: int = 20  # Chunks retrieved before diversification
+    CONTEXT_CHUNKS: int = 3  # Chunks kept for the prompt, before adjacent ones are merged
+    MMR_LAMBDA: float = 0.7  # Weight of relevance against novelty, 1 disables diversification
+    CONTEXT_DUPLICATE_THRESHOLD: float = 0.95  # Cosine similarity of near-duplicate chunks
+    
+    # Qdrant Cloud, required by the "qdrant" backend
+    QDRANT_URL: Optional[str] = None
+    QDRANT_API_KEY: Optional[str] = None
     QDRANT_COLLECTION: str = "news_articles"
     
     # Embedding and LLM API keys
@@ -44,6 +81,10 @@ class Settings(BaseSettings):
     POSTGRES_PORT: Optional[int] = None
     POSTGRES_DB: Optional[str] = None
     
+    # Worker pools for blocking and CPU-bound calls made from async code
+    BLOCKING_POOL_SIZE: int = 16
+    PROCESS_POOL_SIZE: Optional[int] = None  # CPU count by default, 0 uses the thread pool
+    
     # Session configuration (hardcoded, not from env)
     SESSION_TTL: int = 3600  # 1 hour
     MESSAGE_TTL: int = 86400  # 24 hours
@@ -52,7 +93,57 @@ class Settings(BaseSettings):
     # News sources
     NEWS_SOURCES_PATH: str = "data/news_sources.json"
     NEWS_UPDATE_INTERVAL: int = 3600  # 1 hour
+    INGEST_SCHEDULER_ENABLED: bool = True  # Disable in the API when running app.worker
+    INGEST_LEASE_TTL: int = 300  # Renewed while a run is active
+    INGEST_STATUS_INTERVAL: float = 5.0
+
+    # Ingestion crawler
+    INGEST_MAX_CONCURRENCY: int = 10  # Requests in flight across all hosts
+    INGEST_DOMAIN_RATE: float = 0.5  # Requests per second per host
+    INGEST_DOMAIN_BURST: int = 2
+    INGEST_REQUEST_TIMEOUT: float = 10.0
+    INGEST_ARTICLES_PER_SOURCE: int = 5  # Scraped sources only
+    INGEST_FEED_MAX_ENTRIES: int = 50
+    HTTP_CACHE_ENABLED: bool = True  # Conditional GETs for source, feed and article pages
+    HTTP_CACHE_PATH: str = "data/cache/http.sqlite3"
+    HTTP_CACHE_MAX_BYTES: int = 268435456  # 256 MB of compressed bodies
+    
+    # Near-duplicate detection
+    DEDUP_ENABLED: bool = True
+    DEDUP_THRESHOLD: float = 0.8  # Estimated Jaccard similarity of word shingles
+    DEDUP_NUM_PERM: int = 128
+    DEDUP_BANDS: int = 16
+    DEDUP_SHINGLE_SIZE: int = 5
+
+    # Ingestion pipeline
+    INGEST_QUEUE_SIZE: int = 100  # Items buffered between pipeline stages
+    INGEST_FETCH_WORKERS: int = 10
+    INGEST_PARSE_WORKERS: int = 4
+    INGEST_EMBED_WORKERS: int = 2
+    INGEST_EMBED_BATCH_SIZE: int = 20
+    INGEST_UPSERT_BATCH_SIZE: int = 100
+    INGEST_JOURNAL_MAX_AGE: int = 86400  # Interrupted work older than this is redone
+
+    # Embeddings
+    EMBEDDING_REQUEST_TIMEOUT: float = 30.0
+    QUERY_BATCH_WINDOW_MS: float = 5.0  # 0 sends each query embedding on its own
+    QUERY_BATCH_MAX_SIZE: int = 20
+    
+    # Embedding cache
+    EMBEDDING_CACHE_BACKEND: str = "disk"  # "disk", "redis" or "none"
+    EMBEDDING_CACHE_PATH: str = "data/cache/embeddings.sqlite3"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 100000
+    EMBEDDING_CACHE_TTL: int = 2592000  # 30 days, Redis backend only
+    QUERY_CACHE_SIZE: int = 1024
+    QUERY_CACHE_TTL: int = 3600  # 1 hour
+    QUERY_CACHE_REDIS: bool = False  # Share query embeddings across workers
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_TTL: int = 1800  # 30 minutes
     
+    # Request coalescing
+    SINGLE_FLIGHT_REDIS: bool = False  # Coalesce identical questions across workers
+    SINGLE_FLIGHT_TIMEOUT: float = 30.0
+
     @validator("BACKEND_CORS_ORIGINS", pre=True)
     def assemble_cors_origins(cls, v: Union[str, List[str]]) -> Union[List[str], str]:
         if isinstance(v, str) and not v.startswith("["):
@@ -0,0 +1,74 @@
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+# Bounded pool for the blocking calls that remain on the request path
+blocking_executor = ThreadPoolExecutor(
+    max_workers=settings.BLOCKING_POOL_SIZE,
+    thread_name_prefix="blocking"
+)
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking function in the bounded thread pool.
+
+    Args:
+        func: Function to call.
+        *args: Positional arguments for the function.
+        **kwargs: Keyword arguments for the function.
+
+    Returns:
+        The function's return value.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(blocking_executor, functools.partial(func, *args, **kwargs))
+
+
+# CPU-bound work such as HTML parsing runs in worker processes, created on first use
+_process_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_executor() -> Executor:
+    """Get the process pool, or the thread pool if process workers are disabled."""
+    global _process_executor
+    if settings.PROCESS_POOL_SIZE == 0:
+        return blocking_executor
+    if _process_executor is None:
+        # Forking a process that already runs threads can deadlock the child,
+        # workers are started from a clean server process instead
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _process_executor = ProcessPoolExecutor(
+            max_workers=settings.PROCESS_POOL_SIZE,
+            mp_context=multiprocessing.get_context(method)
+        )
+    return _process_executor
+
+
+def shutdown_process_executor() -> None:
+    """Stop the process pool's workers, if it was started."""
+    global _process_executor
+    if _process_executor is not None:
+        _process_executor.shutdown(wait=True, cancel_futures=True)
+        _process_executor = None
+
+
+async def run_in_process(func: Callable[..., T], *args: Any) -> T:
+    """Run a CPU-bound function in the process pool.
+
+    The function and its arguments must be picklable.
+
+    Args:
+        func: Module-level function to call.
+        *args: Positional arguments for the function.
+
+    Returns:
+        The function's return value.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_executor(), func, *args)
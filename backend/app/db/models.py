@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import Column, String, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, String, DateTime, JSON, ForeignKey, Integer, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -24,4 +24,77 @@ class Message(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
     meta = Column(JSON, nullable=True)
     
-    session = relationship("Session", back_populates="messages") 
\ No newline at end of file
+    session = relationship("Session", back_populates="messages") 
+
+class IngestedArticle(Base):
+    __tablename__ = "ingested_articles"
+
+    url = Column(String, primary_key=True)
+    content_hash = Column(String, nullable=False)
+    chunk_ids = Column(JSON, nullable=False, default=list)
+    ingested_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ArticlePartition(Base):
+    __tablename__ = "article_partitions"
+
+    url = Column(String, primary_key=True)
+    partition = Column(String, nullable=False, index=True)  # Vector store partition of the article's chunks
+
+class FeedEntry(Base):
+    __tablename__ = "feed_entries"
+
+    guid = Column(String, primary_key=True)
+    url = Column(String, nullable=False)
+    updated = Column(String, nullable=True)  # As published in the feed
+    seen_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ArticleSignature(Base):
+    __tablename__ = "article_signatures"
+
+    url = Column(String, primary_key=True)
+    priority = Column(Integer, nullable=False, default=0)
+    signature = Column(LargeBinary, nullable=False)  # MinHash values as uint32
+
+class LshBucket(Base):
+    __tablename__ = "lsh_buckets"
+
+    key = Column(String, primary_key=True)  # "{band}:{hash of the band's values}"
+    url = Column(String, primary_key=True, index=True)
+
+class JournalArticle(Base):
+    __tablename__ = "ingestion_journal"
+
+    url = Column(String, primary_key=True)
+    title = Column(String, nullable=False)
+    content = Column(String, nullable=False)
+    source = Column(String, nullable=True)
+    published_date = Column(String, nullable=True)  # ISO 8601, keeps the timezone
+    feed_entry = Column(JSON, nullable=True)
+    recorded_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class JournalEmbedding(Base):
+    __tablename__ = "ingestion_journal_embeddings"
+
+    chunk_id = Column(String, primary_key=True)
+    url = Column(String, nullable=False, index=True)
+    embedding = Column(LargeBinary, nullable=False)  # float32 values
+
+class Article(Base):
+    __tablename__ = "articles"
+
+    url = Column(String, primary_key=True)
+    title = Column(String, nullable=False)
+    source = Column(String, nullable=True)
+    published_date = Column(String, nullable=True)  # ISO 8601, as in chunk payloads
+    stored_at = Column(DateTime, default=datetime.utcnow)
+    chunks = relationship("Chunk", back_populates="article", cascade="all, delete-orphan")
+
+class Chunk(Base):
+    __tablename__ = "chunks"
+
+    id = Column(String, primary_key=True)  # Point ID in the vector store
+    article_url = Column(String, ForeignKey("articles.url"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    text = Column(String, nullable=False)
+
+    article = relationship("Article", back_populates="chunks")
@@ -1,18 +1,33 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from app.core.config import settings
 from app.api import chat, news
+from app.core.executor import shutdown_process_executor
 from app.db.database import engine
 from app.db.models import Base
+from app.services.ingestion_scheduler import ingestion_scheduler
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Scheduled ingestion runs in the background of the API process
+    if settings.INGEST_SCHEDULER_ENABLED:
+        ingestion_scheduler.start()
+    yield
+    if settings.INGEST_SCHEDULER_ENABLED:
+        await ingestion_scheduler.stop()
+    shutdown_process_executor()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url="/api/v1/openapi.json"
+    openapi_url="/api/v1/openapi.json",
+    lifespan=lifespan
 )
 
 # Configure CORS
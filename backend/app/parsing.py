@@ -0,0 +1,212 @@
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+import feedparser
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+
+# The parse functions run in worker processes, which import this module to
+# unpickle them. It must not import the app.rag package, whose __init__
+# builds the embedding, LLM and vector store services.
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+HTML_PARSER = "lxml"
+
+# Tags kept when parsing an article page; everything else is skipped
+DEFAULT_PARSE_ONLY = ["h1", "article", "main", "time", "meta"]
+# Selectors are tried in order, the first match wins
+DEFAULT_BODY_SELECTORS = ["article", "main", "div.article-body"]
+DEFAULT_DATE_SELECTORS = ["time", "meta[property='article:published_time']"]
+DEFAULT_STRIP_TAGS = ["script", "style", "nav", "footer", "header", "aside"]
+
+
+class SiteExtractor:
+    """Declarative description of how to scrape one news site.
+
+    Sources are configured in the JSON file at ``NEWS_SOURCES_PATH``. Only
+    ``url`` is required; ``feed`` is an RSS or Atom feed used instead of
+    scraping the source page, ``link_pattern`` selects article links on
+    the source page and the other fields override the generic article
+    selectors. ``priority`` decides which copy of a syndicated story is
+    kept, higher first. Instances are plain data so they can be sent to worker
+    processes.
+    """
+
+    def __init__(self, url: str, name: Optional[str] = None,
+                 feed: Optional[str] = None,
+                 priority: int = 0,
+                 link_pattern: str = "",
+                 title_selector: str = "h1",
+                 body_selectors: Optional[List[str]] = None,
+                 date_selectors: Optional[List[str]] = None,
+                 parse_only: Optional[List[str]] = None,
+                 strip_tags: Optional[List[str]] = None):
+        self.url = url
+        self.name = name or urlparse(url).netloc
+        self.domain = urlparse(url).netloc.removeprefix("www.")
+        self.feed = feed
+        self.priority = priority
+        self.link_pattern = link_pattern
+        self.title_selector = title_selector
+        self.body_selectors = body_selectors or DEFAULT_BODY_SELECTORS
+        self.date_selectors = date_selectors or DEFAULT_DATE_SELECTORS
+        self.parse_only = parse_only or DEFAULT_PARSE_ONLY
+        self.strip_tags = strip_tags or DEFAULT_STRIP_TAGS
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SiteExtractor":
+        return cls(
+            url=data["url"],
+            name=data.get("name"),
+            feed=data.get("feed"),
+            priority=data.get("priority", 0),
+            link_pattern=data.get("link_pattern", ""),
+            title_selector=data.get("title_selector", "h1"),
+            body_selectors=data.get("body_selectors"),
+            date_selectors=data.get("date_selectors"),
+            parse_only=data.get("parse_only"),
+            strip_tags=data.get("strip_tags")
+        )
+
+    def matches(self, url: str) -> bool:
+        """Check whether a URL belongs to this site."""
+        host = urlparse(url).netloc
+        return host == self.domain or host.endswith("." + self.domain)
+
+
+class ExtractorRegistry:
+    """Lookup of site extractors by URL."""
+
+    def __init__(self, extractors: List[SiteExtractor]):
+        self.extractors = extractors
+
+    @classmethod
+    def load(cls, path: str) -> "ExtractorRegistry":
+        """Load the scraped sources from a news sources file.
+
+        Entries with a ``type`` other than "scrape" are ignored.
+        """
+        if not os.path.exists(path):
+            logger.warning(f"News sources file {path} not found, no sources configured")
+            return cls([])
+        with open(path) as f:
+            entries = json.load(f)
+        return cls([
+            SiteExtractor.from_dict(entry) for entry in entries
+            if entry.get("type") == "scrape"
+        ])
+
+    @property
+    def sources(self) -> List[str]:
+        """URLs of the source pages to crawl."""
+        return [extractor.url for extractor in self.extractors]
+
+    def for_url(self, url: str) -> SiteExtractor:
+        """Get the extractor of the site a URL belongs to, or a generic one."""
+        for extractor in self.extractors:
+            if extractor.matches(url):
+                return extractor
+        return SiteExtractor(url)
+
+
+def select_first(soup: BeautifulSoup, selectors: List[str]) -> Optional[Tag]:
+    """Get the element matched by the first selector that matches any."""
+    for selector in selectors:
+        element = soup.select_one(selector)
+        if element:
+            return element
+    return None
+
+
+def extract_links(html: str, source: str, extractor: SiteExtractor) -> List[str]:
+    """Find article links on a source page.
+
+    Only anchors are parsed. Links are made absolute and deduplicated,
+    keeping their order on the page.
+    """
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=SoupStrainer("a", href=True))
+    links = [
+        urljoin(source, a["href"]) for a in soup.find_all("a", href=True)
+        if extractor.link_pattern in a["href"]
+    ]
+    return list(dict.fromkeys(links))
+
+
+def extract_article(html: str, extractor: SiteExtractor) -> Optional[Dict]:
+    """Extract the title, text and publication date of an article page.
+
+    Returns:
+        Dict with ``title``, ``content`` and ``published_date``, or None if
+        the page has no title or body text.
+    """
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=SoupStrainer(extractor.parse_only))
+
+    # Extract title
+    title = soup.select_one(extractor.title_selector)
+    if not title:
+        return None
+    title = title.get_text().strip()
+
+    # Extract content from the first matching body element
+    content = ""
+    article_body = select_first(soup, extractor.body_selectors)
+    if article_body is None:
+        # Fallbacks like div.article-body are outside the partial tree,
+        # pages without an article or main element are parsed in full
+        soup = BeautifulSoup(html, HTML_PARSER)
+        article_body = select_first(soup, extractor.body_selectors)
+    if article_body:
+        # Remove unwanted elements
+        for element in article_body.find_all(extractor.strip_tags):
+            element.decompose()
+
+        # Get text from paragraphs
+        paragraphs = (p.get_text().strip() for p in article_body.find_all("p"))
+        content = "\n\n".join(p for p in paragraphs if p)
+
+    if not content:
+        return None
+
+    # Extract date if available
+    date = None
+    date_element = select_first(soup, extractor.date_selectors)
+    if date_element:
+        date_str = date_element.get("datetime") or date_element.get("content")
+        if date_str:
+            try:
+                date = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+            except ValueError:
+                pass
+
+    return {"title": title, "content": content, "published_date": date}
+
+
+def parse_feed(content: bytes) -> List[Dict[str, Optional[str]]]:
+    """Parse an RSS or Atom feed.
+
+    Args:
+        content: Raw feed document.
+
+    Returns:
+        One dict per entry with a link, holding its ``guid``, ``url`` and
+        ``updated`` timestamp. Entries without an ID are identified by
+        their link, and ``updated`` falls back to the publication time.
+    """
+    feed = feedparser.parse(content)
+    entries = []
+    for entry in feed.entries:
+        url = entry.get("link")
+        if not url:
+            continue
+        parsed = entry.get("updated_parsed") or entry.get("published_parsed")
+        updated = time.strftime("%Y-%m-%dT%H:%M:%SZ", parsed) if parsed else (
+            entry.get("updated") or entry.get("published")
+        )
+        entries.append({"guid": entry.get("id") or url, "url": url, "updated": updated})
+    return entries
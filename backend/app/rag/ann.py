@@ -0,0 +1,160 @@
+import os
+from typing import Optional
+
+import numpy as np
+
+ASSIGN_BLOCK_SIZE = 8192
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Assign each vector to its most similar centroid."""
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for i in range(0, len(vectors), ASSIGN_BLOCK_SIZE):
+        block = np.asarray(vectors[i:i + ASSIGN_BLOCK_SIZE], dtype=np.float32)
+        assignments[i:i + ASSIGN_BLOCK_SIZE] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+def spherical_kmeans(vectors: np.ndarray, k: int, iterations: int = 10,
+                     seed: int = 0) -> np.ndarray:
+    """Cluster L2-normalized vectors by cosine similarity.
+
+    Args:
+        vectors: (n, dim) matrix of normalized vectors.
+        k: Number of clusters.
+        iterations: Number of Lloyd iterations.
+        seed: Random seed.
+
+    Returns:
+        (k, dim) matrix of normalized centroids.
+    """
+    rng = np.random.default_rng(seed)
+    centroids = np.array(vectors[rng.choice(len(vectors), k, replace=False)], dtype=np.float32)
+    for _ in range(iterations):
+        assignments = _assign(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=k)
+
+        # Reseed empty clusters with random vectors
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            sums[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.where(norms == 0, 1, norms)
+    return centroids
+
+
+class IVFIndex:
+    """Inverted file index over the rows of a vector matrix.
+
+    Rows are grouped by their nearest k-means centroid. A search only scores
+    the rows in the ``nprobe`` lists whose centroids are closest to the
+    query, trading recall for latency. The index stores one list number per
+    row, so rows can be added, moved and removed cheaply; the per-list row
+    order is rebuilt lazily before the next search.
+    """
+
+    def __init__(self, nprobe: int = 8):
+        """Initialize an untrained index.
+
+        Args:
+            nprobe: Default number of lists scanned per search.
+        """
+        self.nprobe = nprobe
+        self.centroids: Optional[np.ndarray] = None
+        self.trained_count = 0
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._order: Optional[np.ndarray] = None
+        self._bounds: Optional[np.ndarray] = None
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def size(self) -> int:
+        """Number of rows with a list assignment."""
+        return len(self._assignments)
+
+    def train(self, vectors: np.ndarray, n_lists: Optional[int] = None,
+              max_samples: int = 65536) -> None:
+        """Train centroids and assign every row.
+
+        Args:
+            vectors: (n, dim) matrix of normalized vectors.
+            n_lists: Number of lists, defaults to sqrt(n).
+            max_samples: Maximum number of rows used to fit the centroids.
+        """
+        n_lists = n_lists or max(16, int(np.sqrt(len(vectors))))
+        n_lists = min(n_lists, len(vectors))
+        sample = vectors
+        if len(vectors) > max_samples:
+            rows = np.random.default_rng(0).choice(len(vectors), max_samples, replace=False)
+            sample = np.asarray(vectors[np.sort(rows)])
+        self.centroids = spherical_kmeans(np.asarray(sample, dtype=np.float32), n_lists)
+        self._assignments = _assign(vectors, self.centroids)
+        self.trained_count = len(vectors)
+        self._order = None
+
+    def add(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """Assign new or updated rows to lists.
+
+        Args:
+            rows: Row numbers of the vectors.
+            vectors: (len(rows), dim) matrix of normalized vectors.
+        """
+        end = int(np.max(rows)) + 1
+        if end > len(self._assignments):
+            grown = np.empty(max(end, 2 * len(self._assignments)), dtype=np.int32)
+            grown[:len(self._assignments)] = self._assignments
+            self._assignments = grown
+        self._assignments[rows] = _assign(vectors, self.centroids)
+        self._order = None
+
+    def move(self, source: int, target: int) -> None:
+        """Record that a row was moved from ``source`` to ``target``."""
+        self._assignments[target] = self._assignments[source]
+        self._order = None
+
+    def candidates(self, query: np.ndarray, count: int,
+                   nprobe: Optional[int] = None) -> np.ndarray:
+        """Get the rows in the lists nearest to the query.
+
+        Args:
+            query: Normalized query vector.
+            count: Number of live rows; rows past it are ignored.
+            nprobe: Number of lists to scan, defaults to ``self.nprobe``.
+
+        Returns:
+            Array of candidate row numbers.
+        """
+        n_lists = len(self.centroids)
+        if self._order is None or len(self._order) != count:
+            assignments = self._assignments[:count]
+            self._order = np.argsort(assignments, kind="stable").astype(np.int64)
+            self._bounds = np.searchsorted(assignments[self._order], np.arange(n_lists + 1))
+
+        nprobe = min(nprobe or self.nprobe, n_lists)
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([self._order[self._bounds[i]:self._bounds[i + 1]] for i in lists])
+
+    def save(self, path: str, count: int) -> None:
+        """Save the centroids and the assignments of the first ``count`` rows."""
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            centroids=self.centroids,
+            assignments=self._assignments[:count],
+            trained_count=self.trained_count
+        )
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> None:
+        """Load an index saved with ``save``."""
+        with np.load(path) as data:
+            self.centroids = data["centroids"]
+            self._assignments = data["assignments"].copy()
+            self.trained_count = int(data["trained_count"])
+        self._order = None
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from collections import Counter
+from typing import Awaitable, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """Group concurrent single-item calls into batched calls.
+
+    The first item submitted opens a batch that is flushed after ``window``
+    seconds, or as soon as it holds ``max_batch_size`` items. The handler
+    receives the items in submission order and must return one result per
+    item, which is then delivered to the caller that submitted it.
+    """
+
+    def __init__(self, handler: Callable[[List[T]], Awaitable[List[R]]],
+                 window: float, max_batch_size: int):
+        """Initialize the batcher.
+
+        Args:
+            handler: Coroutine function processing a list of items.
+            window: Maximum time in seconds an item waits for others.
+            max_batch_size: Number of items that flushes a batch early.
+        """
+        self.handler = handler
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.batches = 0
+        self.items = 0
+        self.batch_sizes: Counter = Counter()
+
+    async def submit(self, item: T) -> R:
+        """Add an item to the current batch and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.batches += 1
+        self.items += len(batch)
+        self.batch_sizes[len(batch)] += 1
+        # Keep a reference so the task is not garbage collected mid-flight
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[T, asyncio.Future]]) -> None:
+        try:
+            results = await self.handler([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"Expected {len(batch)} results, got {len(results)}")
+        except Exception as e:
+            logger.error(f"Batch of {len(batch)} items failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            # The caller may have been cancelled while waiting
+            if not future.done():
+                future.set_result(result)
+
+    def get_stats(self) -> Dict:
+        """Get the number of batches and the distribution of batch sizes."""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_batch_size": max(self.batch_sizes, default=0),
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+        }
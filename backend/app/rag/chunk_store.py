@@ -0,0 +1,210 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.models import Article, Chunk
+from app.schemas.message import SearchResult
+
+# Payload fields kept in the vector store, for filtering and re-ranking
+FILTER_FIELDS = ("source", "published_date")
+
+
+class ChunkStore:
+    """Article metadata and chunk texts kept in the SQL database.
+
+    Vector payloads only carry the filter fields, so searches move little
+    data; results are hydrated from here with one ``IN`` query per search.
+    Hydrated chunks are kept in a bounded LRU cache. Chunk IDs change with
+    the chunk's text, so cached entries only go stale when an article's
+    title or date changes, and storing an article evicts its chunks.
+    """
+
+    def __init__(self, session_factory: Callable = SessionLocal,
+                 cache_size: int = settings.CHUNK_CACHE_SIZE):
+        """Initialize the store.
+
+        Args:
+            session_factory: Factory of database sessions.
+            cache_size: Maximum number of hydrated chunks kept in process.
+        """
+        self.session_factory = session_factory
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, chunks: List[Dict]) -> None:
+        """Store chunks and their articles in bulk.
+
+        Args:
+            chunks: Dicts with the chunk's ``id``, ``text`` and ``position``,
+                and its article's ``article_url``, ``article_title``,
+                ``source`` and ISO ``published_date``.
+        """
+        if not chunks:
+            return
+        articles = {
+            chunk["article_url"]: {
+                "url": chunk["article_url"],
+                "title": chunk["article_title"],
+                "source": chunk.get("source"),
+                "published_date": chunk.get("published_date"),
+                "stored_at": datetime.utcnow(),
+            }
+            for chunk in chunks
+        }
+        db = self.session_factory()
+        try:
+            existing = {
+                row.url for row in db.query(Article.url).filter(Article.url.in_(list(articles)))
+            }
+            db.bulk_insert_mappings(Article, [a for url, a in articles.items() if url not in existing])
+            db.bulk_update_mappings(Article, [a for url, a in articles.items() if url in existing])
+
+            # IDs are derived from the text, an existing chunk is unchanged
+            stored = {
+                row.id for row in db.query(Chunk.id).filter(Chunk.id.in_([c["id"] for c in chunks]))
+            }
+            db.bulk_insert_mappings(Chunk, [
+                {
+                    "id": chunk["id"],
+                    "article_url": chunk["article_url"],
+                    "position": chunk["position"],
+                    "text": chunk["text"],
+                }
+                for chunk in chunks if chunk["id"] not in stored
+            ])
+            db.commit()
+        finally:
+            db.close()
+
+        with self._lock:
+            for chunk in chunks:
+                self._cache.pop(chunk["id"], None)
+
+    def get(self, ids: List[str]) -> Dict[str, Dict]:
+        """Get the text and meta of chunks.
+
+        Returns:
+            Mapping of chunk ID to a dict with its ``text`` and its ``meta``
+            (article URL, title, source, publication date and position),
+            for the chunks that were found.
+        """
+        found = {}
+        with self._lock:
+            for chunk_id in ids:
+                entry = self._cache.get(chunk_id)
+                if entry is not None:
+                    self._cache.move_to_end(chunk_id)
+                    found[chunk_id] = entry
+        missing = [chunk_id for chunk_id in ids if chunk_id not in found]
+        if not missing:
+            return found
+
+        db = self.session_factory()
+        try:
+            rows = (
+                db.query(Chunk.id, Chunk.text, Chunk.position, Article.url, Article.title,
+                         Article.source, Article.published_date)
+                .join(Article, Chunk.article_url == Article.url)
+                .filter(Chunk.id.in_(missing))
+                .all()
+            )
+        finally:
+            db.close()
+
+        with self._lock:
+            for row in rows:
+                entry = found[row.id] = {
+                    "text": row.text,
+                    "meta": {
+                        "article_url": row.url,
+                        "article_title": row.title,
+                        "source": row.source,
+                        "published_date": row.published_date,
+                        "position": row.position,
+                    },
+                }
+                self._cache[row.id] = entry
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return found
+
+    def hydrate(self, results: List[SearchResult]) -> List[SearchResult]:
+        """Fill in the text and meta of search results with slim payloads.
+
+        Results whose chunk is not in the database are returned as they are
+        if they carry their text, as points stored with full payloads do,
+        and dropped otherwise.
+        """
+        chunks = self.get([result.id for result in results])
+        return [
+            result.model_copy(update={
+                "text": chunks[result.id]["text"],
+                "meta": {**(result.meta or {}), **chunks[result.id]["meta"]},
+            }) if result.id in chunks else result
+            for result in results if result.id in chunks or result.text
+        ]
+
+    def texts(self, ids: List[str]) -> Dict[str, str]:
+        """Get the texts of chunks, bypassing the cache.
+
+        Returns:
+            Mapping of chunk ID to text, for the chunks that were found.
+        """
+        if not ids:
+            return {}
+        db = self.session_factory()
+        try:
+            return dict(db.query(Chunk.id, Chunk.text).filter(Chunk.id.in_(ids)).all())
+        finally:
+            db.close()
+
+    def delete(self, ids: List[str]) -> None:
+        """Delete chunks, and the articles left without any."""
+        if not ids:
+            return
+        db = self.session_factory()
+        try:
+            urls = [
+                row.article_url for row in
+                db.query(Chunk.article_url).filter(Chunk.id.in_(ids)).distinct()
+            ]
+            db.query(Chunk).filter(Chunk.id.in_(ids)).delete(synchronize_session=False)
+            if urls:
+                db.query(Article).filter(
+                    Article.url.in_(urls), ~Article.chunks.any()
+                ).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+        with self._lock:
+            for chunk_id in ids:
+                self._cache.pop(chunk_id, None)
+
+    def delete_articles(self, urls: List[str]) -> None:
+        """Delete articles and all their chunks."""
+        if not urls:
+            return
+        db = self.session_factory()
+        try:
+            db.query(Chunk).filter(Chunk.article_url.in_(urls)).delete(synchronize_session=False)
+            db.query(Article).filter(Article.url.in_(urls)).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+        dropped = set(urls)
+        with self._lock:
+            for chunk_id in [
+                chunk_id for chunk_id, entry in self._cache.items()
+                if entry["meta"]["article_url"] in dropped
+            ]:
+                del self._cache[chunk_id]
+
+
+# Singleton instance
+chunk_store = ChunkStore()
@@ -0,0 +1,118 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.schemas.message import SearchResult
+
+
+def mmr_select(results: List[SearchResult], k: int,
+               diversity_lambda: float = settings.MMR_LAMBDA,
+               duplicate_threshold: float = settings.CONTEXT_DUPLICATE_THRESHOLD) -> List[SearchResult]:
+    """Pick ``k`` relevant but diverse results by Maximal Marginal Relevance.
+
+    Each step picks the result maximizing
+    ``lambda * relevance - (1 - lambda) * max similarity to the picked ones``.
+    Relevance is the result's score scaled to [0, 1], so the ranking of
+    hybrid search and recency decay is kept, and similarity is the cosine
+    of the result embeddings, computed once as a single matrix product.
+    Results at least ``duplicate_threshold`` similar to a picked one are
+    never picked. Results without an embedding are only ranked by score.
+
+    Args:
+        results: Candidates, with their embeddings.
+        k: Number of results to pick.
+        diversity_lambda: Weight of relevance against novelty.
+        duplicate_threshold: Similarity from which a result is a near duplicate.
+
+    Returns:
+        The picked results, in the order they were picked.
+    """
+    if len(results) <= 1 or k <= 0:
+        return results[:k]
+    embedded = [i for i, result in enumerate(results) if result.embedding]
+    if not embedded:
+        return results[:k]
+
+    dim = len(results[embedded[0]].embedding)
+    vectors = np.zeros((len(results), dim), dtype=np.float32)
+    vectors[embedded] = [results[i].embedding for i in embedded]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms == 0, 1, norms)
+    similarity = vectors @ vectors.T
+
+    scores = np.array([result.score for result in results], dtype=np.float32)
+    spread = scores.max() - scores.min()
+    relevance = (scores - scores.min()) / spread if spread > 0 else np.ones_like(scores)
+
+    picked = [int(np.argmax(relevance))]
+    max_similarity = similarity[picked[0]].copy()
+    available = np.ones(len(results), dtype=bool)
+    available[picked[0]] = False
+    while len(picked) < k:
+        available &= max_similarity < duplicate_threshold
+        if not available.any():
+            break
+        marginal = diversity_lambda * relevance - (1 - diversity_lambda) * max_similarity
+        best = int(np.argmax(np.where(available, marginal, -np.inf)))
+        picked.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+    return [results[i] for i in picked]
+
+
+def merge_adjacent(results: List[SearchResult]) -> List[SearchResult]:
+    """Merge results that are consecutive chunks of the same article.
+
+    Each run of consecutive positions becomes one result, in place of its
+    best-ranked chunk, with the texts joined in article order, the best
+    score and the IDs of the merged chunks in ``meta["chunk_ids"]``.
+    Results without an article URL and position are kept as they are.
+    """
+    runs: List[List[Tuple[int, int]]] = []
+    by_article: Dict[str, List[Tuple[int, int]]] = {}
+    for rank, result in enumerate(results):
+        meta = result.meta or {}
+        if meta.get("article_url") is None or meta.get("position") is None:
+            runs.append([(rank, 0)])
+        else:
+            by_article.setdefault(meta["article_url"], []).append((rank, int(meta["position"])))
+    for chunks in by_article.values():
+        chunks.sort(key=lambda chunk: chunk[1])
+        run = [chunks[0]]
+        for chunk in chunks[1:]:
+            if chunk[1] == run[-1][1] + 1:
+                run.append(chunk)
+            else:
+                runs.append(run)
+                run = [chunk]
+        runs.append(run)
+
+    merged = []
+    for run in sorted(runs, key=lambda run: min(rank for rank, _ in run)):
+        if len(run) == 1:
+            merged.append(results[run[0][0]])
+            continue
+        best = results[min(rank for rank, _ in run)]
+        merged.append(best.model_copy(update={
+            "text": "\n\n".join(results[rank].text for rank, _ in run),
+            "meta": {**best.meta, "chunk_ids": [results[rank].id for rank, _ in run]},
+        }))
+    return merged
+
+
+def context_chunk_ids(results: List[SearchResult]) -> List[str]:
+    """Get the IDs of the chunks in a context, those of merged results included."""
+    return [
+        chunk_id for result in results
+        for chunk_id in (result.meta or {}).get("chunk_ids", [result.id])
+    ]
+
+
+def select_context(results: List[SearchResult], k: int = settings.CONTEXT_CHUNKS) -> List[SearchResult]:
+    """Select the chunks of a prompt's context from the retrieved candidates.
+
+    Picks ``k`` diverse chunks by MMR, dropping near duplicates, then
+    merges the picked chunks that follow each other in an article.
+    """
+    return merge_adjacent(mmr_select(results, k))
@@ -0,0 +1,145 @@
+import hashlib
+import re
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.models import ArticleSignature, LshBucket
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+
+def _shingles(text: str, size: int) -> List[str]:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return [" ".join(words)]
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+class MinHasher:
+    """MinHash signatures of word shingles.
+
+    Each of the ``num_perm`` hash functions is a random affine map modulo a
+    Mersenne prime applied to a 32-bit BLAKE2 hash of a shingle; CRC32 is
+    avoided because its linearity correlates the minima of similar
+    shingles. Parameters come from a fixed seed, so signatures are
+    comparable across processes and runs.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """Compute the (num_perm,) uint32 signature of a text."""
+        hashes = np.array([
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+            for s in set(_shingles(text, self.shingle_size))
+        ], dtype=np.uint64)
+        # a * x + b wraps around at 2**64 before the modulo, as in datasketch
+        values = (np.outer(hashes, self._a) + self._b) % MERSENNE_PRIME
+        return values.min(axis=0).astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimate the Jaccard similarity of two texts from their signatures."""
+    return float(np.mean(a == b))
+
+
+class NearDuplicateIndex:
+    """Persisted LSH index of article MinHash signatures.
+
+    A signature is split into ``bands`` bands; articles sharing any band
+    are candidates, and a candidate is a near duplicate when its estimated
+    Jaccard similarity reaches ``threshold``. Signatures and band buckets
+    are stored in the database so duplicates are found across runs.
+    """
+
+    def __init__(self, hasher: MinHasher, bands: int, threshold: float,
+                 session_factory: Callable = SessionLocal):
+        """Initialize the index.
+
+        Args:
+            hasher: MinHasher producing the signatures.
+            bands: Number of LSH bands, must divide the number of hash functions.
+            threshold: Minimum estimated similarity of a near duplicate.
+            session_factory: Factory of database sessions.
+        """
+        if hasher.num_perm % bands:
+            raise ValueError("Number of bands must divide the number of hash functions")
+        self.hasher = hasher
+        self.bands = bands
+        self.threshold = threshold
+        self.session_factory = session_factory
+
+    def _bucket_keys(self, signature: np.ndarray) -> List[str]:
+        rows = len(signature) // self.bands
+        return [
+            f"{band}:{hashlib.blake2b(signature[band * rows:(band + 1) * rows].tobytes(), digest_size=8).hexdigest()}"
+            for band in range(self.bands)
+        ]
+
+    def find(self, url: str, signature: np.ndarray) -> Optional[Tuple[str, int, float]]:
+        """Find the most similar stored article other than ``url``.
+
+        Returns:
+            Tuple of (URL, priority, similarity) of the best near duplicate,
+            or None if there is none.
+        """
+        db = self.session_factory()
+        try:
+            candidates = {
+                row.url for row in db.query(LshBucket.url)
+                .filter(LshBucket.key.in_(self._bucket_keys(signature)))
+            }
+            candidates.discard(url)
+            if not candidates:
+                return None
+            best = None
+            for row in db.query(ArticleSignature).filter(ArticleSignature.url.in_(candidates)):
+                score = similarity(signature, np.frombuffer(row.signature, dtype=np.uint32))
+                if score >= self.threshold and (best is None or score > best[2]):
+                    best = (row.url, row.priority, score)
+            return best
+        finally:
+            db.close()
+
+    def add(self, url: str, signature: np.ndarray, priority: int = 0) -> None:
+        """Add or replace the signature of an article."""
+        db = self.session_factory()
+        try:
+            db.query(LshBucket).filter(LshBucket.url == url).delete()
+            db.merge(ArticleSignature(url=url, priority=priority, signature=signature.tobytes()))
+            db.add_all(LshBucket(key=key, url=url) for key in set(self._bucket_keys(signature)))
+            db.commit()
+        finally:
+            db.close()
+
+    def remove(self, url: str) -> None:
+        """Remove an article from the index."""
+        self.remove_many([url])
+
+    def remove_many(self, urls: List[str]) -> None:
+        """Remove articles from the index in bulk."""
+        if not urls:
+            return
+        db = self.session_factory()
+        try:
+            db.query(LshBucket).filter(LshBucket.url.in_(urls)).delete(synchronize_session=False)
+            db.query(ArticleSignature).filter(ArticleSignature.url.in_(urls)).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+
+# Singleton instance
+duplicate_index = NearDuplicateIndex(
+    MinHasher(settings.DEDUP_NUM_PERM, settings.DEDUP_SHINGLE_SIZE),
+    settings.DEDUP_BANDS,
+    settings.DEDUP_THRESHOLD
+)
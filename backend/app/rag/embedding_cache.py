@@ -0,0 +1,310 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(model: str, mode: str, text: str) -> str:
+    """Build a content-addressed cache key for an embedding."""
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{model}:{mode}:{digest}"
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a user query so trivially different phrasings share cache entries."""
+    query = unicodedata.normalize("NFKC", query).lower()
+    query = re.sub(r"\s+", " ", query).strip()
+    return query.rstrip("?!. ")
+
+
+class EmbeddingCache(ABC):
+    """Abstract base class for embedding caches."""
+
+    @abstractmethod
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Look up cached embeddings.
+
+        Args:
+            keys: Cache keys to look up.
+
+        Returns:
+            Mapping of key to embedding for the keys that were found.
+        """
+        pass
+
+    @abstractmethod
+    def set_many(self, items: Dict[str, np.ndarray]) -> None:
+        """Store embeddings in the cache.
+
+        Args:
+            items: Mapping of key to embedding.
+        """
+        pass
+
+
+class DiskEmbeddingCache(EmbeddingCache):
+    """Embedding cache stored as float32 blobs in a local SQLite file.
+
+    Entries are evicted least recently used first once the cache holds more
+    than ``max_entries`` embeddings.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        """Initialize the disk cache.
+
+        Args:
+            path: Path of the SQLite file.
+            max_entries: Maximum number of embeddings to keep.
+        """
+        self.max_entries = max_entries
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_accessed_at ON embeddings (accessed_at)"
+        )
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        if not keys:
+            return {}
+        found = {}
+        with self._lock:
+            # Stay below SQLite's bound parameter limit
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).copy()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET accessed_at = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+        return found
+
+    def set_many(self, items: Dict[str, np.ndarray]) -> None:
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            new_keys = len(items) - len(self._find_existing(list(items)))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, accessed_at) VALUES (?, ?, ?)",
+                [
+                    (key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+                    for key, vector in items.items()
+                ]
+            )
+            self._count += new_keys
+            if self._count > self.max_entries:
+                overflow = self._count - self.max_entries
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY accessed_at LIMIT ?)",
+                    (overflow,)
+                )
+                self._count -= overflow
+            self._conn.commit()
+
+    def _find_existing(self, keys: List[str]) -> List[str]:
+        existing = []
+        for i in range(0, len(keys), 500):
+            batch = keys[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT key FROM embeddings WHERE key IN ({placeholders})", batch
+            ).fetchall()
+            existing.extend(row[0] for row in rows)
+        return existing
+
+
+class RedisEmbeddingCache(EmbeddingCache):
+    """Embedding cache shared through Redis."""
+
+    def __init__(self, ttl: int):
+        """Initialize the Redis cache.
+
+        Args:
+            ttl: Time to live of cached embeddings in seconds.
+        """
+        self.ttl = ttl
+        self.redis = redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            username=settings.REDIS_USERNAME,
+            password=settings.REDIS_PASSWORD
+        )
+
+    def _get_key(self, key: str) -> str:
+        return f"embedding:{key}"
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        if not keys:
+            return {}
+        blobs = self.redis.mget([self._get_key(key) for key in keys])
+        return {
+            key: np.frombuffer(blob, dtype=np.float32).copy()
+            for key, blob in zip(keys, blobs)
+            if blob is not None
+        }
+
+    def set_many(self, items: Dict[str, np.ndarray]) -> None:
+        if not items:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        for key, vector in items.items():
+            pipe.setex(self._get_key(key), self.ttl, np.asarray(vector, dtype=np.float32).tobytes())
+        pipe.execute()
+
+
+class QueryEmbeddingCache:
+    """Bounded in-process LRU cache of query embeddings with a TTL.
+
+    Entries are keyed on the normalized query text. When a Redis client is
+    given, it is used as a second level shared by all workers.
+    """
+
+    def __init__(self, model: str, max_size: int, ttl: int,
+                 redis_client: Optional[aioredis.Redis] = None):
+        """Initialize the query cache.
+
+        Args:
+            model: Embedding model name, part of the Redis key.
+            max_size: Maximum number of queries kept in process.
+            ttl: Time to live of entries in seconds.
+            redis_client: Optional Redis client shared across workers.
+        """
+        self.model = model
+        self.max_size = max_size
+        self.ttl = ttl
+        self.redis = redis_client
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_redis_key(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return f"query_embedding:{self.model}:{digest}"
+
+    async def get(self, query: str) -> Optional[np.ndarray]:
+        """Get the cached embedding of a query, if any."""
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._entries[key]
+
+        if self.redis is not None:
+            try:
+                blob = await self.redis.get(self._get_redis_key(key))
+            except redis.RedisError as e:
+                logger.warning(f"Query embedding cache lookup failed: {e}")
+                blob = None
+            if blob is not None:
+                embedding = np.frombuffer(blob, dtype=np.float32).copy()
+                self._put_local(key, embedding)
+                with self._lock:
+                    self.redis_hits += 1
+                return embedding
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    async def set(self, query: str, embedding: np.ndarray) -> None:
+        """Cache the embedding of a query."""
+        key = normalize_query(query)
+        embedding = np.asarray(embedding, dtype=np.float32)
+        self._put_local(key, embedding)
+        if self.redis is not None:
+            try:
+                await self.redis.setex(self._get_redis_key(key), self.ttl, embedding.tobytes())
+            except redis.RedisError as e:
+                logger.warning(f"Query embedding cache store failed: {e}")
+
+    def _put_local(self, key: str, embedding: np.ndarray) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get hit and miss counters."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+            }
+
+
+def create_query_embedding_cache(model: str) -> QueryEmbeddingCache:
+    """Create the query embedding cache configured in settings."""
+    redis_client = None
+    if settings.QUERY_CACHE_REDIS:
+        redis_client = aioredis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            username=settings.REDIS_USERNAME,
+            password=settings.REDIS_PASSWORD
+        )
+    return QueryEmbeddingCache(
+        model,
+        settings.QUERY_CACHE_SIZE,
+        settings.QUERY_CACHE_TTL,
+        redis_client
+    )
+
+
+def create_embedding_cache() -> Optional[EmbeddingCache]:
+    """Create the embedding cache configured in settings."""
+    backend = settings.EMBEDDING_CACHE_BACKEND
+    if backend == "disk":
+        return DiskEmbeddingCache(
+            settings.EMBEDDING_CACHE_PATH,
+            settings.EMBEDDING_CACHE_MAX_ENTRIES
+        )
+    if backend == "redis":
+        return RedisEmbeddingCache(settings.EMBEDDING_CACHE_TTL)
+    if backend != "none":
+        logger.warning(f"Unknown embedding cache backend {backend!r}, caching disabled")
+    return None
@@ -1,73 +1,198 @@
+import logging
+import math
 import os
-from typing import List
+from typing import List, Optional
+import httpx
 import numpy as np
-import requests
 
 from app.core.config import settings
+from app.core.executor import run_blocking
+from app.rag.batcher import MicroBatcher
+from app.rag.embedding_cache import (
+    EmbeddingCache,
+    QueryEmbeddingCache,
+    create_embedding_cache,
+    create_query_embedding_cache,
+    make_cache_key,
+)
+
+logger = logging.getLogger(__name__)
 
 JINA_API_URL = "https://api.jina.ai/v1/embeddings"
 JINA_MODEL = "jina-embeddings-v2-base-en"
 JINA_DIMENSIONS = 768
+JINA_BATCH_SIZE = 20
+
+
+class EmbeddingStats:
+    """Counters describing how an embedding workload used the cache."""
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.api_calls = 0
+        self.api_calls_saved = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.hits} cache hits, {self.misses} misses "
+            f"({self.hit_rate:.0%} hit rate), {self.api_calls} API calls, "
+            f"{self.api_calls_saved} API calls saved"
+        )
+
 
 class JinaEmbeddingService:
     """Service for generating embeddings using Jina AI HTTP API."""
-    def __init__(self):
+    def __init__(self, cache: Optional[EmbeddingCache] = None,
+                 query_cache: Optional[QueryEmbeddingCache] = None):
         self.api_key = settings.JINA_API_KEY
         self.model = JINA_MODEL
         self.dimensions = JINA_DIMENSIONS
+        self.cache = cache
+        self.query_cache = query_cache
+        self._client: Optional[httpx.AsyncClient] = None
+        self.query_batcher: Optional[MicroBatcher] = None
+        if settings.QUERY_BATCH_WINDOW_MS > 0:
+            # Concurrent chat turns share one API call per window
+            self.query_batcher = MicroBatcher(
+                self._embed_queries,
+                settings.QUERY_BATCH_WINDOW_MS / 1000,
+                settings.QUERY_BATCH_MAX_SIZE
+            )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {self.api_key}"
+                },
+                timeout=settings.EMBEDDING_REQUEST_TIMEOUT
+            )
+        return self._client
+
+    async def embed_query(self, query: str) -> Optional[np.ndarray]:
+        """
+        Generate the embedding of a search query, using the query cache.
+        Args:
+            query: Query text.
+        Returns:
+            Query embedding, or None if it could not be generated.
+        """
+        if self.query_cache:
+            embedding = await self.query_cache.get(query)
+            if embedding is not None:
+                return embedding
+
+        if self.query_batcher:
+            embedding = await self.query_batcher.submit(query)
+        else:
+            embedding = (await self._embed_queries([query]))[0]
+        if not np.any(embedding):
+            return None
 
-    def generate_embeddings(self, texts: List[str], mode: str = "passage") -> List[np.ndarray]:
+        if self.query_cache:
+            await self.query_cache.set(query, embedding)
+        return embedding
+
+    async def _embed_queries(self, queries: List[str]) -> List[np.ndarray]:
+        """Embed a batch of search queries in as few API calls as possible."""
+        return await self.generate_embeddings(queries, mode="query")
+
+    async def generate_embeddings(self, texts: List[str], mode: str = "passage",
+                            stats: Optional[EmbeddingStats] = None) -> List[np.ndarray]:
         """
         Generate embeddings for a batch of texts.
         Args:
             texts: List of text strings to embed.
             mode: 'passage' for indexing, 'query' for searching
+            stats: Optional counters updated with cache hits and API calls.
         Returns:
             List of embedding vectors as numpy arrays.
         """
         if not texts:
             return []
-        
-        batch_size = 20
-        all_embeddings = []
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
+
+        # Look up cached embeddings, only misses are sent to the API
+        keys = [make_cache_key(self.model, mode, text) for text in texts]
+        cached = {}
+        if self.cache:
             try:
-                # Format the request according to Jina API docs
-                data = {
-                    "model": self.model,
-                    "input": batch,
-                    "task": f"retrieval.{mode}"
-                }
-                
-                response = requests.post(JINA_API_URL, headers=headers, json=data)
-                response.raise_for_status()
-                
-                # Parse response
-                result = response.json()
-                if "data" not in result:
-                    raise Exception(f"Unexpected API response format: {result}")
-                
-                # Extract embeddings
-                batch_embeddings = []
-                for item in result["data"]:
-                    if "embedding" not in item:
-                        raise Exception(f"Missing embedding in response: {item}")
-                    batch_embeddings.append(np.array(item["embedding"]))
-                
-                all_embeddings.extend(batch_embeddings)
-                
+                cached = await run_blocking(self.cache.get_many, list(set(keys)))
             except Exception as e:
-                # Add zero vectors as placeholders
-                all_embeddings.extend([np.zeros(self.dimensions) for _ in range(len(batch))])
-        
-        return all_embeddings
+                # An unavailable cache only costs API calls
+                logger.warning(f"Embedding cache lookup failed: {e}")
+        missing = list(dict.fromkeys(
+            text for text, key in zip(texts, keys) if key not in cached
+        ))
+
+        fetched = {}
+        api_calls = 0
+        for i in range(0, len(missing), JINA_BATCH_SIZE):
+            batch = missing[i:i + JINA_BATCH_SIZE]
+            api_calls += 1
+            try:
+                batch_embeddings = await self._request_embeddings(batch, mode)
+            except Exception as e:
+                logger.error(f"Embedding request for {len(batch)} texts failed: {e}")
+                # Add zero vectors as placeholders, they are not cached
+                for text in batch:
+                    fetched[make_cache_key(self.model, mode, text)] = np.zeros(self.dimensions, dtype=np.float32)
+                continue
+            new_items = {
+                make_cache_key(self.model, mode, text): embedding
+                for text, embedding in zip(batch, batch_embeddings)
+            }
+            fetched.update(new_items)
+            if self.cache:
+                try:
+                    await run_blocking(self.cache.set_many, new_items)
+                except Exception as e:
+                    logger.warning(f"Embedding cache store failed: {e}")
+
+        if stats is not None:
+            hits = sum(1 for key in keys if key in cached)
+            stats.hits += hits
+            stats.misses += len(keys) - hits
+            stats.api_calls += api_calls
+            stats.api_calls_saved += math.ceil(len(texts) / JINA_BATCH_SIZE) - api_calls
+
+        return [cached[key] if key in cached else fetched[key] for key in keys]
+
+    async def _request_embeddings(self, batch: List[str], mode: str) -> List[np.ndarray]:
+        """Request embeddings for a single batch from the Jina API."""
+        # Format the request according to Jina API docs
+        data = {
+            "model": self.model,
+            "input": batch,
+            "task": f"retrieval.{mode}"
+        }
+
+        response = await self.client.post(JINA_API_URL, json=data)
+        response.raise_for_status()
+
+        # Parse response
+        result = response.json()
+        if "data" not in result:
+            raise Exception(f"Unexpected API response format: {result}")
+
+        # Extract embeddings
+        batch_embeddings = []
+        for item in result["data"]:
+            if "embedding" not in item:
+                raise Exception(f"Missing embedding in response: {item}")
+            batch_embeddings.append(np.array(item["embedding"], dtype=np.float32))
+
+        return batch_embeddings
 
 # Singleton instance
-embedding_service = JinaEmbeddingService()
\ No newline at end of file
+embedding_service = JinaEmbeddingService(
+    cache=create_embedding_cache(),
+    query_cache=create_query_embedding_cache(JINA_MODEL)
+)
@@ -0,0 +1,46 @@
+from typing import Dict, List, Optional
+
+from app.db.database import SessionLocal
+from app.db.models import FeedEntry
+
+
+class FeedState:
+    """Persisted record of the feed entries already ingested."""
+
+    def get(self, guids: List[str]) -> Dict[str, Optional[str]]:
+        """Get the ``updated`` timestamp recorded for each known entry.
+
+        Args:
+            guids: Entry IDs to look up.
+
+        Returns:
+            Mapping of entry ID to its timestamp when it was last ingested.
+        """
+        if not guids:
+            return {}
+        db = SessionLocal()
+        try:
+            rows = db.query(FeedEntry).filter(FeedEntry.guid.in_(guids)).all()
+            return {row.guid: row.updated for row in rows}
+        finally:
+            db.close()
+
+    def update(self, entries: Dict[str, Dict[str, Optional[str]]]) -> None:
+        """Record ingested feed entries.
+
+        Args:
+            entries: Mapping of entry ID to a dict with its ``url`` and ``updated``.
+        """
+        if not entries:
+            return
+        db = SessionLocal()
+        try:
+            for guid, entry in entries.items():
+                db.merge(FeedEntry(guid=guid, url=entry["url"], updated=entry["updated"]))
+            db.commit()
+        finally:
+            db.close()
+
+
+# Singleton instance
+feed_state = FeedState()
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from app.core.config import settings
+from app.core.executor import run_blocking
+from app.rag.http_cache import HttpCache
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Token bucket limiting the request rate against a single host."""
+
+    def __init__(self, rate: float, capacity: float):
+        """Initialize the bucket.
+
+        Args:
+            rate: Tokens added per second.
+            capacity: Maximum number of tokens (burst size).
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and consume it."""
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class FetchStats:
+    """Counters describing how fetches used the HTTP cache."""
+    def __init__(self):
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_downloaded = 0
+        self.bytes_saved = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.requests} requests, {self.not_modified} not modified, "
+            f"{self.bytes_downloaded / 2**20:.1f} MB downloaded, "
+            f"{self.bytes_saved / 2**20:.1f} MB saved"
+        )
+
+
+def is_not_modified(response: httpx.Response) -> bool:
+    """Check whether a response was answered from the cache after a 304."""
+    return response.extensions.get("not_modified", False)
+
+
+class AsyncFetcher:
+    """Concurrent HTTP fetcher with per-domain rate limiting.
+
+    All requests share one pooled ``httpx.AsyncClient`` so connections to the
+    same host are kept alive and reused. Each host gets its own token bucket,
+    and a global semaphore bounds the number of requests in flight.
+
+    With an ``HttpCache``, requests for URLs seen before carry
+    ``If-None-Match``/``If-Modified-Since``. A 304 is returned as a 200
+    response with the cached body, which ``is_not_modified`` recognizes.
+    """
+
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        max_concurrency: int = settings.INGEST_MAX_CONCURRENCY,
+        domain_rate: float = settings.INGEST_DOMAIN_RATE,
+        domain_burst: int = settings.INGEST_DOMAIN_BURST,
+        timeout: float = settings.INGEST_REQUEST_TIMEOUT,
+        cache: Optional[HttpCache] = None
+    ):
+        """Initialize the fetcher.
+
+        Args:
+            headers: Default headers sent with every request.
+            max_concurrency: Maximum number of requests in flight.
+            domain_rate: Requests per second allowed against a single host.
+            domain_burst: Number of requests a host may receive back to back.
+            timeout: Request timeout in seconds.
+            cache: Optional cache used to make requests conditional.
+        """
+        self.headers = headers or {}
+        self.max_concurrency = max_concurrency
+        self.domain_rate = domain_rate
+        self.domain_burst = domain_burst
+        self.timeout = timeout
+        self.cache = cache
+        self.stats = FetchStats()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Get the shared client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                )
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._buckets = {}
+        return self._client
+
+    def _get_bucket(self, url: str) -> TokenBucket:
+        domain = urlparse(url).netloc
+        if domain not in self._buckets:
+            self._buckets[domain] = TokenBucket(self.domain_rate, self.domain_burst)
+        return self._buckets[domain]
+
+    async def get(self, url: str) -> httpx.Response:
+        """Fetch a URL, respecting the per-domain and global limits.
+
+        Args:
+            url: URL to fetch.
+
+        Returns:
+            The HTTP response, rebuilt from the cache if the server answered 304.
+
+        Raises:
+            httpx.HTTPError: If the request fails or returns an error status.
+        """
+        client = self.client
+        headers = {}
+        if self.cache:
+            etag, last_modified = await run_blocking(self.cache.get_validators, url)
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        await self._get_bucket(url).acquire()
+        async with self._semaphore:
+            response = await client.get(url, headers=headers)
+        self.stats.requests += 1
+
+        if response.status_code == 304 and self.cache:
+            body = await run_blocking(self.cache.get_body, url)
+            if body is not None:
+                self.stats.not_modified += 1
+                self.stats.bytes_saved += len(body)
+                return httpx.Response(
+                    200,
+                    content=body,
+                    request=response.request,
+                    extensions={"not_modified": True}
+                )
+        response.raise_for_status()
+        self.stats.bytes_downloaded += len(response.content)
+
+        if self.cache:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if etag or last_modified:
+                await run_blocking(self.cache.set, url, etag, last_modified, response.content)
+            elif headers:
+                # The URL stopped sending validators
+                await run_blocking(self.cache.delete, url)
+        return response
+
+    async def aclose(self) -> None:
+        """Close the shared client and its connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,90 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional, Tuple
+
+
+class HttpCache:
+    """Persistent cache of HTTP validators and response bodies.
+
+    Stores the ETag and Last-Modified headers of each URL together with its
+    zlib-compressed body in a local SQLite file, so a later request can be
+    made conditional and a 304 answered from disk. Entries are evicted least
+    recently used first once the compressed bodies exceed ``max_bytes``.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        """Initialize the cache.
+
+        Args:
+            path: Path of the SQLite file.
+            max_bytes: Maximum total size of the compressed bodies.
+        """
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, "
+            "body BLOB NOT NULL, size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+        )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get_validators(self, url: str) -> Tuple[Optional[str], Optional[str]]:
+        """Get the ETag and Last-Modified values stored for a URL."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        return row if row else (None, None)
+
+    def get_body(self, url: str) -> Optional[bytes]:
+        """Get the stored body of a URL and mark it as recently used."""
+        with self._lock:
+            row = self._conn.execute("SELECT body FROM responses WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url)
+            )
+            self._conn.commit()
+        return zlib.decompress(row[0])
+
+    def set(self, url: str, etag: Optional[str], last_modified: Optional[str], body: bytes) -> None:
+        """Store the validators and body of a response."""
+        data = zlib.compress(body)
+        with self._lock:
+            row = self._conn.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(url, etag, last_modified, body, size, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, data, len(data), time.time())
+            )
+            self._size += len(data) - (row[0] if row else 0)
+            while self._size > self.max_bytes:
+                oldest = self._conn.execute(
+                    "SELECT url, size FROM responses ORDER BY accessed_at LIMIT 1"
+                ).fetchone()
+                if oldest is None:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE url = ?", (oldest[0],))
+                self._size -= oldest[1]
+            self._conn.commit()
+
+    def delete(self, url: str) -> None:
+        """Forget a URL, e.g. when it no longer sends validators."""
+        with self._lock:
+            row = self._conn.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            if row:
+                self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self._conn.commit()
+                self._size -= row[0]
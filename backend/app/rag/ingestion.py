@@ -5,15 +5,24 @@ import os
 import re
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
-import httpx
-import requests
-from bs4 import BeautifulSoup
+import numpy as np
 
 from app.core.config import settings
-from app.rag.embeddings import embedding_service
+from app.core.executor import run_blocking, run_in_process
+from app.parsing import ExtractorRegistry, extract_article, extract_links, parse_feed
+from app.rag.chunk_store import FILTER_FIELDS, chunk_store
+from app.rag.dedup import duplicate_index
+from app.rag.embeddings import EmbeddingStats, embedding_service
+from app.rag.feeds import feed_state
+from app.rag.fetcher import AsyncFetcher, FetchStats, is_not_modified
+from app.rag.http_cache import HttpCache
+from app.rag.journal import ingestion_journal
+from app.rag.manifest import content_hash, ingestion_manifest, make_chunk_id
+from app.rag.pipeline import DONE, run_batch_stage, run_stage
 from app.rag.vector_store import vector_store
+from app.services.answer_cache import answer_cache
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -35,6 +44,11 @@ class Article:
         self.url = url
         self.published_date = published_date
         self.source = source
+    
+    @property
+    def content_hash(self) -> str:
+        """Hash of the article's title and content."""
+        return content_hash(f"{self.title}\n{self.content}")
 
 
 class TextChunk:
@@ -46,13 +60,20 @@ class TextChunk:
         article_url: str,
         article_title: str,
         source: Optional[str] = None,
-        published_date: Optional[datetime] = None
+        published_date: Optional[datetime] = None,
+        position: int = 0
     ):
         self.text = text
         self.article_url = article_url
         self.article_title = article_title
         self.source = source
         self.published_date = published_date
+        self.position = position
+    
+    @property
+    def id(self) -> str:
+        """Deterministic ID of the chunk."""
+        return make_chunk_id(self.article_url, self.position, self.text)
     
     def get_meta(self) -> Dict:
         """Get meta for the chunk."""
@@ -61,6 +82,79 @@ class TextChunk:
             "article_title": self.article_title,
             "source": self.source,
             "published_date": self.published_date.isoformat() if self.published_date else None,
+            # Lets adjacent chunks be merged into one context passage
+            "position": self.position,
+        }
+    
+    def get_record(self) -> Dict:
+        """Get the chunk store record of the chunk."""
+        return {"id": self.id, "text": self.text, **self.get_meta()}
+
+
+class PendingArticle:
+    """A changed article whose chunks are still moving through the pipeline."""
+    
+    def __init__(self, content_hash: str, chunks: List[TextChunk], old_chunk_ids: List[str]):
+        self.content_hash = content_hash
+        self.chunk_ids = [chunk.id for chunk in chunks]
+        self.old_chunk_ids = old_chunk_ids
+        # Embedded chunks are held until the whole article is
+        self.embedded: List[Tuple[TextChunk, np.ndarray]] = []
+        self.unembedded = len(chunks)
+        self.failed = False
+        self.remaining = len(chunks)
+
+
+class IngestionRun:
+    """State, counters and per-stage timings of one ingestion run."""
+    
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.seen_urls = set()
+        # Feed entry of each queued article URL that came from a feed
+        self.feed_entries: Dict[str, Dict] = {}
+        self.pending: Dict[str, PendingArticle] = {}
+        # Pending articles superseded by a near duplicate from a preferred source
+        self.dropped = set()
+        self.embedding_stats = EmbeddingStats()
+        self.articles = 0
+        self.resumed = 0
+        self.not_modified = 0
+        self.duplicates = 0
+        self.replaced_duplicates = 0
+        self.changed_articles = 0
+        self.failed_articles = 0
+        self.stored_chunks = 0
+    
+    def timed(self, stage: str, handler: Callable[[Any], Awaitable[None]]) -> Callable[[Any], Awaitable[None]]:
+        """Wrap a stage handler to count its items and the time spent in it."""
+        stats = self.stages.setdefault(stage, {"items": 0, "seconds": 0.0})
+        
+        async def wrapper(item):
+            start = time.perf_counter()
+            try:
+                await handler(item)
+            finally:
+                stats["items"] += len(item) if isinstance(item, list) else 1
+                stats["seconds"] += time.perf_counter() - start
+        
+        return wrapper
+    
+    def to_dict(self) -> Dict:
+        """Get the counters and stage timings of the run."""
+        return {
+            "articles": self.articles,
+            "resumed": self.resumed,
+            "changed_articles": self.changed_articles,
+            "not_modified": self.not_modified,
+            "duplicates": self.duplicates,
+            "replaced_duplicates": self.replaced_duplicates,
+            "failed_articles": self.failed_articles,
+            "stored_chunks": self.stored_chunks,
+            "stages": {
+                name: {"items": int(stats["items"]), "seconds": round(stats["seconds"], 3)}
+                for name, stats in self.stages.items()
+            },
         }
 
 
@@ -69,17 +163,9 @@ class NewsIngestionService:
     
     def __init__(self):
         """Initialize the news ingestion service."""
-        # List of news sources to crawl
-        self.news_sources = [
-            "https://www.reuters.com/world/",
-            "https://www.bbc.com/news/world",
-            "https://www.theguardian.com/world",
-            "https://www.aljazeera.com/news/",
-            "https://www.dw.com/en/top-stories/s-9097",
-            "https://www.france24.com/en/",
-            "https://www.thehindu.com/news/international/",
-            "https://www.ndtv.com/world-news"
-        ]
+        # Per-site scraping rules and the source pages to crawl
+        self.extractors = ExtractorRegistry.load(settings.NEWS_SOURCES_PATH)
+        self.news_sources = self.extractors.sources
         
         # Headers to mimic a browser
         self.headers = {
@@ -90,159 +176,424 @@ class NewsIngestionService:
             'Upgrade-Insecure-Requests': '1',
         }
         
-        # Rate limiting
-        self.min_delay = 2  # Minimum delay between requests in seconds
-        self.last_request_time = 0
+        # Shared pooled HTTP client with per-domain rate limiting
+        http_cache = None
+        if settings.HTTP_CACHE_ENABLED:
+            http_cache = HttpCache(settings.HTTP_CACHE_PATH, settings.HTTP_CACHE_MAX_BYTES)
+        self.fetcher = AsyncFetcher(headers=self.headers, cache=http_cache)
+    
+    async def ingest_news(self, run: Optional[IngestionRun] = None) -> IngestionRun:
+        """Process news using web scraping.
+        
+        Ingestion runs as a pipeline of concurrent stages joined by bounded
+        queues: discover -> fetch -> parse -> chunk -> embed -> upsert.
+        A full queue blocks the stage feeding it, so memory stays flat
+        however large the crawl is, and chunks become searchable as soon as
+        their batch is upserted.
+        
+        Parsed articles and chunk embeddings are recorded in the ingestion
+        journal until their article is stored. Articles left there by an
+        interrupted run are resumed first, without fetching, parsing or
+        embedding them again.
+        
+        Args:
+            run: Run to record progress in, so callers can watch it.
+        
+        Returns:
+            The completed run with its counters.
+        """
+        run = run or IngestionRun()
+        self.fetcher.stats = FetchStats()
+        size = settings.INGEST_QUEUE_SIZE
+        url_queue, html_queue, article_queue, chunk_queue, upsert_queue = (
+            asyncio.Queue(size) for _ in range(5)
+        )
+        
+        resumed = await self._resume(run)
+        
+        async def discover():
+            # Articles parsed by an interrupted run go straight to chunking,
+            # before the end of the crawl can close the article queue
+            for article in resumed:
+                await article_queue.put(article)
+            
+            # Crawl all sources concurrently; each host is rate limited separately
+            await asyncio.gather(
+                *(self._discover(source, url_queue, run) for source in self.news_sources)
+            )
+            await url_queue.put(DONE)
+        
+        async def fetch(url):
+            html = await self._fetch_article(url, run)
+            if html:
+                await html_queue.put((url, html))
+        
+        async def parse(item):
+            article = await self._parse_article(*item)
+            if article:
+                run.articles += 1
+                logger.info(f"Successfully fetched article: {article.title}")
+                await run_blocking(
+                    ingestion_journal.record_article, vars(article), run.feed_entries.get(article.url)
+                )
+                await article_queue.put(article)
+        
+        async def chunk(article):
+            for text_chunk in await self._chunk_changed_article(article, run):
+                await chunk_queue.put(text_chunk)
+        
+        async def embed(chunks):
+            embeddings = await self._embed_chunks(chunks, run)
+            for chunk in chunks:
+                for item in self._collect_embedding(chunk, embeddings[chunk.id], run):
+                    await upsert_queue.put(item)
+        
+        async def upsert(items):
+            await self._upsert(items, run)
+        
+        await asyncio.gather(
+            discover(),
+            run_stage("fetch", url_queue, run.timed("fetch", fetch), settings.INGEST_FETCH_WORKERS, html_queue),
+            run_stage("parse", html_queue, run.timed("parse", parse), settings.INGEST_PARSE_WORKERS, article_queue),
+            run_stage("chunk", article_queue, run.timed("chunk", chunk), 1, chunk_queue),
+            run_batch_stage(
+                "embed", chunk_queue, run.timed("embed", embed), settings.INGEST_EMBED_BATCH_SIZE,
+                settings.INGEST_EMBED_WORKERS, upsert_queue
+            ),
+            run_batch_stage(
+                "upsert", upsert_queue, run.timed("upsert", upsert), settings.INGEST_UPSERT_BATCH_SIZE
+            )
+        )
+        # Persist what the vector store defers, such as its ANN index, once per run
+        await run_blocking(vector_store.flush)
+        
+        logger.info(f"HTTP cache: {self.fetcher.stats}")
+        if run.not_modified:
+            logger.info(f"{run.not_modified} articles not modified since the last run, skipped")
+        if not run.articles:
+            if not run.not_modified:
+                logger.warning("No articles were successfully processed.")
+            return run
+        
+        logger.info(
+            f"{run.articles - run.changed_articles} of {run.articles} articles unchanged, skipping"
+        )
+        logger.info(f"Embedding cache: {run.embedding_stats}")
+        if run.duplicates or run.replaced_duplicates:
+            logger.info(
+                f"Suppressed {run.duplicates} near-duplicate articles, "
+                f"replaced {run.replaced_duplicates} copies from lower-priority sources"
+            )
+        if not run.changed_articles:
+            return run
+        
+        # The index changed, cached answers may no longer be accurate
+        epoch = await answer_cache.bump_epoch()
+        if epoch is not None:
+            logger.info(f"Index epoch is now {epoch}")
+        
+        logger.info(
+            f"Successfully ingested {run.stored_chunks} chunks from {run.changed_articles} articles"
+        )
+        return run
     
-    async def ingest_news(self):
-        """Process news using web scraping."""
-        all_articles = []
+    async def prune(self) -> List[str]:
+        """Drop the expired vector store partitions and forget their articles.
         
-        for source in self.news_sources:
+        The articles whose chunks were in a dropped partition are removed
+        from the manifest, the near-duplicate index and the chunk store, so
+        they are ingested again if they are still published, instead of
+        being skipped as unchanged or as duplicates of deleted copies.
+        
+        Returns:
+            Keys of the dropped partitions.
+        """
+        dropped = await run_blocking(vector_store.prune)
+        if not dropped:
+            return []
+        urls = await run_blocking(ingestion_manifest.forget_partitions, dropped)
+        await run_blocking(duplicate_index.remove_many, urls)
+        if settings.CHUNK_STORE_ENABLED:
+            await run_blocking(chunk_store.delete_articles, urls)
+        logger.info(f"Forgot {len(urls)} articles of the dropped partitions")
+        return dropped
+    
+    async def _resume(self, run: IngestionRun) -> List[Article]:
+        """Load the articles an interrupted run left in the journal."""
+        entries = await run_blocking(ingestion_journal.pending, settings.INGEST_JOURNAL_MAX_AGE)
+        articles = []
+        for fields, feed_entry in entries:
+            articles.append(Article(**fields))
+            # Keep the crawl from fetching them again
+            run.seen_urls.add(fields["url"])
+            if feed_entry:
+                run.feed_entries[fields["url"]] = feed_entry
+        if articles:
+            logger.info(f"Resuming {len(articles)} articles of an interrupted run")
+        run.resumed = len(articles)
+        run.articles += len(articles)
+        return articles
+    
+    async def _discover(self, source: str, outbox: asyncio.Queue, run: IngestionRun) -> None:
+        """Queue the articles of a source, from its feed if it has one."""
+        extractor = self.extractors.for_url(source)
+        if extractor.feed:
             try:
-                logger.info(f"Fetching news from {source}")
-                # Rate limiting
-                self._wait_for_rate_limit()
-                
-                # Get the main page
-                response = requests.get(source, headers=self.headers, timeout=10)
-                response.raise_for_status()
-                
-                # Parse the HTML
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Find article links (this will need to be customized per site)
-                article_links = self._find_article_links(soup, source)
-                logger.info(f"Found {len(article_links)} article links on {source}")
-                
-                # Process each article
-                for link in article_links[:5]:  # Limit to 5 articles per source
-                    try:
-                        # Rate limiting
-                        self._wait_for_rate_limit()
-                        
-                        article = await self._process_article(link)
-                        if article:
-                            all_articles.append(article)
-                            logger.info(f"Successfully fetched article: {article.title}")
-                    except Exception as e:
-                        logger.error(f"Error processing article {link}: {e}")
-                        continue
-                    
+                await self._discover_feed(extractor.feed, outbox, run)
+                return
             except Exception as e:
-                logger.error(f"Error fetching from {source}: {e}")
-                continue
+                logger.error(f"Error reading feed {extractor.feed}, scraping {source} instead: {e}")
         
-        if not all_articles:
-            logger.warning("No articles were successfully processed.")
+        try:
+            logger.info(f"Fetching news from {source}")
+            response = await self.fetcher.get(source)
+            if is_not_modified(response):
+                # Links that failed last time are queued again, the manifest
+                # and conditional requests skip the unchanged articles
+                logger.info(f"{source} not modified, reading its links from the cache")
+            
+            # Parse the links in a worker process
+            article_links = await run_in_process(extract_links, response.text, source, extractor)
+            logger.info(f"Found {len(article_links)} article links on {source}")
+        except Exception as e:
+            logger.error(f"Error fetching from {source}: {e}")
             return
         
-        logger.info(f"Processing {len(all_articles)} articles into chunks")
-        # Process articles into chunks
-        all_chunks = []
-        for article in all_articles:
-            chunks = self._chunk_article(article)
-            all_chunks.extend(chunks)
+        for link in article_links[:settings.INGEST_ARTICLES_PER_SOURCE]:
+            # The same article can be linked from several section pages
+            if link not in run.seen_urls:
+                run.seen_urls.add(link)
+                await outbox.put(link)
+    
+    async def _discover_feed(self, feed: str, outbox: asyncio.Queue, run: IngestionRun) -> None:
+        """Queue the entries of an RSS or Atom feed that are new or updated."""
+        logger.info(f"Fetching feed {feed}")
+        response = await self.fetcher.get(feed)
+        if is_not_modified(response):
+            # Entries are only marked once ingested, failed ones are queued again
+            logger.info(f"{feed} not modified, reading its entries from the cache")
+        entries = await run_in_process(parse_feed, response.content)
+        entries = entries[:settings.INGEST_FEED_MAX_ENTRIES]
+        
+        # Entries are only queued again when their updated timestamp changes
+        known = await run_blocking(feed_state.get, [entry["guid"] for entry in entries])
+        entries = [
+            entry for entry in entries
+            if entry["guid"] not in known or known[entry["guid"]] != entry["updated"]
+        ]
+        logger.info(f"Found {len(entries)} new or updated entries in {feed}")
         
-        logger.info(f"Generated {len(all_chunks)} chunks from {len(all_articles)} articles")
+        for entry in entries:
+            if entry["url"] not in run.seen_urls:
+                run.seen_urls.add(entry["url"])
+                run.feed_entries[entry["url"]] = entry
+                await outbox.put(entry["url"])
+    
+    async def _mark_feed_entries(self, urls: List[str], run: IngestionRun) -> None:
+        """Record the feed entries of ingested articles so they are not queued again."""
+        entries = {
+            run.feed_entries[url]["guid"]: run.feed_entries.pop(url)
+            for url in urls if url in run.feed_entries
+        }
+        if entries:
+            await run_blocking(feed_state.update, entries)
+    
+    async def _chunk_changed_article(self, article: Article, run: IngestionRun) -> List[TextChunk]:
+        """Chunk an article unless its content hasn't changed since the last run."""
+        manifest = await run_blocking(ingestion_manifest.get, [article.url])
+        old_hash, old_ids = manifest.get(article.url, (None, []))
+        if old_hash == article.content_hash:
+            await self._mark_feed_entries([article.url], run)
+            await run_blocking(ingestion_journal.complete, [article.url])
+            return []
         
-        # Generate embeddings and store in vector database
-        texts = [chunk.text for chunk in all_chunks]
-        metas = [chunk.get_meta() for chunk in all_chunks]
+        if settings.DEDUP_ENABLED and not await self._is_preferred_copy(article, old_ids, run):
+            return []
         
-        logger.info(f"Generating embeddings for {len(texts)} chunks")
-        embeddings = embedding_service.generate_embeddings(texts)
+        chunks = self._chunk_article(article)
+        run.changed_articles += 1
+        run.pending[article.url] = PendingArticle(article.content_hash, chunks, old_ids)
+        return chunks
+    
+    async def _is_preferred_copy(self, article: Article, old_ids: List[str], run: IngestionRun) -> bool:
+        """Check an article against the near duplicates ingested before it.
         
-        logger.info(f"Storing {len(embeddings)} embeddings in vector database")
-        vector_store.store(texts, embeddings, metas)
+        Of two copies of a syndicated story, the one from the source with the
+        higher priority is kept. A suppressed copy is recorded in the manifest
+        without chunks, so it is not processed again until it changes.
         
-        logger.info(f"Successfully ingested {len(texts)} chunks from {len(all_articles)} articles")
+        Returns:
+            Whether the article should be embedded and stored.
+        """
+        priority = self.extractors.for_url(article.url).priority
+        signature = await run_blocking(duplicate_index.hasher.signature, article.content)
+        duplicate = await run_blocking(duplicate_index.find, article.url, signature)
+        
+        if duplicate and duplicate[1] >= priority:
+            run.duplicates += 1
+            logger.info(
+                f"{article.url} is a near duplicate of {duplicate[0]} ({duplicate[2]:.0%} similar), skipping"
+            )
+            if old_ids:
+                await self._delete_chunks(old_ids)
+            await run_blocking(
+                ingestion_manifest.update, {article.url: (article.content_hash, [])}, vector_store.write_partition()
+            )
+            await self._mark_feed_entries([article.url], run)
+            await run_blocking(ingestion_journal.complete, [article.url])
+            return False
+        
+        if duplicate:
+            # This copy comes from a preferred source, drop the stored one
+            run.replaced_duplicates += 1
+            logger.info(f"{article.url} replaces its near duplicate {duplicate[0]}")
+            await run_blocking(duplicate_index.remove, duplicate[0])
+            if duplicate[0] in run.pending:
+                # Its chunks are still in the pipeline, drop them once stored
+                run.dropped.add(duplicate[0])
+            else:
+                entry = await run_blocking(ingestion_manifest.get, [duplicate[0]])
+                if duplicate[0] in entry:
+                    duplicate_hash, duplicate_ids = entry[duplicate[0]]
+                    await self._delete_chunks(duplicate_ids)
+                    await run_blocking(
+                        ingestion_manifest.update, {duplicate[0]: (duplicate_hash, [])},
+                        vector_store.write_partition()
+                    )
+        
+        await run_blocking(duplicate_index.add, article.url, signature, priority)
+        return True
     
-    def _wait_for_rate_limit(self):
-        """Implement rate limiting between requests."""
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-        if time_since_last_request < self.min_delay:
-            time.sleep(self.min_delay - time_since_last_request)
-        self.last_request_time = time.time()
+    async def _embed_chunks(self, chunks: List[TextChunk], run: IngestionRun) -> Dict[str, np.ndarray]:
+        """Embed a batch of chunks, reusing embeddings journaled by an interrupted run.
+        
+        Returns:
+            Mapping of chunk ID to embedding.
+        """
+        embeddings = await run_blocking(ingestion_journal.get_embeddings, [chunk.id for chunk in chunks])
+        missing = [chunk for chunk in chunks if chunk.id not in embeddings]
+        if not missing:
+            return embeddings
+        
+        computed = await embedding_service.generate_embeddings(
+            [chunk.text for chunk in missing], "passage", run.embedding_stats
+        )
+        embeddings.update((chunk.id, embedding) for chunk, embedding in zip(missing, computed))
+        # Zero vectors are placeholders for failed requests, only real embeddings are reused
+        await run_blocking(ingestion_journal.record_embeddings, {
+            chunk.id: (chunk.article_url, embedding)
+            for chunk, embedding in zip(missing, computed) if np.any(embedding)
+        })
+        return embeddings
     
-    def _find_article_links(self, soup: BeautifulSoup, source: str) -> List[str]:
-        """Find article links in the page."""
-        links = []
-        
-        # Common patterns for article links
-        if "reuters.com" in source:
-            links = [a['href'] for a in soup.find_all('a', href=True) if '/article/' in a['href']]
-        elif "bbc.com" in source:
-            links = [a['href'] for a in soup.find_all('a', href=True) if '/news/' in a['href']]
-        elif "theguardian.com" in source:
-            links = [a['href'] for a in soup.find_all('a', href=True) if '/article/' in a['href']]
-        elif "aljazeera.com" in source:
-            links = [a['href'] for a in soup.find_all('a', href=True) if '/news/' in a['href']]
-        elif "dw.com" in source:
-            links = [a['href'] for a in soup.find_all('a', href=True) if '/en/' in a['href']]
-        elif "france24.com" in source:
-            links = [a['href'] for a in soup.find_all('a', href=True) if '/en/' in a['href']]
-        elif "thehindu.com" in source:
-            links = [a['href'] for a in soup.find_all('a', href=True) if '/news/international/' in a['href']]
-        elif "ndtv.com" in source:
-            links = [a['href'] for a in soup.find_all('a', href=True) if '/world-news/' in a['href']]
-        
-        # Make sure links are absolute
-        links = [link if link.startswith('http') else f"{source.rstrip('/')}/{link.lstrip('/')}" for link in links]
-        return list(set(links))  # Remove duplicates
+    async def _upsert(self, items: List[Tuple[TextChunk, np.ndarray]], run: IngestionRun) -> None:
+        """Store a batch of embedded chunks and finish the articles it completes."""
+        chunks = [chunk for chunk, _ in items]
+        metas = [chunk.get_meta() for chunk in chunks]
+        if settings.CHUNK_STORE_ENABLED:
+            # Texts and article metadata live in SQL, payloads keep the filter fields
+            await run_blocking(chunk_store.put, [chunk.get_record() for chunk in chunks])
+            metas = [{field: meta[field] for field in FILTER_FIELDS} for meta in metas]
+        partition = vector_store.write_partition()
+        await run_blocking(
+            vector_store.store,
+            [chunk.text for chunk in chunks],
+            [embedding for _, embedding in items],
+            metas,
+            [chunk.id for chunk in chunks]
+        )
+        run.stored_chunks += len(chunks)
+        logger.info(f"Stored {len(chunks)} chunks ({run.stored_chunks} so far)")
+        
+        # Articles whose chunks are all stored can be recorded in the manifest
+        completed = {}
+        stale_ids = []
+        for chunk in chunks:
+            pending = run.pending[chunk.article_url]
+            pending.remaining -= 1
+            if pending.remaining == 0:
+                del run.pending[chunk.article_url]
+                if chunk.article_url in run.dropped:
+                    # A preferred copy of the story arrived meanwhile
+                    pending.old_chunk_ids += pending.chunk_ids
+                    pending.chunk_ids = []
+                completed[chunk.article_url] = (pending.content_hash, pending.chunk_ids)
+                # Drop chunks of the previous version that no longer exist
+                current_ids = set(pending.chunk_ids)
+                stale_ids.extend(i for i in pending.old_chunk_ids if i not in current_ids)
+        
+        if stale_ids:
+            logger.info(f"Removing {len(stale_ids)} stale chunks")
+            await self._delete_chunks(stale_ids)
+        if completed:
+            await run_blocking(ingestion_manifest.update, completed, partition)
+            await self._mark_feed_entries(list(completed), run)
+            await run_blocking(ingestion_journal.complete, list(completed))
+    
+    def _collect_embedding(self, chunk: TextChunk, embedding: np.ndarray,
+                           run: IngestionRun) -> List[Tuple[TextChunk, np.ndarray]]:
+        """Hold an embedded chunk until every chunk of its article is embedded.
+        
+        Zero vectors are placeholders for failed requests. An article with
+        any of them is not stored at all: it stays in the journal, with the
+        embeddings that did succeed, and out of the manifest, so the next
+        run resumes it.
+        
+        Returns:
+            The chunks of the article to store once it is fully embedded,
+            an empty list before or if an embedding failed.
+        """
+        pending = run.pending[chunk.article_url]
+        pending.unembedded -= 1
+        if np.any(embedding):
+            pending.embedded.append((chunk, embedding))
+        else:
+            pending.failed = True
+        if pending.unembedded:
+            return []
+        
+        items, pending.embedded = pending.embedded, []
+        if pending.failed:
+            del run.pending[chunk.article_url]
+            run.failed_articles += 1
+            logger.warning(f"Could not embed all chunks of {chunk.article_url}, retrying next run")
+            return []
+        return items
+    
+    async def _delete_chunks(self, ids: List[str]) -> None:
+        """Delete chunks from the vector store and the chunk store."""
+        await run_blocking(vector_store.delete, ids)
+        if settings.CHUNK_STORE_ENABLED:
+            await run_blocking(chunk_store.delete, ids)
     
-    async def _process_article(self, url: str) -> Optional[Article]:
-        """Process a single article."""
+    async def _fetch_article(self, url: str, run: IngestionRun) -> Optional[str]:
+        """Fetch the HTML of an article, or None if it is unchanged since it was ingested."""
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract title
-            title = soup.find('h1')
-            if not title:
-                return None
-            title = title.get_text().strip()
-            
-            # Extract content
-            content = ""
-            article_body = soup.find('article') or soup.find('main') or soup.find('div', class_='article-body')
-            if article_body:
-                # Remove unwanted elements
-                for element in article_body.find_all(['script', 'style', 'nav', 'footer', 'header', 'aside']):
-                    element.decompose()
-                
-                # Get text from paragraphs
-                paragraphs = article_body.find_all('p')
-                content = "\n\n".join(p.get_text().strip() for p in paragraphs if p.get_text().strip())
-            
-            if not content:
+            response = await self.fetcher.get(url)
+            if is_not_modified(response) and await run_blocking(ingestion_manifest.get, [url]):
+                run.not_modified += 1
+                await self._mark_feed_entries([url], run)
                 return None
-            
-            # Extract date if available
-            date = None
-            date_element = soup.find('time') or soup.find('meta', property='article:published_time')
-            if date_element:
-                date_str = date_element.get('datetime') or date_element.get('content')
-                if date_str:
-                    try:
-                        date = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                    except:
-                        pass
-            
-            return Article(
-                title=title,
-                content=content,
-                url=url,
-                published_date=date,
-                source=url.split('/')[2]  # Extract domain as source
-            )
-            
+            return response.text
+        except Exception as e:
+            logger.error(f"Error fetching article {url}: {e}")
+            return None
+    
+    async def _parse_article(self, url: str, html: str) -> Optional[Article]:
+        """Parse an article page in a worker process."""
+        try:
+            fields = await run_in_process(extract_article, html, self.extractors.for_url(url))
         except Exception as e:
             logger.error(f"Error processing article {url}: {e}")
             return None
+        if not fields:
+            return None
+        
+        return Article(
+            url=url,
+            source=url.split('/')[2],  # Extract domain as source
+            **fields
+        )
     
     def _chunk_article(self, article: Article) -> List[TextChunk]:
         """Split an article into optimal chunks for embedding."""
@@ -258,7 +609,8 @@ class NewsIngestionService:
             article_url=article.url,
             article_title=article.title,
             source=article.source,
-            published_date=article.published_date
+            published_date=article.published_date,
+            position=0
         )
         
         # Create chunks with target size of ~200-300 words
@@ -277,7 +629,8 @@ class NewsIngestionService:
                     article_url=article.url,
                     article_title=article.title,
                     source=article.source,
-                    published_date=article.published_date
+                    published_date=article.published_date,
+                    position=len(chunks)
                 ))
                 current_chunk = paragraph
                 current_size = paragraph_words
@@ -296,7 +649,8 @@ class NewsIngestionService:
                 article_url=article.url,
                 article_title=article.title,
                 source=article.source,
-                published_date=article.published_date
+                published_date=article.published_date,
+                position=len(chunks)
             ))
         
         return chunks
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.db.database import SessionLocal
+from app.db.models import JournalArticle, JournalEmbedding
+
+
+class IngestionJournal:
+    """Write-ahead journal of the work done on articles of an ingestion run.
+
+    A parsed article is recorded before it is chunked, and its chunk
+    embeddings as soon as they are computed. Both are removed once the
+    article's chunks are upserted and recorded in the manifest, or once the
+    article turns out to need no storing. Whatever is left at the start of
+    a run was interrupted, and is resumed without fetching, parsing or
+    embedding it again. Chunking is cheap and deterministic, so it is
+    simply redone.
+    """
+
+    def __init__(self, session_factory: Callable = SessionLocal):
+        """Initialize the journal.
+
+        Args:
+            session_factory: Factory of database sessions.
+        """
+        self.session_factory = session_factory
+
+    def pending(self, max_age: int) -> List[Tuple[Dict, Optional[Dict]]]:
+        """Get the articles left by interrupted runs.
+
+        Entries older than ``max_age`` seconds are discarded instead, their
+        pages have probably changed since.
+
+        Returns:
+            List of (article fields, feed entry) tuples. The fields are
+            ``url``, ``title``, ``content``, ``source`` and ``published_date``.
+        """
+        db = self.session_factory()
+        try:
+            expired = [
+                row.url for row in db.query(JournalArticle.url)
+                .filter(JournalArticle.recorded_at < datetime.utcnow() - timedelta(seconds=max_age))
+            ]
+            if expired:
+                self._delete(db, expired)
+                db.commit()
+            return [
+                ({
+                    "url": row.url,
+                    "title": row.title,
+                    "content": row.content,
+                    "source": row.source,
+                    "published_date": datetime.fromisoformat(row.published_date) if row.published_date else None,
+                }, row.feed_entry)
+                for row in db.query(JournalArticle).order_by(JournalArticle.recorded_at)
+            ]
+        finally:
+            db.close()
+
+    def record_article(self, fields: Dict, feed_entry: Optional[Dict] = None) -> None:
+        """Record a fetched and parsed article.
+
+        Args:
+            fields: Article fields, as returned by ``pending``.
+            feed_entry: Feed entry the article was discovered from, if any.
+        """
+        published_date = fields.get("published_date")
+        db = self.session_factory()
+        try:
+            db.merge(JournalArticle(
+                url=fields["url"],
+                title=fields["title"],
+                content=fields["content"],
+                source=fields.get("source"),
+                published_date=published_date.isoformat() if published_date else None,
+                feed_entry=feed_entry,
+                recorded_at=datetime.utcnow()
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+    def get_embeddings(self, chunk_ids: List[str]) -> Dict[str, np.ndarray]:
+        """Get the recorded embeddings of chunks.
+
+        Returns:
+            Mapping of chunk ID to embedding for the chunks that were found.
+        """
+        if not chunk_ids:
+            return {}
+        db = self.session_factory()
+        try:
+            rows = db.query(JournalEmbedding).filter(JournalEmbedding.chunk_id.in_(chunk_ids))
+            return {row.chunk_id: np.frombuffer(row.embedding, dtype=np.float32) for row in rows}
+        finally:
+            db.close()
+
+    def record_embeddings(self, items: Dict[str, Tuple[str, np.ndarray]]) -> None:
+        """Record computed chunk embeddings.
+
+        Args:
+            items: Mapping of chunk ID to (article URL, embedding).
+        """
+        if not items:
+            return
+        db = self.session_factory()
+        try:
+            for chunk_id, (url, embedding) in items.items():
+                db.merge(JournalEmbedding(
+                    chunk_id=chunk_id, url=url,
+                    embedding=np.asarray(embedding, dtype=np.float32).tobytes()
+                ))
+            db.commit()
+        finally:
+            db.close()
+
+    def complete(self, urls: List[str]) -> None:
+        """Remove the entries of articles that are fully ingested."""
+        if not urls:
+            return
+        db = self.session_factory()
+        try:
+            self._delete(db, urls)
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _delete(db, urls: List[str]) -> None:
+        db.query(JournalEmbedding).filter(JournalEmbedding.url.in_(urls)).delete(synchronize_session=False)
+        db.query(JournalArticle).filter(JournalArticle.url.in_(urls)).delete(synchronize_session=False)
+
+
+# Singleton instance
+ingestion_journal = IngestionJournal()
@@ -0,0 +1,289 @@
+import json
+import math
+import os
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+MIN_CAPACITY = 1024
+
+# Only the most frequent function words; names, places and tickers are kept
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have he in is it its of on or that "
+    "the their they this to was were which will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens without stopwords."""
+    return [token for token in re.findall(r"\w+", text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """In-process inverted index with BM25 scoring.
+
+    Each term maps to two compact arrays, the numbers of the documents it
+    occurs in (uint32) and its frequency in each of them (uint16). Documents
+    are numbered in insertion order, so adding one appends to the postings
+    of its terms. Replaced and deleted documents are tombstoned by zeroing
+    their length and skipped when scoring; the postings are compacted once
+    tombstones outnumber live documents.
+
+    With a ``path``, every change is appended to a JSON lines log that is
+    replayed when the index is opened, and rewritten on compaction. Other
+    processes sharing the log catch up before each search and each write,
+    replaying the records appended since, or the whole log once it was
+    compacted. The log must have a single writer at a time, which the
+    ingestion lease guarantees: a process compacting the log from a state
+    missing another's concurrent writes would drop them.
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.2, b: float = 0.75):
+        """Open or create an index.
+
+        Args:
+            path: Directory holding the index log, or None to keep it in memory.
+            k1: Term frequency saturation.
+            b: Document length normalization.
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._docs: Dict[str, int] = {}
+        self._doc_ids: List[Optional[str]] = []
+        self._lengths = np.zeros(MIN_CAPACITY, dtype=np.uint32)
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._total_length = 0
+        self._log = None
+        # Identity of the log file and length of it replayed so far
+        self._log_inode: Optional[Tuple[int, int]] = None
+        self._log_offset = 0
+        self.is_new = True
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self.is_new = not os.path.exists(self._log_path)
+            self._reload()
+
+    @property
+    def _log_path(self) -> str:
+        return os.path.join(self.path, "postings.jsonl")
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _reset(self) -> None:
+        self._docs = {}
+        self._doc_ids = []
+        self._lengths = np.zeros(MIN_CAPACITY, dtype=np.uint32)
+        self._postings = {}
+        self._total_length = 0
+
+    def _reload(self) -> None:
+        """Rebuild the index from the whole log and reopen it for appending."""
+        if self._log is not None:
+            self._log.close()
+        self._reset()
+        self._log = open(self._log_path, "a")
+        stat = os.fstat(self._log.fileno())
+        self._log_inode = (stat.st_dev, stat.st_ino)
+        self._log_offset = 0
+        self._replay()
+
+    def _replay(self) -> None:
+        """Apply the complete records appended to the log since the last replay."""
+        with open(self._log_path, "rb") as f:
+            f.seek(self._log_offset)
+            data = f.read()
+        # A record being written by another process is read on the next replay
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            record = json.loads(line)
+            if "tf" in record:
+                self._add(record["id"], record["tf"])
+            else:
+                self._remove(record["id"])
+        self._log_offset += end
+
+    def refresh(self) -> None:
+        """Catch up with the changes other processes made to the log."""
+        if self._log is None:
+            return
+        with self._lock:
+            try:
+                stat = os.stat(self._log_path)
+            except FileNotFoundError:
+                # Removed from under the index, keep what was loaded
+                return
+            if (stat.st_dev, stat.st_ino) != self._log_inode:
+                # Compacted by another process
+                self._reload()
+            elif stat.st_size > self._log_offset:
+                self._replay()
+
+    def _add(self, doc_id: str, term_counts: Dict[str, int]) -> None:
+        self._remove(doc_id)
+        number = len(self._doc_ids)
+        if number >= len(self._lengths):
+            self._lengths = np.concatenate([self._lengths, np.zeros_like(self._lengths)])
+        self._docs[doc_id] = number
+        self._doc_ids.append(doc_id)
+        length = sum(term_counts.values())
+        # Empty documents still take a slot, with a length of one so they stay live
+        self._lengths[number] = max(length, 1)
+        self._total_length += max(length, 1)
+        for term, count in term_counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("I"), array("H"))
+            postings[0].append(number)
+            postings[1].append(min(count, 65535))
+
+    def _remove(self, doc_id: str) -> bool:
+        number = self._docs.pop(doc_id, None)
+        if number is None:
+            return False
+        self._total_length -= int(self._lengths[number])
+        self._lengths[number] = 0
+        self._doc_ids[number] = None
+        return True
+
+    def _write(self, records: Iterable[Dict]) -> None:
+        if self._log is None:
+            return
+        self._log.writelines(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+        self._log.flush()
+        self._log_offset = os.fstat(self._log.fileno()).st_size
+
+    def add(self, ids: List[str], texts: List[str]) -> None:
+        """Index documents, replacing those with an existing ID."""
+        records = [{"id": doc_id, "tf": Counter(tokenize(text))} for doc_id, text in zip(ids, texts)]
+        with self._lock:
+            self.refresh()
+            for record in records:
+                self._add(record["id"], record["tf"])
+            self._write(records)
+            self._maybe_compact()
+
+    def delete(self, ids: List[str]) -> None:
+        """Remove documents from the index."""
+        with self._lock:
+            self.refresh()
+            removed = [doc_id for doc_id in ids if self._remove(doc_id)]
+            self._write({"id": doc_id} for doc_id in removed)
+            self._maybe_compact()
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[str, float]]:
+        """Rank documents by their BM25 score for a query.
+
+        Returns:
+            Up to ``top_k`` (document ID, score) tuples, best first. Only
+            documents containing at least one query term are returned.
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            self.refresh()
+            live = len(self._docs)
+            if not live or not terms:
+                return []
+            lengths = self._lengths[:len(self._doc_ids)]
+            norm = self.k1 * (1 - self.b + self.b * lengths / (self._total_length / live))
+            scores = np.zeros(len(lengths), dtype=np.float32)
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                # Copies, a view would keep the arrays from growing
+                docs = np.array(postings[0], dtype=np.uint32)
+                tf = np.array(postings[1], dtype=np.float32)
+                alive = lengths[docs] > 0
+                df = int(np.count_nonzero(alive))
+                if not df:
+                    continue
+                idf = math.log(1 + (live - df + 0.5) / (df + 0.5))
+                docs, tf = docs[alive], tf[alive]
+                # A document occurs once per term, so fancy indexing accumulates correctly
+                scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm[docs])
+
+            matched = np.flatnonzero(scores)
+            if not len(matched):
+                return []
+            k = min(top_k, len(matched))
+            top = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+            top = top[np.argsort(-scores[top])]
+            return [(self._doc_ids[number], float(scores[number])) for number in top]
+
+    def close(self) -> None:
+        """Close the log. The index can't be changed afterwards."""
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def _maybe_compact(self) -> None:
+        dead = len(self._doc_ids) - len(self._docs)
+        if dead > max(len(self._docs), MIN_CAPACITY):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Drop tombstoned documents, renumbering the live ones in order."""
+        numbers = np.full(len(self._doc_ids), -1, dtype=np.int64)
+        live = np.flatnonzero(self._lengths[:len(self._doc_ids)])
+        numbers[live] = np.arange(len(live))
+        term_counts: Dict[int, Dict[str, int]] = {}
+        for term, (docs, tf) in list(self._postings.items()):
+            docs = np.array(docs, dtype=np.uint32)
+            keep = numbers[docs] >= 0
+            if not keep.any():
+                del self._postings[term]
+                continue
+            new_docs = numbers[docs[keep]].astype(np.uint32)
+            new_tf = np.array(tf, dtype=np.uint16)[keep]
+            self._postings[term] = (array("I", new_docs.tobytes()), array("H", new_tf.tobytes()))
+            if self._log is not None:
+                for number, count in zip(new_docs.tolist(), new_tf.tolist()):
+                    term_counts.setdefault(number, {})[term] = count
+
+        self._doc_ids = [self._doc_ids[number] for number in live]
+        self._docs = {doc_id: number for number, doc_id in enumerate(self._doc_ids)}
+        lengths = np.zeros(max(MIN_CAPACITY, len(live)), dtype=np.uint32)
+        lengths[:len(live)] = self._lengths[live]
+        self._lengths = lengths
+
+        if self._log is not None:
+            tmp_path = self._log_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                for number, doc_id in enumerate(self._doc_ids):
+                    f.write(json.dumps({"id": doc_id, "tf": term_counts.get(number, {})},
+                                       separators=(",", ":")) + "\n")
+            self._log.close()
+            os.replace(tmp_path, self._log_path)
+            self._log = open(self._log_path, "a")
+            stat = os.fstat(self._log.fileno())
+            self._log_inode = (stat.st_dev, stat.st_ino)
+            self._log_offset = stat.st_size
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Merge rankings by reciprocal rank fusion.
+
+    Each document scores the sum of ``1 / (k + rank)`` over the rankings it
+    appears in, so raw scores of different scales never have to be compared.
+
+    Args:
+        rankings: Lists of document IDs, best first.
+        k: Damping constant, higher values flatten the contribution of top ranks.
+
+    Returns:
+        (document ID, fused score) tuples, best first.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
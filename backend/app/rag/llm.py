@@ -1,4 +1,3 @@
-import asyncio
 from typing import AsyncGenerator, List, Optional
 
 import google.generativeai as genai
@@ -8,6 +7,8 @@ from app.core.config import settings
 # Configure Gemini API
 genai.configure(api_key=settings.GEMINI_API_KEY)
 
+GENERATION_ERROR_MESSAGE = "I'm sorry, I encountered an error while generating a response."
+
 
 class GeminiService:
     """Service for interacting with Google's Gemini API."""
@@ -69,10 +70,10 @@ Answer:"""
                 model_name=self.model_name,
                 generation_config=self.generation_config
             )
-            response = model.generate_content(prompt)
+            response = await model.generate_content_async(prompt)
             return response.text
         except Exception as e:
-            return "I'm sorry, I encountered an error while generating a response."
+            return GENERATION_ERROR_MESSAGE
     
     async def stream_response(self, query: str, contexts: List[str]) -> AsyncGenerator[str, None]:
         """Stream a response from the Gemini API.
@@ -91,17 +92,17 @@ Answer:"""
                 model_name=self.model_name,
                 generation_config=self.generation_config
             )
-            response = model.generate_content(prompt, stream=True)
+            response = await model.generate_content_async(prompt, stream=True)
             
-            for chunk in response:
+            # Chunks are yielded as they arrive, without blocking the event loop
+            async for chunk in response:
                 if hasattr(chunk, 'text') and chunk.text:
                     yield chunk.text
                 elif hasattr(chunk, 'parts') and chunk.parts:
                     yield chunk.parts[0].text
-                await asyncio.sleep(0.01)  # Small delay to prevent CPU hogging
                 
         except Exception as e:
-            yield "I'm sorry, I encountered an error while generating a response."
+            yield GENERATION_ERROR_MESSAGE
 
 
 # Singleton instance
@@ -0,0 +1,517 @@
+import fcntl
+import json
+import os
+import threading
+import uuid
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.rag.ann import IVFIndex
+from app.rag.quantization import CODE_DTYPES, approximate_scores, quantize
+from app.rag.vector_store import SearchFilter, VectorStore, to_timestamp
+from app.schemas.message import SearchResult
+
+ID_DTYPE = np.dtype("S64")
+MIN_CAPACITY = 1024
+
+
+class LocalVectorStore(VectorStore):
+    """In-process vector store backed by memory-mapped files.
+
+    Embeddings are kept L2-normalized in one contiguous float32 matrix so a
+    cosine search is a single matrix-vector product. Payloads are appended as
+    JSON lines to a sidecar file and only the rows returned by a search are
+    read back, so opening the store costs a few memory maps.
+
+    Files in ``path``:
+        meta.json: dimension, row count and allocated capacity.
+        vectors.f32: (capacity, dim) float32 matrix.
+        ids.bin: (capacity,) point IDs.
+        offsets.i64: (capacity, 2) offset and length of each payload.
+        dates.f64: (capacity,) publication timestamps, NaN if unknown.
+        sources.i32: (capacity,) index of each row's source in meta.json.
+        payloads.jsonl: payload records, compacted once mostly stale.
+        ann.npz: IVF index, once the store is large enough to use one.
+        codes.bin, scales.f32: quantized vectors, when quantization is on.
+
+    Below ``ann_min_vectors`` rows searches are exact. Above it an IVF index
+    is trained and searches only score the rows in the ``ann_nprobe`` lists
+    nearest to the query. The index is retrained when the store has grown
+    fourfold since it was last trained; training runs without the lock, so
+    searches carry on with the previous index, and the new one is swapped
+    in once done.
+
+    Writes flush the arrays and the meta. Payload compaction and saving
+    the index wait for ``flush``, called at the end of an ingestion run and
+    on close; an index left unsaved is brought up to date on open.
+
+    The row map and the counts are only read on open, so a store is used
+    by a single process, which holds a lock on it: opening it from a second
+    process, such as another API worker or ``app.worker``, fails.
+
+    Filtered searches only score the matching rows. A time window is
+    resolved with binary search over the rows sorted by publication date,
+    an index rebuilt lazily after writes, and sources are matched on the
+    per-row source codes.
+
+    With ``quantization`` set to "int8" or "float16", searches scan the
+    compact codes instead of the float32 matrix and only the best
+    ``top_k * oversampling`` candidates are rescored exactly, so the
+    float32 pages are read for a handful of rows per query.
+    """
+
+    def __init__(self, path: str,
+                 ann_min_vectors: int = settings.ANN_MIN_VECTORS,
+                 ann_nprobe: int = settings.ANN_NPROBE,
+                 ann_lists: Optional[int] = settings.ANN_LISTS,
+                 quantization: str = settings.LOCAL_STORE_QUANTIZATION,
+                 oversampling: float = settings.QUANTIZATION_OVERSAMPLING):
+        """Open or create a local store.
+
+        Args:
+            path: Directory holding the store files.
+            ann_min_vectors: Number of rows from which the IVF index is used.
+            ann_nprobe: Number of IVF lists scanned per search.
+            ann_lists: Number of IVF lists, defaults to sqrt(rows).
+            quantization: "none", "float16" or "int8".
+            oversampling: Candidates rescored exactly, as a multiple of top_k.
+        """
+        if quantization != "none" and quantization not in CODE_DTYPES:
+            raise ValueError(f"Unknown quantization mode {quantization!r}")
+        self.path = path
+        self.ann_min_vectors = ann_min_vectors
+        self.ann_lists = ann_lists
+        self.index = IVFIndex(nprobe=ann_nprobe)
+        self.quantization = quantization
+        self.oversampling = oversampling
+        os.makedirs(path, exist_ok=True)
+        self._lock_file = open(self._file("lock"), "a")
+        try:
+            fcntl.lockf(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_file.close()
+            raise RuntimeError(
+                f"Local vector store {path} is in use by another process; the local "
+                f"backend supports a single process, use Qdrant with several workers"
+            ) from None
+        self._lock = threading.RLock()
+        self.dim: Optional[int] = None
+        self.count = 0
+        self.capacity = 0
+        self._vectors: Optional[np.memmap] = None
+        self._ids: Optional[np.memmap] = None
+        self._offsets: Optional[np.memmap] = None
+        self._dates: Optional[np.memmap] = None
+        self._source_ids: Optional[np.memmap] = None
+        self._codes: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._rows: Dict[str, int] = {}
+        self._sources: List[str] = []
+        self._source_codes: Dict[str, int] = {}
+        # Rows with a publication date, sorted by it, and their dates
+        self._date_order: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        # Rows written or moved while a new index is trained, None when not training
+        self._dirty_rows: Optional[set] = None
+        self._index_saved = True
+        self._payload_file = open(self._file("payloads.jsonl"), "ab+")
+
+        meta_path = self._file("meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            self._index_saved = meta.get("index_saved", True)
+            self.dim = meta["dim"]
+            self.count = meta["count"]
+            self._open_arrays(max(meta["capacity"], MIN_CAPACITY))
+            self._rows = {
+                point_id.decode(): row for row, point_id in enumerate(self._ids[:self.count])
+            }
+            if "sources" in meta:
+                self._sources = meta["sources"]
+                self._source_codes = {source: code for code, source in enumerate(self._sources)}
+            elif self.count:
+                # The store predates the filter columns, fill them from the payloads
+                for row in range(self.count):
+                    self._set_filter_fields(row, self._read_payload(row))
+                self._flush()
+            if meta.get("quantization", "none") != quantization and self.count:
+                # The store was written in another mode, re-encode it
+                self._encode(np.arange(self.count), self._vectors[:self.count])
+                self._flush()
+            if os.path.exists(self._file("ann.npz")):
+                self.index.load(self._file("ann.npz"))
+                if not self._index_saved or self.index.size < self.count:
+                    # Rows changed since the index was saved, assign them all again
+                    self.index.add(np.arange(self.count), self._vectors[:self.count])
+                    self._index_saved = False
+            if not self.index.is_trained and self.count >= self.ann_min_vectors:
+                # The store outgrew exact search and was not flushed since
+                self._retrain_index()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _open_arrays(self, capacity: int) -> None:
+        """Map the array files, growing them to ``capacity`` rows."""
+        specs = [
+            ("vectors.f32", np.float32, (self.dim,)),
+            ("ids.bin", ID_DTYPE, ()),
+            ("offsets.i64", np.int64, (2,)),
+            ("dates.f64", np.float64, ()),
+            ("sources.i32", np.int32, ()),
+        ]
+        if self.quantization != "none":
+            specs += [
+                ("codes.bin", CODE_DTYPES[self.quantization], (self.dim,)),
+                ("scales.f32", np.float32, ()),
+            ]
+        arrays = []
+        for name, dtype, row_shape in specs:
+            path = self._file(name)
+            size = capacity * int(np.prod(row_shape, dtype=np.int64)) * np.dtype(dtype).itemsize
+            if not os.path.exists(path) or os.path.getsize(path) < size:
+                with open(path, "ab") as f:
+                    f.truncate(size)
+            arrays.append(np.memmap(path, dtype=dtype, mode="r+", shape=(capacity, *row_shape)))
+        self._vectors, self._ids, self._offsets, self._dates, self._source_ids = arrays[:5]
+        if self.quantization != "none":
+            self._codes, self._scales = arrays[5:]
+        self.capacity = capacity
+
+    def _ensure_capacity(self, rows: int) -> None:
+        if rows <= self.capacity:
+            return
+        capacity = max(MIN_CAPACITY, self.capacity)
+        while capacity < rows:
+            capacity *= 2
+        if self._vectors is not None:
+            self._flush()
+        self._open_arrays(capacity)
+
+    def _compact_payloads(self) -> None:
+        """Rewrite the payload file without replaced or deleted records."""
+        live = int(self._offsets[:self.count, 1].sum())
+        self._payload_file.seek(0, os.SEEK_END)
+        if self._payload_file.tell() <= 2 * live + (1 << 20):
+            return
+        tmp_path = self._file("payloads.jsonl.tmp")
+        with open(tmp_path, "wb") as out:
+            for row in range(self.count):
+                offset, length = self._offsets[row]
+                self._payload_file.seek(int(offset))
+                data = self._payload_file.read(int(length))
+                self._offsets[row] = (out.tell(), length)
+                out.write(data)
+        self._payload_file.close()
+        os.replace(tmp_path, self._file("payloads.jsonl"))
+        self._payload_file = open(self._file("payloads.jsonl"), "ab+")
+
+    def _encode(self, rows: np.ndarray, matrix: np.ndarray) -> None:
+        if self.quantization == "none":
+            return
+        codes, scales = quantize(np.asarray(matrix, dtype=np.float32), self.quantization)
+        self._codes[rows] = codes
+        self._scales[rows] = scales
+
+    def _retrain_index(self) -> None:
+        """Train a new IVF index without holding the lock, then swap it in."""
+        with self._lock:
+            if self._dirty_rows is not None:
+                # Another thread is training
+                return
+            self._dirty_rows = set()
+            count = self.count
+            # The files only grow, this mapping stays valid while training
+            vectors = self._vectors[:count]
+        try:
+            index = IVFIndex(nprobe=self.index.nprobe)
+            index.train(vectors, self.ann_lists)
+            with self._lock:
+                rows = {row for row in self._dirty_rows if row < self.count}
+                rows.update(range(count, self.count))
+                if rows:
+                    rows = np.array(sorted(rows))
+                    index.add(rows, self._vectors[rows])
+                self.index = index
+                self._index_saved = False
+        finally:
+            with self._lock:
+                self._dirty_rows = None
+
+    def _flush(self) -> None:
+        self._vectors.flush()
+        self._ids.flush()
+        self._offsets.flush()
+        self._dates.flush()
+        self._source_ids.flush()
+        if self.quantization != "none":
+            self._codes.flush()
+            self._scales.flush()
+        self._payload_file.flush()
+        meta_path = self._file("meta.json")
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump({
+                "dim": self.dim,
+                "count": self.count,
+                "capacity": self.capacity,
+                "quantization": self.quantization,
+                "sources": self._sources,
+                "index_saved": self._index_saved
+            }, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def flush(self) -> None:
+        """Compact the payloads and save the IVF index if it changed."""
+        with self._lock:
+            if self._vectors is None:
+                return
+            self._compact_payloads()
+            if self.index.is_trained and not self._index_saved:
+                self.index.save(self._file("ann.npz"), self.count)
+                self._index_saved = True
+            self._flush()
+
+    def _append_payload(self, payload: Dict) -> tuple:
+        data = json.dumps(payload, separators=(",", ":")).encode("utf-8") + b"\n"
+        self._payload_file.seek(0, os.SEEK_END)
+        offset = self._payload_file.tell()
+        self._payload_file.write(data)
+        return offset, len(data)
+
+    def _read_payload(self, row: int) -> Dict:
+        offset, length = self._offsets[row]
+        self._payload_file.seek(int(offset))
+        return json.loads(self._payload_file.read(int(length)))
+
+    def _set_filter_fields(self, row: int, meta: Dict) -> None:
+        self._date_order = None
+        published = to_timestamp(meta.get("published_date"))
+        self._dates[row] = np.nan if published is None else published
+        source = meta.get("source")
+        if source is None:
+            self._source_ids[row] = -1
+            return
+        code = self._source_codes.get(source)
+        if code is None:
+            code = self._source_codes[source] = len(self._sources)
+            self._sources.append(source)
+        self._source_ids[row] = code
+
+    def _filter_rows(self, filters: SearchFilter) -> np.ndarray:
+        """Get the sorted rows matching a filter."""
+        rows = None
+        if filters.has_window:
+            if self._date_order is None:
+                dates = self._dates[:self.count]
+                order = np.argsort(dates, kind="stable")
+                # NaN dates sort last and never match a window
+                dated = int(np.count_nonzero(~np.isnan(dates)))
+                self._date_order = (order[:dated], dates[order[:dated]])
+            order, sorted_dates = self._date_order
+            start = 0 if filters.since is None else np.searchsorted(
+                sorted_dates, to_timestamp(filters.since), "left"
+            )
+            end = len(order) if filters.until is None else np.searchsorted(
+                sorted_dates, to_timestamp(filters.until), "right"
+            )
+            rows = np.sort(order[start:end])
+        if filters.sources is not None:
+            codes = [self._source_codes[s] for s in filters.sources if s in self._source_codes]
+            if rows is None:
+                rows = np.flatnonzero(np.isin(self._source_ids[:self.count], codes))
+            else:
+                rows = rows[np.isin(self._source_ids[rows], codes)]
+        return np.arange(self.count) if rows is None else rows
+
+    def store(self, texts: List[str], embeddings: List[np.ndarray],
+              metas: Optional[List[Dict]] = None,
+              ids: Optional[List[str]] = None) -> List[str]:
+        """Store text chunks and embeddings in the local matrix."""
+        if not texts or not embeddings:
+            return []
+
+        if len(texts) != len(embeddings):
+            raise ValueError("Number of texts and embeddings must match")
+
+        if metas and len(metas) != len(texts):
+            raise ValueError("Number of meta items must match texts")
+
+        if ids and len(ids) != len(texts):
+            raise ValueError("Number of IDs must match texts")
+
+        if not ids:
+            ids = [str(uuid.uuid4()) for _ in range(len(texts))]
+
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = matrix.shape[1]
+            elif matrix.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dimensional embeddings")
+
+            self._ensure_capacity(self.count + len(ids))
+            rows = []
+            for i, (point_id, text) in enumerate(zip(ids, texts)):
+                row = self._rows.get(point_id)
+                if row is None:
+                    row = self.count
+                    self.count += 1
+                    self._rows[point_id] = row
+                    self._ids[row] = point_id.encode()
+                rows.append(row)
+                self._vectors[row] = matrix[i]
+                payload = dict(metas[i]) if metas else {}
+                if self.payload_text:
+                    payload["text"] = text
+                self._offsets[row] = self._append_payload(payload)
+                self._set_filter_fields(row, metas[i] if metas else {})
+            self._encode(np.array(rows), matrix)
+
+            if self.index.is_trained:
+                self.index.add(np.array(rows), matrix)
+                self._index_saved = False
+            if self._dirty_rows is not None:
+                self._dirty_rows.update(rows)
+            retrain = self.count >= self.ann_min_vectors and (
+                not self.index.is_trained or self.count > 4 * self.index.trained_count
+            )
+            self._flush()
+
+        if retrain:
+            self._retrain_index()
+        if self.lexical_index is not None:
+            self.lexical_index.add(ids, texts)
+        return ids
+
+    def delete(self, ids: List[str]) -> None:
+        """Delete rows, moving the last row into each freed slot."""
+        with self._lock:
+            for point_id in ids:
+                row = self._rows.pop(point_id, None)
+                if row is None:
+                    continue
+                last = self.count - 1
+                if row != last:
+                    self._vectors[row] = self._vectors[last]
+                    self._ids[row] = self._ids[last]
+                    self._offsets[row] = self._offsets[last]
+                    self._dates[row] = self._dates[last]
+                    self._source_ids[row] = self._source_ids[last]
+                    if self.quantization != "none":
+                        self._codes[row] = self._codes[last]
+                        self._scales[row] = self._scales[last]
+                    self._rows[self._ids[row].decode()] = row
+                    if self.index.is_trained:
+                        self.index.move(last, row)
+                        self._index_saved = False
+                    if self._dirty_rows is not None:
+                        self._dirty_rows.add(row)
+                self.count = last
+                self._date_order = None
+            if ids:
+                self._flush()
+        if self.lexical_index is not None:
+            self.lexical_index.delete(ids)
+
+    def close(self) -> None:
+        """Flush the store and release its files."""
+        with self._lock:
+            self.flush()
+            self._payload_file.close()
+            self._lock_file.close()
+            self._vectors = self._ids = self._offsets = None
+            self._dates = self._source_ids = self._codes = self._scales = None
+
+    def _to_search_result(self, row: int, score: float, with_vector: bool = False) -> SearchResult:
+        payload = self._read_payload(row)
+        text = payload.pop("text", "")
+        return SearchResult(
+            id=self._ids[row].decode(),
+            text=text,
+            score=score,
+            meta=payload,
+            # Normalized, which cosine comparisons don't mind
+            embedding=self._vectors[row].tolist() if with_vector else None
+        )
+
+    def retrieve(self, ids: List[str], with_vectors: bool = False) -> List[SearchResult]:
+        """Get stored rows by ID."""
+        with self._lock:
+            return [
+                self._to_search_result(self._rows[point_id], 0.0, with_vectors)
+                for point_id in ids if point_id in self._rows
+            ]
+
+    def scroll_texts(self, batch_size: int = 1000) -> Iterator[Tuple[List[str], List[str]]]:
+        """Iterate over the texts of all rows."""
+        start = 0
+        while True:
+            with self._lock:
+                rows = range(start, min(start + batch_size, self.count))
+                ids = [self._ids[row].decode() for row in rows]
+                texts = [self._read_payload(row).get("text", "") for row in rows]
+            if not ids:
+                break
+            yield ids, texts
+            start += batch_size
+
+    def search(self, query_embedding: np.ndarray, top_k: int = 5,
+               filters: Optional[SearchFilter] = None,
+               with_vectors: bool = False) -> List[SearchResult]:
+        """Cosine search, approximate once the IVF index is in use."""
+        if query_embedding is None:
+            return []
+
+        with self._lock:
+            if not self.count:
+                return []
+
+            query = np.asarray(query_embedding, dtype=np.float32)
+            norm = np.linalg.norm(query)
+            if norm == 0:
+                return []
+
+            query = query / norm
+            rows = None
+            if filters is not None:
+                rows = self._filter_rows(filters)
+                if not len(rows):
+                    return []
+            # A small filtered set is scanned exactly, a large one through the IVF lists
+            if self.index.is_trained and (rows is None and self.count >= self.ann_min_vectors
+                                          or rows is not None and len(rows) >= self.ann_min_vectors):
+                candidates = self.index.candidates(query, self.count)
+                rows = candidates if rows is None else np.intersect1d(candidates, rows, assume_unique=True)
+
+            if self.quantization != "none":
+                # Shortlist on the compact codes, then rescore exactly
+                scores = approximate_scores(self._codes, self._scales, query, rows, self.count)
+                if rows is None:
+                    rows = np.arange(self.count)
+                shortlist = min(int(top_k * self.oversampling), len(rows))
+                if shortlist < len(rows):
+                    rows = rows[np.argpartition(-scores, shortlist - 1)[:shortlist]]
+                # Sorted rows read the float32 memmap sequentially
+                rows = np.sort(rows)
+                scores = self._vectors[rows] @ query
+            elif rows is not None:
+                scores = self._vectors[rows] @ query
+            else:
+                rows = np.arange(self.count)
+                scores = self._vectors[:self.count] @ query
+
+            k = min(top_k, len(rows))
+            if not k:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+
+            return [
+                self._to_search_result(row, float(score), with_vectors)
+                for row, score in zip(rows[top], scores[top])
+            ]
@@ -0,0 +1,99 @@
+import hashlib
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.db.database import SessionLocal
+from app.db.models import ArticlePartition, IngestedArticle
+
+
+def content_hash(text: str) -> str:
+    """Get a stable hash of a piece of text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_chunk_id(article_url: str, position: int, text: str) -> str:
+    """Derive a deterministic point ID for a chunk.
+
+    The ID only changes when the chunk's article, position or text changes,
+    so re-ingesting an unchanged chunk overwrites the existing point.
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{article_url}#{position}:{content_hash(text)}"))
+
+
+class IngestionManifest:
+    """Persisted record of ingested article URLs and their content hashes.
+
+    With a partitioned vector store, each article also records the
+    partition its chunks were written to, so the articles of a dropped
+    partition are forgotten with it and ingested again when seen next.
+    """
+
+    def __init__(self, session_factory: Callable = SessionLocal):
+        """Initialize the manifest.
+
+        Args:
+            session_factory: Factory of database sessions.
+        """
+        self.session_factory = session_factory
+
+    def get(self, urls: List[str]) -> Dict[str, Tuple[str, List[str]]]:
+        """Get the stored content hash and chunk IDs for each known URL.
+
+        Args:
+            urls: Article URLs to look up.
+
+        Returns:
+            Mapping of URL to (content hash, chunk IDs) for URLs already ingested.
+        """
+        if not urls:
+            return {}
+        db = self.session_factory()
+        try:
+            rows = db.query(IngestedArticle).filter(IngestedArticle.url.in_(urls)).all()
+            return {row.url: (row.content_hash, list(row.chunk_ids or [])) for row in rows}
+        finally:
+            db.close()
+
+    def update(self, entries: Dict[str, Tuple[str, List[str]]],
+               partition: Optional[str] = None) -> None:
+        """Record the content hash and chunk IDs of ingested articles.
+
+        Args:
+            entries: Mapping of URL to (content hash, chunk IDs).
+            partition: Key of the vector store partition the chunks were
+                written to, None if the store isn't partitioned.
+        """
+        if not entries:
+            return
+        db = self.session_factory()
+        try:
+            for url, (article_hash, chunk_ids) in entries.items():
+                db.merge(IngestedArticle(url=url, content_hash=article_hash, chunk_ids=chunk_ids))
+                if partition is not None:
+                    db.merge(ArticlePartition(url=url, partition=partition))
+            db.commit()
+        finally:
+            db.close()
+
+    def forget_partitions(self, partitions: List[str]) -> List[str]:
+        """Remove the articles recorded in dropped partitions.
+
+        Returns:
+            URLs of the removed articles.
+        """
+        if not partitions:
+            return []
+        db = self.session_factory()
+        try:
+            in_partitions = ArticlePartition.partition.in_(partitions)
+            urls = [row.url for row in db.query(ArticlePartition.url).filter(in_partitions)]
+            db.query(IngestedArticle).filter(IngestedArticle.url.in_(urls)).delete(synchronize_session=False)
+            db.query(ArticlePartition).filter(in_partitions).delete(synchronize_session=False)
+            db.commit()
+            return urls
+        finally:
+            db.close()
+
+
+# Singleton instance
+ingestion_manifest = IngestionManifest()
@@ -0,0 +1,328 @@
+import asyncio
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from abc import abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+from app.core.config import settings
+from app.core.executor import run_blocking
+from app.rag.vector_store import QdrantStore, SearchFilter, VectorStore, open_lexical_index
+from app.schemas.message import SearchResult
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Partitions created by other processes are picked up after this many seconds
+REFRESH_INTERVAL = 60.0
+
+DAY_KEY = re.compile(r"^\d{8}$")
+WEEK_KEY = re.compile(r"^(\d{4})w(\d{2})$")
+
+
+def partition_key(moment: datetime, granularity: str) -> str:
+    """Get the key of the day or ISO week partition a moment falls in."""
+    if granularity == "day":
+        return moment.strftime("%Y%m%d")
+    if granularity == "week":
+        year, week, _ = moment.isocalendar()
+        return f"{year}w{week:02d}"
+    raise ValueError(f"Unknown partitioning {granularity!r}")
+
+
+def partition_end(key: str) -> Optional[datetime]:
+    """Get the UTC end of a partition, or None if the key is not a partition key."""
+    if DAY_KEY.match(key):
+        start = datetime.strptime(key, "%Y%m%d")
+        return start.replace(tzinfo=timezone.utc) + timedelta(days=1)
+    match = WEEK_KEY.match(key)
+    if match:
+        start = datetime.fromisocalendar(int(match.group(1)), int(match.group(2)), 1)
+        return start.replace(tzinfo=timezone.utc) + timedelta(weeks=1)
+    return None
+
+
+class PartitionedLexicalIndex:
+    """BM25 search over the lexical indexes of the searched partitions.
+
+    Each partition keeps its own index, in a subdirectory of the same
+    name, so it is dropped with the partition. Hits are merged by score,
+    as the dense results of the partitions are.
+    """
+
+    def __init__(self, store: "PartitionedVectorStore"):
+        self.store = store
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[str, float]]:
+        """Search the indexes of the most recent partitions."""
+        hits = [
+            hit for partition in self.store._search_targets(None) if partition.lexical_index is not None
+            for hit in partition.lexical_index.search(query, top_k)
+        ]
+        return sorted(hits, key=lambda hit: hit[1], reverse=True)[:top_k]
+
+
+class PartitionedVectorStore(VectorStore):
+    """Vector store split into one store per ingestion day or week.
+
+    Chunks are written to the partition of the time they are stored, after
+    any copy of them in an older partition is deleted, so a re-ingested
+    article moves to the current partition. Searches fan out to the
+    ``search_partitions`` most recent partitions, skipping those that ended
+    before the start of the filter's time window, and merge the results by
+    score. With a ``lexical_path``, each partition has its own lexical
+    index. ``prune`` drops every partition older than the retention window
+    as a whole, with its lexical index, without deleting points one by one;
+    the articles stored in it are forgotten by the ingestion service.
+    """
+
+    def __init__(self, granularity: str = settings.VECTOR_PARTITIONING,
+                 search_partitions: int = settings.SEARCH_PARTITIONS,
+                 retention_days: Optional[int] = settings.RETENTION_DAYS,
+                 lexical_path: Optional[str] = None):
+        """Initialize the store.
+
+        Args:
+            granularity: "day" or "week".
+            search_partitions: Number of most recent partitions searched.
+            retention_days: Age in days after which a partition is dropped,
+                None to keep every partition.
+            lexical_path: Directory of the partitions' lexical indexes,
+                None for dense search only.
+        """
+        # Fail early on an unknown granularity
+        partition_key(datetime.now(timezone.utc), granularity)
+        self.granularity = granularity
+        self.search_partitions = search_partitions
+        self.retention_days = retention_days
+        self.lexical_path = lexical_path
+        if lexical_path:
+            self.lexical_index = PartitionedLexicalIndex(self)
+        self._lock = threading.RLock()
+        self._partitions: Dict[str, VectorStore] = {}
+        self._refreshed_at = 0.0
+
+    @abstractmethod
+    def _list_partitions(self) -> List[str]:
+        """Get the keys of the existing partitions."""
+        pass
+
+    @abstractmethod
+    def _open_partition(self, key: str) -> VectorStore:
+        """Open a partition, creating it if it doesn't exist."""
+        pass
+
+    @abstractmethod
+    def _drop_partition(self, key: str, store: VectorStore) -> None:
+        """Delete a partition and everything in it."""
+        pass
+
+    def _open(self, key: str) -> VectorStore:
+        store = self._open_partition(key)
+        store.payload_text = self.payload_text
+        if self.lexical_path:
+            store.lexical_index = open_lexical_index(os.path.join(self.lexical_path, key), store)
+        return store
+
+    def write_partition(self) -> Optional[str]:
+        """Get the key of the partition of the current time."""
+        return partition_key(datetime.now(timezone.utc), self.granularity)
+
+    def _refresh(self, force: bool = False) -> None:
+        with self._lock:
+            if not force and time.monotonic() - self._refreshed_at < REFRESH_INTERVAL:
+                return
+            keys = {key for key in self._list_partitions() if partition_end(key)}
+            for key in keys - self._partitions.keys():
+                self._partitions[key] = self._open(key)
+            for key in self._partitions.keys() - keys:
+                # Dropped by another process
+                store = self._partitions.pop(key)
+                if store.lexical_index is not None:
+                    store.lexical_index.close()
+            self._refreshed_at = time.monotonic()
+
+    def partitions(self) -> List[Tuple[str, VectorStore]]:
+        """Get the partitions, newest first."""
+        self._refresh()
+        with self._lock:
+            return sorted(self._partitions.items(), key=lambda item: partition_end(item[0]), reverse=True)
+
+    def _search_targets(self, filters: Optional[SearchFilter]) -> List[VectorStore]:
+        partitions = self.partitions()[:self.search_partitions]
+        if filters is not None and filters.since is not None:
+            since = filters.since if filters.since.tzinfo else filters.since.replace(tzinfo=timezone.utc)
+            # Chunks are published before they are ingested
+            partitions = [(key, store) for key, store in partitions if partition_end(key) > since]
+        return [store for _, store in partitions]
+
+    @staticmethod
+    def _merge(results: List[List[SearchResult]], top_k: int) -> List[SearchResult]:
+        merged = [result for partition_results in results for result in partition_results]
+        return sorted(merged, key=lambda result: result.score, reverse=True)[:top_k]
+
+    def store(self, texts: List[str], embeddings: List[np.ndarray],
+              metas: Optional[List[Dict]] = None,
+              ids: Optional[List[str]] = None) -> List[str]:
+        """Store chunks in the partition of the current time."""
+        if not texts or not embeddings:
+            return []
+
+        key = self.write_partition()
+        self._refresh()
+        with self._lock:
+            current = self._partitions.get(key)
+            if current is None:
+                logger.info(f"Creating vector store partition {key}")
+                current = self._partitions[key] = self._open(key)
+            older = [store for other, store in self._partitions.items() if other != key]
+        if ids:
+            for store in older:
+                store.delete(ids)
+        return current.store(texts, embeddings, metas, ids)
+
+    def delete(self, ids: List[str]) -> None:
+        """Delete chunks from whichever partition holds them."""
+        if not ids:
+            return
+        for _, store in self.partitions():
+            store.delete(ids)
+
+    def retrieve(self, ids: List[str], with_vectors: bool = False) -> List[SearchResult]:
+        """Get chunks by ID from every partition."""
+        results = []
+        for _, store in self.partitions():
+            results.extend(store.retrieve(ids, with_vectors))
+        return results
+
+    def retrieve_matches(self, ids: List[str], filters: Optional[SearchFilter] = None,
+                         with_vectors: bool = False) -> List[SearchResult]:
+        """Get chunks by ID from the partitions a search with ``filters`` covers."""
+        results = []
+        for store in self._search_targets(filters):
+            results.extend(store.retrieve_matches(ids, filters, with_vectors))
+        return results
+
+    def flush(self) -> None:
+        """Flush every partition."""
+        for _, store in self.partitions():
+            store.flush()
+
+    def scroll_texts(self, batch_size: int = 1000) -> Iterator[Tuple[List[str], List[str]]]:
+        """Iterate over the chunks of every partition."""
+        for _, store in self.partitions():
+            yield from store.scroll_texts(batch_size)
+
+    def search(self, query_embedding: np.ndarray, top_k: int = 5,
+               filters: Optional[SearchFilter] = None,
+               with_vectors: bool = False) -> List[SearchResult]:
+        """Search the most recent partitions and merge their results."""
+        return self._merge(
+            [
+                store.search(query_embedding, top_k, filters, with_vectors)
+                for store in self._search_targets(filters)
+            ],
+            top_k
+        )
+
+    async def asearch(self, query_embedding: np.ndarray, top_k: int = 5,
+                      filters: Optional[SearchFilter] = None,
+                      with_vectors: bool = False) -> List[SearchResult]:
+        """Search the most recent partitions concurrently and merge their results."""
+        # Listing the partitions may hit the network
+        targets = await run_blocking(self._search_targets, filters)
+        results = await asyncio.gather(*(
+            store.asearch(query_embedding, top_k, filters, with_vectors) for store in targets
+        ))
+        return self._merge(results, top_k)
+
+    def prune(self, now: Optional[datetime] = None) -> List[str]:
+        """Drop the partitions that ended before the retention window."""
+        if self.retention_days is None:
+            return []
+        cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=self.retention_days)
+        self._refresh(force=True)
+        with self._lock:
+            expired = [
+                (key, store) for key, store in self._partitions.items() if partition_end(key) <= cutoff
+            ]
+            for key, _ in expired:
+                del self._partitions[key]
+
+        for key, store in expired:
+            self._drop_partition(key, store)
+            if store.lexical_index is not None:
+                store.lexical_index.close()
+                shutil.rmtree(os.path.join(self.lexical_path, key), ignore_errors=True)
+            logger.info(f"Dropped vector store partition {key}")
+        return [key for key, _ in expired]
+
+
+class QdrantPartitionedStore(PartitionedVectorStore):
+    """Partitions stored as Qdrant collections named ``{collection}_{key}``."""
+
+    def __init__(self, collection_prefix: str = settings.QDRANT_COLLECTION, **kwargs):
+        super().__init__(**kwargs)
+        self.collection_prefix = collection_prefix
+        # The partitions share the clients and their connection pools
+        self.client = QdrantClient(
+            url=settings.QDRANT_URL,
+            api_key=settings.QDRANT_API_KEY
+        )
+        self.async_client = AsyncQdrantClient(
+            url=settings.QDRANT_URL,
+            api_key=settings.QDRANT_API_KEY
+        )
+
+    def _list_partitions(self) -> List[str]:
+        prefix = f"{self.collection_prefix}_"
+        return [
+            collection.name[len(prefix):]
+            for collection in self.client.get_collections().collections
+            if collection.name.startswith(prefix)
+        ]
+
+    def _open_partition(self, key: str) -> VectorStore:
+        return QdrantStore(
+            f"{self.collection_prefix}_{key}",
+            client=self.client,
+            async_client=self.async_client
+        )
+
+    def _drop_partition(self, key: str, store: VectorStore) -> None:
+        self.client.delete_collection(collection_name=f"{self.collection_prefix}_{key}")
+
+
+class LocalPartitionedStore(PartitionedVectorStore):
+    """Partitions stored as local stores in subdirectories of ``path``."""
+
+    def __init__(self, path: str = settings.LOCAL_STORE_PATH, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _list_partitions(self) -> List[str]:
+        return [name for name in os.listdir(self.path) if os.path.isdir(os.path.join(self.path, name))]
+
+    def _open_partition(self, key: str) -> VectorStore:
+        from app.rag.local_store import LocalVectorStore
+        return LocalVectorStore(os.path.join(self.path, key))
+
+    def _drop_partition(self, key: str, store: VectorStore) -> None:
+        store.close()
+        shutil.rmtree(os.path.join(self.path, key))
+
+
+def create_partitioned_store() -> PartitionedVectorStore:
+    """Create the partitioned store of the backend configured in settings."""
+    lexical_path = settings.LEXICAL_INDEX_PATH if settings.HYBRID_SEARCH_ENABLED else None
+    if settings.VECTOR_STORE_BACKEND == "local":
+        return LocalPartitionedStore(lexical_path=lexical_path)
+    return QdrantPartitionedStore(lexical_path=lexical_path)
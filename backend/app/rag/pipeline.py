@@ -0,0 +1,77 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stream, passed down the pipeline once all workers are done
+DONE = object()
+
+
+async def _next(inbox: asyncio.Queue) -> Any:
+    item = await inbox.get()
+    if item is DONE:
+        # Put the marker back so sibling workers stop as well
+        inbox.put_nowait(DONE)
+    return item
+
+
+async def run_stage(name: str, inbox: asyncio.Queue,
+                    handler: Callable[[Any], Awaitable[None]], workers: int = 1,
+                    outbox: Optional[asyncio.Queue] = None) -> None:
+    """Run a pipeline stage until its input is exhausted.
+
+    Each worker takes items from ``inbox`` and passes them to ``handler``,
+    which forwards results to the next stage itself. Errors are logged and
+    the item is dropped. Once every worker has seen the end of the input,
+    ``DONE`` is put on ``outbox``.
+
+    Args:
+        name: Stage name used in log messages.
+        inbox: Queue of input items, terminated by ``DONE``.
+        handler: Coroutine function processing one item.
+        workers: Number of concurrent workers.
+        outbox: Queue of the next stage.
+    """
+    async def worker():
+        while (item := await _next(inbox)) is not DONE:
+            try:
+                await handler(item)
+            except Exception as e:
+                logger.error(f"{name} stage failed: {e}")
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    if outbox is not None:
+        await outbox.put(DONE)
+
+
+async def run_batch_stage(name: str, inbox: asyncio.Queue,
+                          handler: Callable[[List[Any]], Awaitable[None]],
+                          batch_size: int, workers: int = 1,
+                          outbox: Optional[asyncio.Queue] = None) -> None:
+    """Run a pipeline stage that processes items in batches.
+
+    Like ``run_stage``, but each worker collects ``batch_size`` items
+    before calling ``handler``. A partial batch is only flushed at the end
+    of the input.
+    """
+    async def flush(batch):
+        try:
+            await handler(batch)
+        except Exception as e:
+            logger.error(f"{name} stage failed on a batch of {len(batch)}: {e}")
+
+    async def worker():
+        batch = []
+        while (item := await _next(inbox)) is not DONE:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                await flush(batch)
+                batch = []
+        if batch:
+            await flush(batch)
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    if outbox is not None:
+        await outbox.put(DONE)
@@ -0,0 +1,60 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Storage type of the codes for each quantization mode
+CODE_DTYPES = {
+    "float16": np.float16,
+    "int8": np.int8,
+}
+
+SCORE_BLOCK_SIZE = 8192
+
+
+def quantize(matrix: np.ndarray, mode: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode float32 vectors in a compact representation.
+
+    int8 uses symmetric scalar quantization with one scale per vector, so
+    ``vector ~= codes * scale``. float16 stores the vectors at half
+    precision with a scale of one.
+
+    Args:
+        matrix: (n, dim) float32 matrix.
+        mode: "int8" or "float16".
+
+    Returns:
+        Tuple of (codes, scales).
+    """
+    if mode == "int8":
+        scales = np.abs(matrix).max(axis=1) / 127
+        scales[scales == 0] = 1
+        codes = np.round(matrix / scales[:, np.newaxis]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    if mode == "float16":
+        return matrix.astype(np.float16), np.ones(len(matrix), dtype=np.float32)
+    raise ValueError(f"Unknown quantization mode {mode!r}")
+
+
+def approximate_scores(codes: np.ndarray, scales: np.ndarray, query: np.ndarray,
+                       rows: Optional[np.ndarray] = None, count: int = 0) -> np.ndarray:
+    """Compute dot products between a query and quantized vectors.
+
+    Args:
+        codes: Quantized vectors.
+        scales: Per-vector scales.
+        query: float32 query vector.
+        rows: Rows to score. Defaults to the first ``count`` rows.
+        count: Number of rows to score when ``rows`` is not given.
+
+    Returns:
+        Approximate scores, one per scored row.
+    """
+    if rows is not None:
+        return (codes[rows].astype(np.float32) @ query) * scales[rows]
+
+    # Decode in blocks so a full scan never materializes a float32 copy
+    scores = np.empty(count, dtype=np.float32)
+    for i in range(0, count, SCORE_BLOCK_SIZE):
+        end = min(i + SCORE_BLOCK_SIZE, count)
+        scores[i:end] = (codes[i:end].astype(np.float32) @ query) * scales[i:end]
+    return scores
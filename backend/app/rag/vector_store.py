@@ -1,73 +1,339 @@
+import asyncio
+import logging
+import math
+import uuid
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Tuple, Union
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
 import numpy as np
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http import models as qmodels
 from qdrant_client.http.exceptions import UnexpectedResponse
 from qdrant_client.http.models import Distance, VectorParams
 
 from app.core.config import settings
+from app.core.executor import run_blocking
+from app.rag.chunk_store import chunk_store
+from app.rag.lexical import BM25Index, reciprocal_rank_fusion
 from app.schemas.message import SearchResult
 
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def to_timestamp(value: Union[datetime, str, None]) -> Optional[float]:
+    """Convert a datetime or ISO 8601 string to a POSIX timestamp.
+    
+    Naive values are taken as UTC. Returns None for missing or invalid values.
+    """
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class SearchFilter:
+    """Restriction of a search to a publication time window and to sources.
+    
+    Chunks without a publication date never match a time window.
+    """
+    
+    def __init__(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                 sources: Optional[List[str]] = None):
+        """Initialize the filter.
+        
+        Args:
+            since: Earliest publication date, inclusive.
+            until: Latest publication date, inclusive.
+            sources: Allowed values of the ``source`` field.
+        """
+        self.since = since
+        self.until = until
+        self.sources = sources
+    
+    @property
+    def has_window(self) -> bool:
+        return self.since is not None or self.until is not None
+    
+    def matches(self, meta: Dict) -> bool:
+        """Check whether a chunk's meta passes the filter."""
+        if self.sources is not None and meta.get("source") not in self.sources:
+            return False
+        if self.has_window:
+            published = to_timestamp(meta.get("published_date"))
+            if published is None:
+                return False
+            if self.since is not None and published < to_timestamp(self.since):
+                return False
+            if self.until is not None and published > to_timestamp(self.until):
+                return False
+        return True
+
+
+def apply_recency_decay(results: List[SearchResult], half_life_hours: float,
+                        now: Optional[datetime] = None) -> List[SearchResult]:
+    """Halve the score of results for every ``half_life_hours`` of age and re-rank them.
+    
+    Results without a publication date are scored as if they were one
+    half-life old.
+    """
+    now_timestamp = to_timestamp(now or datetime.now(timezone.utc))
+    decayed = []
+    for result in results:
+        published = to_timestamp(result.meta.get("published_date")) if result.meta else None
+        age_hours = max(now_timestamp - published, 0) / 3600 if published is not None else half_life_hours
+        decayed.append(result.model_copy(update={"score": result.score * math.pow(0.5, age_hours / half_life_hours)}))
+    return sorted(decayed, key=lambda result: result.score, reverse=True)
+
 
 class VectorStore(ABC):
-    """Abstract base class for vector stores."""
+    """Abstract base class for vector stores.
+    
+    A store with a ``lexical_index`` keeps it in sync with the chunks it
+    stores and deletes, for hybrid search. A store with ``payload_text``
+    off leaves the texts out of the payloads, for callers keeping them in
+    the chunk store.
+    """
+    
+    lexical_index: Optional[BM25Index] = None
+    payload_text: bool = True
     
     @abstractmethod
     def store(self, texts: List[str], embeddings: List[np.ndarray], 
-              metas: Optional[List[Dict]] = None) -> List[str]:
+              metas: Optional[List[Dict]] = None,
+              ids: Optional[List[str]] = None) -> List[str]:
         """Store text chunks and their embeddings.
         
         Args:
             texts: List of text chunks to store.
             embeddings: List of embedding vectors.
             metas: Optional list of meta dicts.
+            ids: Optional list of IDs. Items with an existing ID are replaced.
             
         Returns:
             List of IDs for the stored items.
         """
         pass
+    
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None:
+        """Delete stored items.
+        
+        Args:
+            ids: IDs of the items to delete.
+        """
+        pass
         
     @abstractmethod
-    def search(self, query_embedding: np.ndarray, top_k: int = 5) -> List[SearchResult]:
+    def retrieve(self, ids: List[str], with_vectors: bool = False) -> List[SearchResult]:
+        """Get stored items by ID.
+        
+        Args:
+            ids: IDs of the items to get.
+            with_vectors: Return the embeddings of the items.
+            
+        Returns:
+            Search results with a score of 0 for the IDs that were found.
+        """
+        pass
+    
+    @abstractmethod
+    def scroll_texts(self, batch_size: int = 1000) -> Iterator[Tuple[List[str], List[str]]]:
+        """Iterate over all stored items.
+        
+        Args:
+            batch_size: Number of items per batch.
+            
+        Yields:
+            Tuples of (IDs, texts) of a batch of items.
+        """
+        pass
+    
+    @abstractmethod
+    def search(self, query_embedding: np.ndarray, top_k: int = 5,
+               filters: Optional[SearchFilter] = None,
+               with_vectors: bool = False) -> List[SearchResult]:
         """Find most similar documents to query.
         
         Args:
             query_embedding: Query embedding vector.
             top_k: Number of results to return.
+            filters: Optional time window and sources to search in.
+            with_vectors: Return the embeddings of the results.
             
         Returns:
             List of search results.
         """
         pass
+    
+    def retrieve_matches(self, ids: List[str], filters: Optional[SearchFilter] = None,
+                         with_vectors: bool = False) -> List[SearchResult]:
+        """Get the stored items a search with ``filters`` could return, by ID.
+        
+        Used to fetch the chunks only found by lexical search. Items that
+        don't pass the filters are left out.
+        
+        Args:
+            ids: IDs of the items to get.
+            filters: Optional time window and sources searched in.
+            with_vectors: Return the embeddings of the items.
+            
+        Returns:
+            Search results with a score of 0 for the matching items.
+        """
+        return [
+            result for result in self.retrieve(ids, with_vectors)
+            if filters is None or filters.matches(result.meta or {})
+        ]
+    
+    def flush(self) -> None:
+        """Persist the work deferred by writes, at the end of a batch of them.
+        
+        Stores that write everything as they go have nothing to do.
+        """
+        pass
+    
+    def write_partition(self) -> Optional[str]:
+        """Get the key of the partition written to now, None if the store isn't partitioned."""
+        return None
+    
+    def prune(self) -> List[str]:
+        """Drop the data that is past the retention window.
+        
+        Only partitioned stores expire data, other stores keep everything.
+        
+        Returns:
+            Names of the dropped partitions.
+        """
+        return []
+    
+    async def asearch(self, query_embedding: np.ndarray, top_k: int = 5,
+                      filters: Optional[SearchFilter] = None,
+                      with_vectors: bool = False) -> List[SearchResult]:
+        """Find most similar documents to query without blocking the event loop.
+        
+        Stores without a native async client run ``search`` in the bounded
+        thread pool.
+        
+        Args:
+            query_embedding: Query embedding vector.
+            top_k: Number of results to return.
+            filters: Optional time window and sources to search in.
+            with_vectors: Return the embeddings of the results.
+            
+        Returns:
+            List of search results.
+        """
+        return await run_blocking(self.search, query_embedding, top_k, filters, with_vectors)
 
 
 class QdrantStore(VectorStore):
     """Vector store implementation using Qdrant."""
     
-    def __init__(self):
-        """Initialize Qdrant store."""
-        self.client = QdrantClient(
+    def __init__(self, collection_name: str = settings.QDRANT_COLLECTION,
+                 client: Optional[QdrantClient] = None,
+                 async_client: Optional[AsyncQdrantClient] = None):
+        """Initialize Qdrant store.
+        
+        Args:
+            collection_name: Collection holding the points, created if missing.
+            client: Client to share with other stores, created if None.
+            async_client: Async client to share with other stores, created if None.
+        """
+        self.client = client or QdrantClient(
+            url=settings.QDRANT_URL,
+            api_key=settings.QDRANT_API_KEY
+        )
+        self.async_client = async_client or AsyncQdrantClient(
             url=settings.QDRANT_URL,
             api_key=settings.QDRANT_API_KEY
         )
-        self.collection_name = settings.QDRANT_COLLECTION
+        self.collection_name = collection_name
         self._ensure_collection()
+        
+        # Rescore the quantized candidates with the original vectors
+        self._search_params = None
+        if settings.QDRANT_QUANTIZATION != "none":
+            self._search_params = qmodels.SearchParams(
+                quantization=qmodels.QuantizationSearchParams(
+                    rescore=True,
+                    oversampling=settings.QUANTIZATION_OVERSAMPLING
+                )
+            )
+    
+    def _quantization_config(self) -> Optional[qmodels.ScalarQuantization]:
+        """Get the scalar quantization config selected in settings."""
+        if settings.QDRANT_QUANTIZATION != "int8":
+            return None
+        return qmodels.ScalarQuantization(
+            scalar=qmodels.ScalarQuantizationConfig(
+                type=qmodels.ScalarType.INT8,
+                always_ram=True
+            )
+        )
     
     def _ensure_collection(self):
         """Ensure the collection exists, create if it doesn't."""
         collections = self.client.get_collections().collections
         collection_names = [collection.name for collection in collections]
+        quantization_config = self._quantization_config()
         
         if self.collection_name not in collection_names:
             self.client.create_collection(
                 collection_name=self.collection_name,
-                vectors_config=VectorParams(size=768, distance=Distance.COSINE)
+                vectors_config=VectorParams(
+                    size=768,
+                    distance=Distance.COSINE,
+                    # Originals are only read for rescoring when quantized
+                    on_disk=bool(quantization_config)
+                ),
+                quantization_config=quantization_config
+            )
+        elif quantization_config:
+            self.client.update_collection(
+                collection_name=self.collection_name,
+                quantization_config=quantization_config
             )
+        
+        # Index the filtered fields so filters are applied inside the vector search
+        for field_name, field_schema in (
+            ("published_date", qmodels.PayloadSchemaType.DATETIME),
+            ("source", qmodels.PayloadSchemaType.KEYWORD),
+        ):
+            self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field_name,
+                field_schema=field_schema
+            )
+    
+    @staticmethod
+    def _to_qdrant_filter(filters: Optional[SearchFilter]) -> Optional[qmodels.Filter]:
+        """Convert a search filter to a Qdrant filter."""
+        if filters is None:
+            return None
+        conditions = []
+        if filters.has_window:
+            conditions.append(qmodels.FieldCondition(
+                key="published_date",
+                range=qmodels.DatetimeRange(gte=filters.since, lte=filters.until)
+            ))
+        if filters.sources is not None:
+            conditions.append(qmodels.FieldCondition(
+                key="source",
+                match=qmodels.MatchAny(any=filters.sources)
+            ))
+        return qmodels.Filter(must=conditions) if conditions else None
     
     def store(self, texts: List[str], embeddings: List[np.ndarray], 
-              metas: Optional[List[Dict]] = None) -> List[str]:
+              metas: Optional[List[Dict]] = None,
+              ids: Optional[List[str]] = None) -> List[str]:
         """Store text chunks and embeddings in Qdrant."""
         if not texts or not embeddings:
             return []
@@ -78,20 +344,23 @@ class QdrantStore(VectorStore):
         if metas and len(metas) != len(texts):
             raise ValueError("Number of meta items must match texts")
         
+        if ids and len(ids) != len(texts):
+            raise ValueError("Number of IDs must match texts")
+        
         # Generate IDs for the points
-        import uuid
-        ids = [str(uuid.uuid4()) for _ in range(len(texts))]
+        if not ids:
+            ids = [str(uuid.uuid4()) for _ in range(len(texts))]
         
         # Prepare points for insertion
         points = []
         for i, (text_id, text, embedding) in enumerate(zip(ids, texts, embeddings)):
+            payload = dict(metas[i]) if metas else {}
+            if self.payload_text:
+                payload["text"] = text
             point = qmodels.PointStruct(
                 id=text_id,
                 vector=embedding.tolist(),
-                payload={
-                    "text": text,
-                    **(metas[i] if metas else {})
-                }
+                payload=payload
             )
             points.append(point)
         
@@ -104,52 +373,217 @@ class QdrantStore(VectorStore):
                 points=batch
             )
         
+        if self.lexical_index is not None:
+            self.lexical_index.add(ids, texts)
         return ids
     
-    def search(self, query_embedding: np.ndarray, top_k: int = 5) -> List[SearchResult]:
+    def delete(self, ids: List[str]) -> None:
+        """Delete points from Qdrant."""
+        if not ids:
+            return
+        
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=qmodels.PointIdsList(points=ids)
+        )
+        if self.lexical_index is not None:
+            self.lexical_index.delete(ids)
+    
+    def retrieve(self, ids: List[str], with_vectors: bool = False) -> List[SearchResult]:
+        """Get points from Qdrant by ID."""
+        if not ids:
+            return []
+        
+        points = self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=ids,
+            with_payload=True,
+            with_vectors=with_vectors
+        )
+        return self._to_search_results(points)
+    
+    def scroll_texts(self, batch_size: int = 1000) -> Iterator[Tuple[List[str], List[str]]]:
+        """Iterate over the texts of all points in Qdrant."""
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=["text"],
+                with_vectors=False
+            )
+            if points:
+                yield [str(point.id) for point in points], [
+                    (point.payload or {}).get("text", "") for point in points
+                ]
+            if offset is None:
+                break
+    
+    def search(self, query_embedding: np.ndarray, top_k: int = 5,
+               filters: Optional[SearchFilter] = None,
+               with_vectors: bool = False) -> List[SearchResult]:
         """Search for similar documents in Qdrant."""
         if query_embedding is None:
             return []
         
         try:
             # Search for similar vectors
-            results = self.client.search(
+            response = self.client.query_points(
                 collection_name=self.collection_name,
-                query_vector=query_embedding.tolist(),
-                limit=top_k
+                query=query_embedding.tolist(),
+                query_filter=self._to_qdrant_filter(filters),
+                limit=top_k,
+                search_params=self._search_params,
+                with_vectors=with_vectors
             )
-            
-            # Convert to SearchResult objects
-            search_results = []
-            for res in results:
-                # Extract text and meta from payload
-                payload = res.payload or {}
-                text = payload.pop("text", "")
-                
-                search_results.append(SearchResult(
-                    id=res.id,
-                    text=text,
-                    score=res.score,
-                    meta=payload
-                ))
-            
-            return search_results
+            return self._to_search_results(response.points)
+        
+        except Exception as e:
+            return []
+    
+    async def asearch(self, query_embedding: np.ndarray, top_k: int = 5,
+                      filters: Optional[SearchFilter] = None,
+                      with_vectors: bool = False) -> List[SearchResult]:
+        """Search for similar documents in Qdrant with the async client."""
+        if query_embedding is None:
+            return []
+        
+        try:
+            response = await self.async_client.query_points(
+                collection_name=self.collection_name,
+                query=query_embedding.tolist(),
+                query_filter=self._to_qdrant_filter(filters),
+                limit=top_k,
+                search_params=self._search_params,
+                with_vectors=with_vectors
+            )
+            return self._to_search_results(response.points)
         
         except Exception as e:
             return []
+    
+    def _to_search_results(self, points: List[Union[qmodels.ScoredPoint, qmodels.Record]]) -> List[SearchResult]:
+        """Convert Qdrant points to SearchResult objects."""
+        search_results = []
+        for res in points:
+            # Extract text and meta from payload
+            payload = res.payload or {}
+            text = payload.pop("text", "")
+            
+            search_results.append(SearchResult(
+                id=str(res.id),
+                text=text,
+                score=getattr(res, "score", 0.0),
+                meta=payload,
+                # Only the unnamed vector, when requested
+                embedding=res.vector if isinstance(res.vector, list) else None
+            ))
+        
+        return search_results
+
+
+def open_lexical_index(path: str, store: VectorStore) -> BM25Index:
+    """Open the lexical index of a store, indexing its chunks if the index is new."""
+    lexical_index = BM25Index(path, settings.BM25_K1, settings.BM25_B)
+    if lexical_index.is_new:
+        # Index the chunks stored before hybrid search was enabled
+        for ids, texts in store.scroll_texts():
+            slim = [chunk_id for chunk_id, text in zip(ids, texts) if not text]
+            if slim:
+                # Slim payloads keep their texts in the chunk store
+                found = chunk_store.texts(slim)
+                texts = [text or found.get(chunk_id, "") for chunk_id, text in zip(ids, texts)]
+            lexical_index.add(ids, texts)
+    return lexical_index
+
+
+def create_vector_store() -> VectorStore:
+    """Create the vector store backend configured in settings."""
+    if settings.VECTOR_PARTITIONING != "none":
+        # Each partition keeps its own lexical index
+        from app.rag.partitions import create_partitioned_store
+        store = create_partitioned_store()
+    elif settings.VECTOR_STORE_BACKEND == "local":
+        from app.rag.local_store import LocalVectorStore
+        store = LocalVectorStore(settings.LOCAL_STORE_PATH)
+    else:
+        store = QdrantStore()
+    store.payload_text = not settings.CHUNK_STORE_ENABLED
+    
+    if settings.HYBRID_SEARCH_ENABLED and settings.VECTOR_PARTITIONING == "none":
+        store.lexical_index = open_lexical_index(settings.LEXICAL_INDEX_PATH, store)
+    return store
 
 
 # Singleton instance
-vector_store = QdrantStore()
+vector_store = create_vector_store()
 
-def search_similar_articles(query: str, top_k: int = 3) -> List[dict]:
-    """Search for articles similar to the query."""
+async def search_similar_articles(query: str, top_k: int = 3,
+                                  filters: Optional[SearchFilter] = None,
+                                  with_vectors: bool = False) -> List[SearchResult]:
+    """Search for articles similar to the query.
+    
+    With hybrid search enabled, the dense and BM25 rankings of
+    ``HYBRID_CANDIDATES`` chunks each are merged by reciprocal rank fusion,
+    and the score of each result is its fused score. Chunks only found by
+    BM25 are fetched from the vector store, and dropped if they don't pass
+    ``filters`` or are outside the partitions the dense search covers.
+    
+    With ``RECENCY_HALF_LIFE_HOURS`` set, the candidates are re-ranked with
+    their scores decayed by age before the best ``top_k`` are kept.
+    
+    Only the returned results are hydrated from the chunk store. With
+    ``with_vectors``, they carry their stored embeddings.
+    """
     # Get query embedding from the embedding service
     from app.rag.embeddings import embedding_service
-    query_vectors = embedding_service.generate_embeddings([query], mode="query")
-    if not query_vectors:
-        return []
-    query_vector = query_vectors[0]
+    half_life = settings.RECENCY_HALF_LIFE_HOURS
+    lexical_index = vector_store.lexical_index
+    candidates = max(top_k, settings.HYBRID_CANDIDATES) if lexical_index or half_life else top_k
+    
+    async def dense_search():
+        query_vector = await embedding_service.embed_query(query)
+        if query_vector is None:
+            return []
+        
+        # Search for similar articles
+        return await vector_store.asearch(
+            query_vector, top_k=candidates, filters=filters, with_vectors=with_vectors
+        )
+    
+    if lexical_index is None:
+        results = await dense_search()
+    else:
+        dense, lexical = await asyncio.gather(
+            dense_search(),
+            run_blocking(lexical_index.search, query, candidates)
+        )
+        fused = reciprocal_rank_fusion(
+            [[result.id for result in dense], [doc_id for doc_id, _ in lexical]], settings.RRF_K
+        )
+        
+        # Every lexical match is checked against the filters before the
+        # best are kept, so filtered out ones don't take the place of others
+        by_id = {result.id: result for result in dense}
+        missing = [doc_id for doc_id, _ in fused if doc_id not in by_id]
+        if missing:
+            try:
+                by_id.update(
+                    (result.id, result) for result in
+                    await run_blocking(vector_store.retrieve_matches, missing, filters, with_vectors)
+                )
+            except Exception as e:
+                logger.warning(f"Could not fetch lexical matches: {e}")
+        
+        results = [
+            by_id[doc_id].model_copy(update={"score": score})
+            for doc_id, score in fused if doc_id in by_id
+        ]
     
-    # Search for similar articles
-    return vector_store.search(query_vector, top_k=top_k)
\ No newline at end of file
+    if half_life:
+        results = apply_recency_decay(results, half_life)
+    results = results[:top_k]
+    if settings.CHUNK_STORE_ENABLED:
+        results = await run_blocking(chunk_store.hydrate, results)
+    return results
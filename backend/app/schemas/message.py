@@ -31,6 +31,7 @@ class Message(MessageBase):
 class MessageResponse(BaseModel):
     """Response model for messages."""
     messages: List[Message]
+    next_cursor: Optional[int] = None
 
 
 class WebSocketMessage(BaseModel):
@@ -43,4 +44,6 @@ class SearchResult(BaseModel):
     id: str
     text: str
     score: float
-    meta: Optional[Dict] = None
\ No newline at end of file
+    meta: Optional[Dict] = None
+    # Only filled on request, and never serialized
+    embedding: Optional[List[float]] = Field(default=None, exclude=True)
\ No newline at end of file
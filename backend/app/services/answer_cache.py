@@ -0,0 +1,83 @@
+import hashlib
+import json
+import logging
+from typing import List, Optional
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.rag.embedding_cache import normalize_query
+from app.services.redis_service import redis_service
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+EPOCH_KEY = "index:epoch"
+
+
+class AnswerCache:
+    """Redis cache of generated answers.
+
+    Answers are keyed on the normalized query and the sorted IDs of the
+    retrieved chunks. Each entry records the index epoch its context was
+    retrieved in; bumping the epoch after ingestion invalidates every entry
+    at once. Callers read the epoch before retrieving, so an answer whose
+    generation overlaps an ingestion run is stored under the old epoch.
+    """
+
+    def __init__(self):
+        self.redis = redis_service.redis
+
+    def _get_key(self, query: str, chunk_ids: List[str]) -> str:
+        material = json.dumps([normalize_query(query), sorted(chunk_ids)])
+        return f"answer:{hashlib.sha256(material.encode('utf-8')).hexdigest()}"
+
+    async def epoch(self) -> Optional[int]:
+        """Get the current index epoch, or None if Redis is unavailable."""
+        try:
+            return int(await self.redis.get(EPOCH_KEY) or 0)
+        except redis.RedisError as e:
+            logger.warning(f"Answer cache epoch lookup failed: {e}")
+            return None
+
+    async def get(self, query: str, chunk_ids: List[str], epoch: int) -> Optional[str]:
+        """Get a cached answer generated in ``epoch``."""
+        try:
+            data = await self.redis.get(self._get_key(query, chunk_ids))
+        except redis.RedisError as e:
+            logger.warning(f"Answer cache lookup failed: {e}")
+            return None
+
+        if not data:
+            return None
+        entry = json.loads(data)
+        if entry["epoch"] != epoch:
+            return None
+        return entry["content"]
+
+    async def set(self, query: str, chunk_ids: List[str], content: str, epoch: int) -> None:
+        """Cache an answer generated from the context retrieved in ``epoch``."""
+        try:
+            await self.redis.setex(
+                self._get_key(query, chunk_ids),
+                settings.ANSWER_CACHE_TTL,
+                json.dumps({"epoch": epoch, "content": content})
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Answer cache store failed: {e}")
+
+    async def bump_epoch(self) -> Optional[int]:
+        """Start a new index epoch, invalidating all cached answers.
+
+        Returns:
+            The new epoch, or None if Redis is unavailable.
+        """
+        try:
+            return await self.redis.incr(EPOCH_KEY)
+        except redis.RedisError as e:
+            logger.error(f"Could not bump the index epoch, cached answers may be stale: {e}")
+            return None
+
+
+# Create a singleton instance
+answer_cache = AnswerCache()
@@ -1,66 +1,189 @@
+import re
 import uuid
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
 
 from app.core.config import settings
-from app.rag.llm import get_llm_response
-from app.rag.vector_store import search_similar_articles
-from app.schemas.message import Message, MessageCreate
+from app.rag.context import context_chunk_ids, select_context
+from app.rag.embedding_cache import normalize_query
+from app.rag.llm import GENERATION_ERROR_MESSAGE, get_llm_response, llm_service
+from app.rag.vector_store import SearchFilter, search_similar_articles
+from app.schemas.message import Message, MessageCreate, SearchResult
+from app.services.answer_cache import answer_cache
 from app.services.redis_service import redis_service
+from app.services.single_flight import single_flight
+
+# Questions about current events only search recently published articles
+RECENT_QUERY_PATTERN = re.compile(
+    r"\b(latest|today|tonight|yesterday|this week|breaking|right now|currently)\b", re.IGNORECASE
+)
 
 class ChatService:
     def __init__(self):
         self.redis_service = redis_service
+        self.single_flight = single_flight
     
-    def create_session(self) -> str:
+    async def create_session(self) -> str:
         """Create a new chat session."""
         session_id = str(uuid.uuid4())
-        self.redis_service.create_session(session_id)
+        await self.redis_service.create_session(session_id)
         return session_id
     
-    def get_session_messages(self, session_id: str) -> List[Message]:
-        """Get all messages for a session."""
-        return self.redis_service.get_session_messages(session_id)
+    async def get_session_messages(self, session_id: str, cursor: int = 0,
+                                   limit: Optional[int] = None) -> Tuple[List[Message], Optional[int]]:
+        """Get a page of messages for a session and the next page cursor."""
+        return await self.redis_service.get_session_messages(session_id, cursor, limit)
     
-    def clear_session(self, session_id: str) -> None:
+    async def clear_session(self, session_id: str) -> None:
         """Clear all messages for a session."""
-        self.redis_service.clear_session(session_id)
+        await self.redis_service.clear_session(session_id)
     
-    async def process_message(self, session_id: str, message: MessageCreate) -> Message:
-        """Process a new message and generate a response."""
-        # Create user message
+    async def _store_user_message(self, session_id: str, message: MessageCreate) -> None:
+        """Store the user's message in the session."""
         user_message = Message(
             id=str(uuid.uuid4()),
             content=message.content,
             role="user",
             timestamp=datetime.utcnow()
         )
+        await self.redis_service.add_message(session_id, user_message)
+    
+    async def _retrieve(self, query: str) -> Tuple[List[SearchResult], Optional[str], Optional[int]]:
+        """Search for relevant articles and look up a cached answer.
         
-        # Store user message
-        self.redis_service.add_message(session_id, user_message)
+        Returns:
+            Tuple of the relevant articles, the cached answer, if any, and
+            the index epoch read before searching, None if answers are not
+            cached.
+        """
+        # Read before searching, an ingestion finishing meanwhile makes the answer stale
+        epoch = await answer_cache.epoch() if settings.ANSWER_CACHE_ENABLED else None
         
-        # Search for relevant articles
-        relevant_articles = search_similar_articles(message.content, top_k=3)
+        # Over-fetch with embeddings, then keep a few diverse chunks
+        candidates = []
+        if RECENT_QUERY_PATTERN.search(query):
+            since = datetime.now(timezone.utc) - timedelta(hours=settings.RECENT_QUERY_WINDOW_HOURS)
+            candidates = await search_similar_articles(
+                query, top_k=settings.CONTEXT_CANDIDATES, filters=SearchFilter(since=since), with_vectors=True
+            )
+        if not candidates:
+            # Nothing recent enough, fall back to the whole index
+            candidates = await search_similar_articles(
+                query, top_k=settings.CONTEXT_CANDIDATES, with_vectors=True
+            )
+        relevant_articles = select_context(candidates, settings.CONTEXT_CHUNKS)
         
-        # Prepare context from relevant articles
-        context = "\n\n".join([article.text for article in relevant_articles])
+        # Reuse the answer if the same question retrieved the same context
+        cached_content = None
+        if epoch is not None:
+            cached_content = await answer_cache.get(query, context_chunk_ids(relevant_articles), epoch)
+        return relevant_articles, cached_content, epoch
+    
+    async def _cache_answer(self, query: str, relevant_articles: List[SearchResult],
+                            content: str, epoch: Optional[int]) -> None:
+        """Cache a generated answer under the epoch of its context, unless generation failed."""
+        if epoch is not None and GENERATION_ERROR_MESSAGE not in content:
+            await answer_cache.set(query, context_chunk_ids(relevant_articles), content, epoch)
+    
+    async def _answer(self, query: str) -> Dict:
+        """Retrieve context and generate or look up the answer to a query.
         
-        # Generate response using LLM
-        response_content = await get_llm_response(message.content, context)
+        Returns:
+            JSON-serializable dict with the relevant articles, the answer
+            content and whether it came from the answer cache.
+        """
+        relevant_articles, content, epoch = await self._retrieve(query)
+        cached = content is not None
         
-        # Create assistant message
+        if not cached:
+            # Prepare context from relevant articles
+            context = "\n\n".join([article.text for article in relevant_articles])
+            
+            # Generate response using LLM
+            content = await get_llm_response(query, context)
+            await self._cache_answer(query, relevant_articles, content, epoch)
+        
+        return {
+            "articles": [article.model_dump() for article in relevant_articles],
+            "content": content,
+            "cached": cached,
+        }
+    
+    async def _store_assistant_message(self, session_id: str, content: str,
+                                       relevant_articles: List[SearchResult],
+                                       cached: bool) -> Message:
+        """Store the assistant's answer in the session."""
         assistant_message = Message(
             id=str(uuid.uuid4()),
-            content=response_content,
+            content=content,
             role="assistant",
             timestamp=datetime.utcnow(),
-            meta={"relevant_articles": [article.id for article in relevant_articles]}
+            meta={"relevant_articles": context_chunk_ids(relevant_articles), "cached": cached}
         )
+        await self.redis_service.add_message(session_id, assistant_message)
+        return assistant_message
+    
+    async def process_message(self, session_id: str, message: MessageCreate) -> Message:
+        """Process a new message and generate a response."""
+        await self._store_user_message(session_id, message)
         
-        # Store assistant message
-        self.redis_service.add_message(session_id, assistant_message)
+        # Identical questions in flight at the same time share one answer
+        answer = await self.single_flight.do(
+            normalize_query(message.content),
+            lambda: self._answer(message.content)
+        )
         
-        return assistant_message
+        return await self._store_assistant_message(
+            session_id,
+            answer["content"],
+            [SearchResult(**article) for article in answer["articles"]],
+            answer["cached"]
+        )
+    
+    async def stream_message(self, session_id: str,
+                             message: MessageCreate) -> AsyncGenerator[Dict, None]:
+        """Process a new message and stream the response as it is generated.
+        
+        Yields:
+            ``{"type": "token", "content": ...}`` events for each piece of the
+            answer, then one ``{"type": "done", ...}`` event with the stored
+            message's ID and its sources.
+        """
+        await self._store_user_message(session_id, message)
+        
+        relevant_articles, cached_content, epoch = await self._retrieve(message.content)
+        cached = cached_content is not None
+        
+        parts = []
+        if cached:
+            parts.append(cached_content)
+            yield {"type": "token", "content": cached_content}
+        else:
+            context = "\n\n".join([article.text for article in relevant_articles])
+            async for token in llm_service.stream_response(message.content, [context]):
+                parts.append(token)
+                yield {"type": "token", "content": token}
+        
+        # Persist the complete answer once the stream has ended
+        content = "".join(parts)
+        if not cached:
+            await self._cache_answer(message.content, relevant_articles, content, epoch)
+        assistant_message = await self._store_assistant_message(
+            session_id, content, relevant_articles, cached
+        )
+        yield {
+            "type": "done",
+            "message_id": assistant_message.id,
+            "cached": cached,
+            "sources": [
+                {
+                    "id": article.id,
+                    "title": (article.meta or {}).get("article_title"),
+                    "url": (article.meta or {}).get("article_url"),
+                }
+                for article in relevant_articles
+            ],
+        }
 
 # Create a singleton instance
 chat_service = ChatService() 
\ No newline at end of file
@@ -0,0 +1,231 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Optional
+
+import redis.asyncio as redis
+from redis.exceptions import LockError
+
+from app.core.config import settings
+from app.rag.ingestion import IngestionRun, news_service
+from app.services.redis_service import redis_service
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+LEASE_KEY = "ingestion:lease"
+QUEUE_KEY = "ingestion:queue"
+SCHEDULE_KEY = "ingestion:scheduled"
+JOB_TTL = 86400  # Job status is kept for a day
+
+
+class IngestionJob:
+    """One queued or executed ingestion run."""
+
+    def __init__(self, trigger: str, job_id: Optional[str] = None,
+                 created_at: Optional[datetime] = None):
+        self.id = job_id or str(uuid.uuid4())
+        self.trigger = trigger  # "api" or "schedule"
+        self.status = "queued"  # queued, running, completed, failed or skipped
+        self.created_at = created_at or datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.run = IngestionRun()
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "trigger": self.trigger,
+            "status": self.status,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+            "progress": self.run.to_dict(),
+        }
+
+
+class IngestionScheduler:
+    """Runs ingestion jobs in the background, one at a time.
+
+    Jobs are queued in a Redis list by the API or every
+    ``NEWS_UPDATE_INTERVAL`` seconds, and executed by the worker task of
+    any process running the scheduler, either the API or ``app.worker``.
+    Before a run, the worker takes a Redis lease so only one replica
+    ingests at a time; a job that finds the lease taken is marked skipped,
+    and a run that loses the lease is cancelled and marked failed.
+    Job status is stored in Redis so any replica can report it.
+    """
+
+    def __init__(self, interval: int = settings.NEWS_UPDATE_INTERVAL,
+                 lease_ttl: int = settings.INGEST_LEASE_TTL):
+        """Initialize the scheduler.
+
+        Args:
+            interval: Seconds between scheduled runs.
+            lease_ttl: Lifetime of the Redis lease, renewed while a run is active.
+        """
+        self.interval = interval
+        self.lease_ttl = lease_ttl
+        self.redis = redis_service.redis
+        # Jobs run by this process, reported live
+        self.jobs: Dict[str, IngestionJob] = {}
+        self._tasks = []
+
+    def start(self, run_now: bool = False) -> None:
+        """Start the worker and the periodic timer on the running loop.
+
+        Args:
+            run_now: Queue a run immediately instead of after the first interval.
+        """
+        self._tasks = [asyncio.create_task(self._work()), asyncio.create_task(self._tick(run_now))]
+        logger.info(f"Ingestion scheduler started, running every {self.interval}s")
+
+    async def stop(self) -> None:
+        """Cancel the worker and the timer, interrupting a run in progress."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(self, trigger: str = "api") -> IngestionJob:
+        """Queue an ingestion run and return its job."""
+        job = IngestionJob(trigger)
+        await self._save(job)
+        await self.redis.rpush(QUEUE_KEY, job.id)
+        return job
+
+    async def get_status(self, job_id: str) -> Optional[Dict]:
+        """Get the status of a job run by any replica."""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        try:
+            data = await self.redis.get(f"ingestion:job:{job_id}")
+        except redis.RedisError as e:
+            logger.warning(f"Ingestion job lookup failed: {e}")
+            return None
+        return json.loads(data) if data else None
+
+    async def _save(self, job: IngestionJob) -> None:
+        try:
+            await self.redis.setex(f"ingestion:job:{job.id}", JOB_TTL, json.dumps(job.to_dict()))
+        except redis.RedisError as e:
+            logger.warning(f"Ingestion job status update failed: {e}")
+
+    async def _tick(self, run_now: bool) -> None:
+        if not run_now:
+            await asyncio.sleep(self.interval)
+        while True:
+            try:
+                # Only one replica queues the scheduled run of each interval
+                if await self.redis.set(SCHEDULE_KEY, 1, nx=True, ex=self.interval):
+                    await self.enqueue("schedule")
+            except redis.RedisError as e:
+                logger.error(f"Could not queue scheduled ingestion: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                item = await self.redis.blpop(QUEUE_KEY, timeout=5)
+                if item is None:
+                    continue
+                data = await self.redis.get(f"ingestion:job:{item[1]}")
+            except redis.RedisError as e:
+                logger.error(f"Could not read the ingestion queue: {e}")
+                await asyncio.sleep(5)
+                continue
+            if data is None:
+                # The job expired while queued
+                continue
+            job_data = json.loads(data)
+            job = IngestionJob(
+                job_data["trigger"], job_data["job_id"],
+                datetime.fromisoformat(job_data["created_at"])
+            )
+            self.jobs[job.id] = job
+            try:
+                await self._execute(job)
+            finally:
+                del self.jobs[job.id]
+
+    async def _execute(self, job: IngestionJob) -> None:
+        lease = self.redis.lock(LEASE_KEY, timeout=self.lease_ttl)
+        try:
+            acquired = await lease.acquire(blocking=False)
+        except redis.RedisError as e:
+            logger.error(f"Could not take the ingestion lease: {e}")
+            acquired = False
+        if not acquired:
+            job.status = "skipped"
+            job.error = "Another ingestion run holds the lease"
+            job.finished_at = datetime.utcnow()
+            await self._save(job)
+            return
+
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        await self._save(job)
+        ingest = asyncio.create_task(self._ingest(job))
+        reporter = asyncio.create_task(self._report(job, lease))
+        try:
+            await asyncio.wait({ingest, reporter}, return_when=asyncio.FIRST_COMPLETED)
+            if not ingest.done():
+                # Another replica may take the lease, stop before both write
+                ingest.cancel()
+                await asyncio.gather(ingest, return_exceptions=True)
+                raise RuntimeError("Lost the ingestion lease")
+            ingest.result()
+            job.status = "completed"
+        except Exception as e:
+            logger.error(f"Ingestion job {job.id} failed: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            ingest.cancel()
+            reporter.cancel()
+            job.finished_at = datetime.utcnow()
+            await self._save(job)
+            try:
+                await lease.release()
+            except redis.RedisError:
+                # The lease expired during the run
+                pass
+
+    async def _ingest(self, job: IngestionJob) -> None:
+        await news_service.ingest_news(job.run)
+        # Expire old partitions while this replica holds the lease
+        dropped = await news_service.prune()
+        if dropped:
+            logger.info(f"Dropped expired partitions {', '.join(dropped)}")
+
+    async def _report(self, job: IngestionJob, lease) -> None:
+        """Publish progress and renew the lease while a run is active.
+
+        Returns once the lease is lost: taken over, or not renewed for a
+        whole ``lease_ttl``.
+        """
+        renewed_at = time.monotonic()
+        while True:
+            await asyncio.sleep(min(settings.INGEST_STATUS_INTERVAL, self.lease_ttl / 3))
+            await self._save(job)
+            try:
+                await lease.reacquire()
+                renewed_at = time.monotonic()
+            except LockError as e:
+                logger.error(f"Lost the ingestion lease: {e}")
+                return
+            except redis.RedisError as e:
+                if time.monotonic() - renewed_at >= self.lease_ttl:
+                    logger.error(f"Could not renew the ingestion lease before it expired: {e}")
+                    return
+                logger.warning(f"Could not renew the ingestion lease: {e}")
+
+
+# Create a singleton instance
+ingestion_scheduler = IngestionScheduler()
@@ -1,6 +1,6 @@
-import json
-from typing import List, Optional
-import redis
+from typing import List, Optional, Tuple
+import redis.asyncio as redis
+from redis.exceptions import WatchError
 from datetime import datetime
 
 from app.core.config import settings
@@ -11,6 +11,7 @@ class RedisService:
         self.redis = redis.Redis(
             host=settings.REDIS_HOST,
             port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
             username=settings.REDIS_USERNAME,
             password=settings.REDIS_PASSWORD,
             decode_responses=True
@@ -19,51 +20,90 @@ class RedisService:
     def _get_session_key(self, session_id: str) -> str:
         return f"session:{session_id}"
     
-    def create_session(self, session_id: str) -> None:
+    def _get_messages_key(self, session_id: str) -> str:
+        return f"session:{session_id}:messages"
+    
+    def _get_count_key(self, session_id: str) -> str:
+        return f"session:{session_id}:count"
+    
+    async def create_session(self, session_id: str) -> None:
         """Create a new session with TTL."""
-        self.redis.setex(
+        await self.redis.setex(
             self._get_session_key(session_id),
             settings.SESSION_TTL,
-            json.dumps([])
+            datetime.utcnow().isoformat()
         )
     
-    def get_session_messages(self, session_id: str) -> List[Message]:
-        """Get all messages for a session."""
-        key = self._get_session_key(session_id)
-        data = self.redis.get(key)
-        if not data:
-            return []
+    async def get_session_messages(self, session_id: str, cursor: int = 0,
+                                   limit: Optional[int] = None) -> Tuple[List[Message], Optional[int]]:
+        """Get a page of messages for a session, oldest first.
         
-        messages = json.loads(data)
-        return [Message(**msg) for msg in messages]
-    
-    def add_message(self, session_id: str, message: Message) -> None:
-        """Add a message to the session and update TTL."""
-        key = self._get_session_key(session_id)
-        data = self.redis.get(key)
-        messages = json.loads(data) if data else []
+        Cursors are sequence numbers, counting every message ever added to
+        the session, so they stay valid as old messages are trimmed: a page
+        continues right after the last message returned, or at the oldest
+        message kept if those that followed it were trimmed meanwhile.
         
-        # Convert message to dict and ensure datetime is serializable
-        message_dict = message.model_dump()
-        message_dict["timestamp"] = message_dict["timestamp"].isoformat()
+        Args:
+            session_id: Session ID.
+            cursor: Sequence number of the first message to return.
+            limit: Maximum number of messages to return, all by default.
+            
+        Returns:
+            Tuple of the messages and the cursor of the next page, or None
+            if there are no more messages.
+        """
+        messages_key = self._get_messages_key(session_id)
+        count_key = self._get_count_key(session_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    # Retry if a message is added between reading the offset and the range
+                    await pipe.watch(messages_key, count_key)
+                    count = int(await pipe.get(count_key) or 0)
+                    # Sessions created before the counter existed start at zero
+                    first = max(count - await pipe.llen(messages_key), 0)
+                    start = max(cursor - first, 0)
+                    end = start + limit if limit else -1
+                    pipe.multi()
+                    pipe.lrange(messages_key, start, end)
+                    data, = await pipe.execute()
+                    break
+                except WatchError:
+                    continue
+        if not data:
+            return [], None
         
-        messages.append(message_dict)
+        next_cursor = None
+        if limit and len(data) > limit:
+            # One extra message was read to find out whether a next page exists
+            data = data[:limit]
+            next_cursor = first + start + limit
+        return [Message.model_validate_json(msg) for msg in data], next_cursor
+    
+    async def add_message(self, session_id: str, message: Message) -> None:
+        """Append a message to the session, trim old messages and refresh the TTL."""
+        session_key = self._get_session_key(session_id)
+        messages_key = self._get_messages_key(session_id)
+        count_key = self._get_count_key(session_id)
         
-        # Store updated messages with TTL
-        self.redis.setex(
-            key,
-            settings.SESSION_TTL,
-            json.dumps(messages)
-        )
+        # Push, count, trim and refresh the TTL atomically in one round trip
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(messages_key, message.model_dump_json())
+            pipe.incr(count_key)
+            pipe.ltrim(messages_key, -settings.MAX_SESSION_MESSAGES, -1)
+            pipe.expire(messages_key, settings.SESSION_TTL)
+            pipe.expire(count_key, settings.SESSION_TTL)
+            pipe.expire(session_key, settings.SESSION_TTL)
+            await pipe.execute()
     
-    def clear_session(self, session_id: str) -> None:
+    async def clear_session(self, session_id: str) -> None:
         """Clear all messages for a session."""
-        key = self._get_session_key(session_id)
-        self.redis.delete(key)
+        # The message count is kept, so cursors never go back
+        await self.redis.delete(self._get_messages_key(session_id))
     
-    def session_exists(self, session_id: str) -> bool:
+    async def session_exists(self, session_id: str) -> bool:
         """Check if a session exists."""
-        return bool(self.redis.exists(self._get_session_key(session_id)))
+        return bool(await self.redis.exists(self._get_session_key(session_id)))
 
 # Create a singleton instance
 redis_service = RedisService() 
\ No newline at end of file
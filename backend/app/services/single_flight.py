@@ -0,0 +1,136 @@
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.services.redis_service import redis_service
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Followers that subscribe after the result was published read it from here
+RESULT_TTL = 5
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with the same key.
+
+    Within a worker, the first caller starts the call as a task and later
+    callers await the same task. With a Redis client, workers also
+    coordinate through a lock: the worker holding ``flight:{key}`` runs the
+    call and publishes its JSON result on the ``flight:{key}`` channel,
+    while the others wait for it. A follower that does not get a result
+    within ``timeout`` runs the call itself. Results must be JSON
+    serializable when Redis is used.
+    """
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None,
+                 timeout: float = settings.SINGLE_FLIGHT_TIMEOUT):
+        """Initialize single-flight coordination.
+
+        Args:
+            redis_client: Client used to coordinate workers, or None to
+                coalesce calls within this worker only.
+            timeout: Lock lifetime and maximum time a follower waits, in seconds.
+        """
+        self.redis = redis_client
+        self.timeout = timeout
+        self._calls: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.shared = 0
+        self.remote_shared = 0
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``func`` unless a call with the same key is already in flight.
+
+        Args:
+            key: Key identifying equivalent calls.
+            func: Coroutine function producing the result.
+
+        Returns:
+            The result of the shared call.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(self._run(key, func))
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.shared += 1
+        # A cancelled caller must not cancel the call for everyone else
+        return await asyncio.shield(task)
+
+    async def _run(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        if self.redis is None:
+            return await func()
+
+        lock = self.redis.lock(f"flight:{key}:lock", timeout=self.timeout)
+        try:
+            acquired = await lock.acquire(blocking=False)
+        except redis.RedisError as e:
+            logger.warning(f"Single-flight lock failed: {e}")
+            return await func()
+
+        if not acquired:
+            result = await self._wait(key)
+            if result is not None:
+                self.remote_shared += 1
+                return result["value"]
+            return await func()
+
+        try:
+            value = await func()
+            data = json.dumps({"value": value})
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    pipe.setex(f"flight:{key}:result", RESULT_TTL, data)
+                    pipe.publish(f"flight:{key}", data)
+                    await pipe.execute()
+            except redis.RedisError as e:
+                logger.warning(f"Single-flight publish failed: {e}")
+            return value
+        finally:
+            try:
+                await lock.release()
+            except redis.RedisError:
+                # The lock expired while the call was running
+                pass
+
+    async def _wait(self, key: str) -> Optional[Dict]:
+        """Wait for the result published by the worker holding the lock."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        pubsub = self.redis.pubsub()
+        try:
+            await pubsub.subscribe(f"flight:{key}")
+            # Subscribe first, then check for a result published just before
+            data = await self.redis.get(f"flight:{key}:result")
+            while data is None and loop.time() < deadline:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=deadline - loop.time()
+                )
+                if message is not None:
+                    data = message["data"]
+        except redis.RedisError as e:
+            logger.warning(f"Single-flight wait failed: {e}")
+            return None
+        finally:
+            await pubsub.aclose()
+        return json.loads(data) if data is not None else None
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get the number of calls made and shared."""
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "remote_shared": self.remote_shared,
+        }
+
+
+# Create a singleton instance
+single_flight = SingleFlight(redis_service.redis if settings.SINGLE_FLIGHT_REDIS else None)
@@ -0,0 +1,35 @@
+"""Standalone ingestion worker.
+
+Runs the ingestion scheduler without the API, starting with an immediate
+run and then every ``NEWS_UPDATE_INTERVAL`` seconds. It also executes jobs
+queued through ``POST /api/v1/news/ingest``. Set
+``INGEST_SCHEDULER_ENABLED=false`` on the API replicas when using it.
+The worker shares the vector store with the API, so it needs the Qdrant
+backend: a local store can only be opened by one process.
+
+Usage:
+    python -m app.worker
+"""
+import asyncio
+import logging
+
+from app.core.executor import shutdown_process_executor
+from app.db.database import engine
+from app.db.models import Base
+from app.services.ingestion_scheduler import ingestion_scheduler
+
+
+async def main():
+    ingestion_scheduler.start(run_now=True)
+    try:
+        # The scheduler runs until the process is stopped
+        await asyncio.Event().wait()
+    finally:
+        await ingestion_scheduler.stop()
+        shutdown_process_executor()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    Base.metadata.create_all(bind=engine)
+    asyncio.run(main())
@@ -0,0 +1,77 @@
+"""Compare IVF search in the local vector store against exact search.
+
+Builds a store from synthetic clustered embeddings, then reports recall@k
+and p50/p99 latency of exact search and of IVF search at several nprobe
+values.
+
+Usage:
+    python -m benchmarks.bench_ann --vectors 200000 --dim 768
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from app.rag.local_store import LocalVectorStore
+
+
+def make_vectors(count: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Generate embeddings grouped around random topic directions."""
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=count)
+    return centers[labels] + 0.6 * rng.normal(size=(count, dim)).astype(np.float32)
+
+
+def run_queries(store: LocalVectorStore, queries: np.ndarray, top_k: int):
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = store.search(query, top_k=top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append({hit.id for hit in hits})
+    return results, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = make_vectors(args.vectors, args.dim, args.clusters, rng)
+    queries = make_vectors(args.queries, args.dim, args.clusters, rng)
+
+    with tempfile.TemporaryDirectory() as path:
+        store = LocalVectorStore(path, ann_min_vectors=args.vectors)
+        start = time.perf_counter()
+        batch_size = 10000
+        for i in range(0, args.vectors, batch_size):
+            batch = vectors[i:i + batch_size]
+            store.store([""] * len(batch), list(batch), ids=[str(j) for j in range(i, i + len(batch))])
+        print(f"Built store with {args.vectors} vectors in {time.perf_counter() - start:.1f}s "
+              f"({len(store.index.centroids)} IVF lists)")
+
+        # Exact search is the ground truth
+        store.ann_min_vectors = args.vectors + 1
+        truth, latencies = run_queries(store, queries, args.top_k)
+        print(f"{'mode':<12}{'recall@' + str(args.top_k):>12}{'p50 ms':>10}{'p99 ms':>10}")
+        print(f"{'exact':<12}{1.0:>12.3f}{np.percentile(latencies, 50):>10.2f}"
+              f"{np.percentile(latencies, 99):>10.2f}")
+
+        store.ann_min_vectors = args.vectors
+        for nprobe in args.nprobe:
+            store.index.nprobe = nprobe
+            results, latencies = run_queries(store, queries, args.top_k)
+            recall = np.mean([len(r & t) / len(t) for r, t in zip(results, truth)])
+            print(f"{'ivf/' + str(nprobe):<12}{recall:>12.3f}{np.percentile(latencies, 50):>10.2f}"
+                  f"{np.percentile(latencies, 99):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
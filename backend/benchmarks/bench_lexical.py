@@ -0,0 +1,64 @@
+"""Measure the query latency of the BM25 index used by hybrid search.
+
+Builds an index from synthetic chunks whose words follow a Zipf
+distribution, like real text, then reports p50/p99 latency of queries of
+a few words mixing frequent and rare terms, the way entity-heavy news
+questions do.
+
+Usage:
+    python -m benchmarks.bench_lexical --chunks 100000 --words 200
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.rag.lexical import BM25Index
+
+
+def make_texts(count: int, words: int, vocabulary: int, rng: np.random.Generator):
+    """Generate chunks of Zipf-distributed words."""
+    for _ in range(count):
+        ranks = np.minimum(rng.zipf(1.1, size=words), vocabulary)
+        yield " ".join(f"w{rank}" for rank in ranks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--words", type=int, default=200)
+    parser.add_argument("--vocabulary", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--query-words", type=int, default=5)
+    parser.add_argument("--top-k", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    index = BM25Index()
+    start = time.perf_counter()
+    batch_size = 1000
+    texts = make_texts(args.chunks, args.words, args.vocabulary, rng)
+    for i in range(0, args.chunks, batch_size):
+        batch = [next(texts) for _ in range(min(batch_size, args.chunks - i))]
+        index.add([str(j) for j in range(i, i + len(batch))], batch)
+    postings = sum(len(docs) for docs, _ in index._postings.values())
+    print(f"Indexed {args.chunks} chunks in {time.perf_counter() - start:.1f}s "
+          f"({len(index._postings)} terms, {postings} postings)")
+
+    # Queries mix frequent words with rare ones such as names and tickers
+    queries = [
+        " ".join(f"w{rank}" for rank in np.minimum(rng.zipf(1.1, size=args.query_words), args.vocabulary))
+        for _ in range(args.queries)
+    ]
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, top_k=args.top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies = np.array(latencies)
+    print(f"p50 {np.percentile(latencies, 50):.2f} ms, p99 {np.percentile(latencies, 99):.2f} ms, "
+          f"max {latencies.max():.2f} ms over {args.queries} queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Measure HTML parse throughput of the article extractors.
+
+Parses saved HTML pages with the previous approach (the whole document
+with html.parser) and with the extractors (lxml with partial parsing),
+then runs the extractors in the process pool, and reports pages per
+second for each. Fixtures named source_*.html are parsed for article
+links, the others as articles.
+
+Usage:
+    python -m benchmarks.bench_parse --fixtures tests/fixtures/html --repeat 200
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bs4 import BeautifulSoup
+
+from app.parsing import SiteExtractor, extract_article, extract_links
+
+SOURCE_URL = "https://example.com/news/"
+
+
+EXTRACTOR = SiteExtractor(SOURCE_URL, link_pattern="/news/")
+
+
+def parse_full(page) -> None:
+    """Parse a page the way ingestion did before the extractors."""
+    is_source, html = page
+    soup = BeautifulSoup(html, "html.parser")
+    if is_source:
+        [a["href"] for a in soup.find_all("a", href=True) if "/news/" in a["href"]]
+    else:
+        soup.find("h1")
+        body = soup.find("article") or soup.find("main")
+        [p.get_text() for p in body.find_all("p")]
+
+
+def parse_partial(page) -> None:
+    is_source, html = page
+    if is_source:
+        extract_links(html, SOURCE_URL, EXTRACTOR)
+    else:
+        extract_article(html, EXTRACTOR)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", default=os.path.join("tests", "fixtures", "html"))
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    pages = []
+    for name in sorted(os.listdir(args.fixtures)):
+        if name.endswith(".html"):
+            with open(os.path.join(args.fixtures, name)) as f:
+                pages.append((name.startswith("source_"), f.read()))
+    pages = pages * args.repeat
+    size = sum(len(html) for _, html in pages)
+    print(f"{len(pages)} pages, {size / 2**20:.1f} MB")
+
+    print(f"{'mode':<28}{'pages/s':>10}{'MB/s':>8}")
+    for name, run in [
+        ("html.parser, full document", lambda: [parse_full(page) for page in pages]),
+        ("lxml, partial", lambda: [parse_partial(page) for page in pages]),
+    ]:
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        print(f"{name:<28}{len(pages) / elapsed:>10.0f}{size / 2**20 / elapsed:>8.1f}")
+
+    with ProcessPoolExecutor(max_workers=args.processes) as pool:
+        # Warm up the workers before timing
+        list(pool.map(parse_partial, pages[:args.processes]))
+        start = time.perf_counter()
+        list(pool.map(parse_partial, pages, chunksize=8))
+        elapsed = time.perf_counter() - start
+    name = f"lxml, partial, {args.processes} processes"
+    print(f"{name:<28}{len(pages) / elapsed:>10.0f}{size / 2**20 / elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Measure memory footprint and recall of quantized local vector storage.
+
+Builds a float32 store from synthetic clustered embeddings, then the same
+store with float16 and int8 codes, and reports the size of the matrix a
+search scans, recall@k against the float32 results and p50/p99 latency.
+
+Usage:
+    python -m benchmarks.bench_quantization --vectors 100000 --dim 768
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from app.rag.local_store import LocalVectorStore
+from benchmarks.bench_ann import make_vectors, run_queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--oversampling", type=float, default=4.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = make_vectors(args.vectors, args.dim, args.clusters, rng)
+    queries = make_vectors(args.queries, args.dim, args.clusters, rng)
+    ids = [str(i) for i in range(args.vectors)]
+
+    print(f"{'mode':<10}{'scanned MB':>12}{'recall@' + str(args.top_k):>12}{'p50 ms':>10}{'p99 ms':>10}")
+    truth = None
+    for mode in ["none", "float16", "int8"]:
+        with tempfile.TemporaryDirectory() as path:
+            # Exact search throughout, to isolate the effect of quantization
+            store = LocalVectorStore(
+                path,
+                ann_min_vectors=args.vectors + 1,
+                quantization=mode,
+                oversampling=args.oversampling
+            )
+            for i in range(0, args.vectors, 10000):
+                store.store([""] * len(vectors[i:i + 10000]), list(vectors[i:i + 10000]), ids=ids[i:i + 10000])
+
+            if mode == "none":
+                scanned = store._vectors[:store.count].nbytes
+            else:
+                scanned = store._codes[:store.count].nbytes + store._scales[:store.count].nbytes
+            results, latencies = run_queries(store, queries, args.top_k)
+            if truth is None:
+                truth = results
+            recall = np.mean([len(r & t) / len(t) for r, t in zip(results, truth)])
+            print(f"{mode:<10}{scanned / 2**20:>12.1f}{recall:>12.3f}"
+                  f"{np.percentile(latencies, 50):>10.2f}{np.percentile(latencies, 99):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from app.services.answer_cache import AnswerCache
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def make_cache(server):
+    cache = AnswerCache()
+    cache.redis = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    return cache
+
+
+def test_bumping_the_epoch_invalidates_answers():
+    async def run():
+        cache = make_cache(fakeredis.FakeServer())
+        epoch = await cache.epoch()
+        await cache.set("What's new?", ["b", "a"], "Answer", epoch)
+        assert await cache.get("what's new", ["a", "b"], epoch) == "Answer"
+
+        assert await cache.bump_epoch() == epoch + 1
+        assert await cache.get("What's new?", ["a", "b"], await cache.epoch()) is None
+
+    asyncio.run(run())
+
+
+def test_answer_generated_during_ingestion_keeps_the_old_epoch():
+    async def run():
+        cache = make_cache(fakeredis.FakeServer())
+        # The context is retrieved, then an ingestion run ends before the answer is stored
+        epoch = await cache.epoch()
+        await cache.bump_epoch()
+        await cache.set("What's new?", ["a"], "Stale answer", epoch)
+        assert await cache.get("What's new?", ["a"], await cache.epoch()) is None
+
+    asyncio.run(run())
+
+
+def test_unavailable_redis_disables_the_cache():
+    async def run():
+        server = fakeredis.FakeServer()
+        cache = make_cache(server)
+        server.connected = False
+        assert await cache.epoch() is None
+        assert await cache.get("What's new?", ["a"], 0) is None
+        await cache.set("What's new?", ["a"], "Answer", 0)
+        # Ingestion carries on without invalidating
+        assert await cache.bump_epoch() is None
+
+    asyncio.run(run())
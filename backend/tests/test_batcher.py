@@ -0,0 +1,34 @@
+import asyncio
+
+from app.rag.batcher import MicroBatcher
+
+
+def test_full_batch_is_flushed_before_window():
+    batches = []
+
+    async def handler(items):
+        batches.append(items)
+        return [item * 2 for item in items]
+
+    async def run():
+        batcher = MicroBatcher(handler, window=10, max_batch_size=3)
+        results = await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(i) for i in range(3))), timeout=1
+        )
+        assert results == [0, 2, 4]
+        assert batcher.get_stats()["batch_sizes"] == {3: 1}
+
+    asyncio.run(run())
+    assert batches == [[0, 1, 2]]
+
+
+def test_handler_errors_reach_every_caller():
+    async def handler(items):
+        raise RuntimeError("boom")
+
+    async def run():
+        batcher = MicroBatcher(handler, window=0.001, max_batch_size=10)
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    asyncio.run(run())
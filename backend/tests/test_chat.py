@@ -3,16 +3,20 @@ from fastapi.testclient import TestClient
 from app.main import app
 from app.services.chat_service import chat_service
 
-client = TestClient(app)
+@pytest.fixture(scope="module")
+def client():
+    # One event loop for the whole module, the async Redis pool is bound to it
+    with TestClient(app) as client:
+        yield client
 
-def test_create_session():
+def test_create_session(client):
     response = client.post("/api/v1/chat/sessions")
     assert response.status_code == 200
     session_id = response.json()
     assert isinstance(session_id, str)
     assert len(session_id) > 0
 
-def test_get_session_messages():
+def test_get_session_messages(client):
     # Create a session first
     response = client.post("/api/v1/chat/sessions")
     session_id = response.json()
@@ -24,7 +28,7 @@ def test_get_session_messages():
     assert "messages" in data
     assert isinstance(data["messages"], list)
 
-def test_clear_session():
+def test_clear_session(client):
     # Create a session first
     response = client.post("/api/v1/chat/sessions")
     session_id = response.json()
@@ -34,7 +38,7 @@ def test_clear_session():
     assert response.status_code == 200
     assert response.json()["message"] == "Session cleared successfully"
 
-def test_send_message():
+def test_send_message(client):
     # Create a session first
     response = client.post("/api/v1/chat/sessions")
     session_id = response.json()
@@ -50,7 +54,7 @@ def test_send_message():
     assert "role" in data
     assert data["role"] == "assistant"
 
-def test_invalid_session():
+def test_invalid_session(client):
     # Try to get messages for non-existent session
     response = client.get("/api/v1/chat/sessions/invalid-session/messages")
     assert response.status_code == 404
@@ -0,0 +1,136 @@
+import asyncio
+import time
+
+from app.schemas.message import MessageCreate, SearchResult
+from app.services import chat_service as chat_module
+from app.services.chat_service import ChatService
+from app.services.single_flight import SingleFlight
+
+LLM_LATENCY = 0.2
+
+
+class FakeRedisService:
+    def __init__(self):
+        self.messages = {}
+
+    async def add_message(self, session_id, message):
+        self.messages.setdefault(session_id, []).append(message)
+
+
+class FakeAnswerCache:
+    async def epoch(self):
+        return 0
+
+    async def get(self, query, chunk_ids, epoch):
+        return None
+
+    async def set(self, query, chunk_ids, content, epoch):
+        pass
+
+
+async def fake_search(query, top_k=3, filters=None, with_vectors=False):
+    return [SearchResult(id="chunk-1", text="Context", score=1.0)]
+
+
+async def fake_llm(query, context):
+    await asyncio.sleep(LLM_LATENCY)
+    return f"Answer to {query}"
+
+
+def test_concurrent_chats_are_served_in_parallel(monkeypatch):
+    monkeypatch.setattr(chat_module, "search_similar_articles", fake_search)
+    monkeypatch.setattr(chat_module, "get_llm_response", fake_llm)
+    monkeypatch.setattr(chat_module, "answer_cache", FakeAnswerCache())
+    service = ChatService()
+    service.redis_service = FakeRedisService()
+
+    async def run():
+        start = time.monotonic()
+        responses = await asyncio.gather(*(
+            service.process_message(f"session-{i}", MessageCreate(content=f"question {i}"))
+            for i in range(20)
+        ))
+        return responses, time.monotonic() - start
+
+    responses, elapsed = asyncio.run(run())
+    assert [r.content for r in responses] == [f"Answer to question {i}" for i in range(20)]
+    # Twenty chats take about as long as one
+    assert elapsed < 5 * LLM_LATENCY
+    assert all(len(messages) == 2 for messages in service.redis_service.messages.values())
+
+
+def test_stream_message_yields_tokens_then_persists(monkeypatch):
+    async def fake_stream(query, contexts):
+        for token in ["Breaking ", "news"]:
+            yield token
+
+    monkeypatch.setattr(chat_module, "search_similar_articles", fake_search)
+    monkeypatch.setattr(chat_module, "answer_cache", FakeAnswerCache())
+    monkeypatch.setattr(chat_module.llm_service, "stream_response", fake_stream)
+    service = ChatService()
+    service.redis_service = FakeRedisService()
+
+    async def run():
+        return [event async for event in service.stream_message("session", MessageCreate(content="news?"))]
+
+    events = asyncio.run(run())
+    assert [e["content"] for e in events[:-1]] == ["Breaking ", "news"]
+    done = events[-1]
+    assert done["type"] == "done"
+    assert [source["id"] for source in done["sources"]] == ["chunk-1"]
+
+    stored = service.redis_service.messages["session"]
+    assert stored[-1].id == done["message_id"]
+    assert stored[-1].content == "Breaking news"
+
+
+def test_merged_chunks_are_all_recorded(monkeypatch):
+    cached = []
+
+    class RecordingAnswerCache(FakeAnswerCache):
+        async def set(self, query, chunk_ids, content, epoch):
+            cached.append(chunk_ids)
+
+    async def adjacent_search(query, top_k=3, filters=None, with_vectors=False):
+        meta = {"article_url": "https://example.com/a"}
+        return [
+            SearchResult(id=f"chunk-{i}", text=f"Part {i}", score=1.0 - i / 10, meta={**meta, "position": i})
+            for i in range(2)
+        ]
+
+    monkeypatch.setattr(chat_module, "search_similar_articles", adjacent_search)
+    monkeypatch.setattr(chat_module, "get_llm_response", fake_llm)
+    monkeypatch.setattr(chat_module, "answer_cache", RecordingAnswerCache())
+    service = ChatService()
+    service.redis_service = FakeRedisService()
+
+    response = asyncio.run(service.process_message("session", MessageCreate(content="question")))
+    assert response.meta["relevant_articles"] == ["chunk-0", "chunk-1"]
+    assert cached == [["chunk-0", "chunk-1"]]
+
+
+def test_identical_questions_share_one_generation(monkeypatch):
+    calls = []
+
+    async def counting_llm(query, context):
+        calls.append(query)
+        return await fake_llm(query, context)
+
+    monkeypatch.setattr(chat_module, "search_similar_articles", fake_search)
+    monkeypatch.setattr(chat_module, "get_llm_response", counting_llm)
+    monkeypatch.setattr(chat_module, "answer_cache", FakeAnswerCache())
+    service = ChatService()
+    service.single_flight = SingleFlight()
+    service.redis_service = FakeRedisService()
+
+    async def run():
+        return await asyncio.gather(*(
+            service.process_message(f"session-{i}", MessageCreate(content=question))
+            for i, question in enumerate(["What's new?", "what's new", "WHAT'S NEW?"])
+        ))
+
+    responses = asyncio.run(run())
+    assert len(calls) == 1
+    assert len({r.id for r in responses}) == 3
+    assert all(r.content == responses[0].content for r in responses)
+    assert all(len(messages) == 2 for messages in service.redis_service.messages.values())
@@ -0,0 +1,75 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base
+from app.rag.chunk_store import ChunkStore
+from app.schemas.message import SearchResult
+
+
+def make_store(tmp_path, cache_size=16):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return ChunkStore(sessionmaker(bind=engine), cache_size), statements
+
+
+def make_chunk(url, position, title="Election results"):
+    return {
+        "id": f"{url}#{position}",
+        "text": f"Paragraph {position}",
+        "position": position,
+        "article_url": url,
+        "article_title": title,
+        "source": "example.com",
+        "published_date": "2024-03-05T09:00:00+00:00",
+    }
+
+
+def test_hydrate_fills_slim_results_with_one_query(tmp_path):
+    store, statements = make_store(tmp_path)
+    store.put([make_chunk("https://example.com/a", i) for i in range(3)] + [make_chunk("https://example.com/b", 0)])
+
+    results = [
+        SearchResult(id="https://example.com/a#1", text="", score=0.9, meta={"source": "example.com"}),
+        SearchResult(id="https://example.com/b#0", text="", score=0.8, meta={"source": "example.com"}),
+        SearchResult(id="legacy", text="Full payload", score=0.7, meta={"article_title": "Old"}),
+        SearchResult(id="deleted", text="", score=0.6, meta={"source": "example.com"}),
+    ]
+    statements.clear()
+    hydrated = store.hydrate(results)
+    assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 1
+    assert hydrated[0].text == "Paragraph 1"
+    assert hydrated[0].meta == {
+        "article_url": "https://example.com/a",
+        "article_title": "Election results",
+        "source": "example.com",
+        "published_date": "2024-03-05T09:00:00+00:00",
+        "position": 1,
+    }
+    # Full payloads pass through, slim results without a chunk are dropped
+    assert hydrated[2:] == [results[2]]
+
+    # Hydrated chunks are served from the cache
+    statements.clear()
+    store.hydrate(results[:2])
+    assert statements == []
+
+
+def test_put_updates_articles_and_delete_removes_orphans(tmp_path):
+    store, _ = make_store(tmp_path)
+    store.put([make_chunk("https://example.com/a", 0), make_chunk("https://example.com/a", 1)])
+    assert store.get(["https://example.com/a#0"])["https://example.com/a#0"]["meta"]["article_title"] == "Election results"
+
+    # A new title is picked up by the stored chunks
+    store.put([make_chunk("https://example.com/a", 0, title="Winner declared")])
+    assert store.get(["https://example.com/a#0"])["https://example.com/a#0"]["meta"]["article_title"] == "Winner declared"
+
+    store.delete(["https://example.com/a#0"])
+    assert list(store.get(["https://example.com/a#0", "https://example.com/a#1"])) == ["https://example.com/a#1"]
+    store.delete(["https://example.com/a#1"])
+    db = store.session_factory()
+    try:
+        assert db.execute(Base.metadata.tables["articles"].select()).fetchall() == []
+    finally:
+        db.close()
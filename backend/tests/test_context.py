@@ -0,0 +1,64 @@
+import numpy as np
+
+from app.rag.context import context_chunk_ids, merge_adjacent, mmr_select, select_context
+from app.rag.ingestion import TextChunk
+from app.rag.local_store import LocalVectorStore
+from app.schemas.message import SearchResult
+
+
+def chunk(chunk_id, score, embedding, url=None, position=None):
+    meta = {"article_url": url, "position": position} if url else {}
+    return SearchResult(id=chunk_id, text=f"Text of {chunk_id}", score=score,
+                        meta=meta, embedding=list(embedding))
+
+
+def test_mmr_prefers_novel_chunks_and_drops_near_duplicates():
+    basis = np.eye(4, dtype=np.float32)
+    results = [
+        chunk("rates", 0.9, basis[0]),
+        chunk("rates-syndicated", 0.89, basis[0] + 0.01 * basis[1]),
+        chunk("rates-analysis", 0.85, basis[0] + basis[1]),
+        chunk("flooding", 0.6, basis[2]),
+    ]
+    picked = mmr_select(results, 3, diversity_lambda=0.3, duplicate_threshold=0.95)
+    assert [result.id for result in picked] == ["rates", "flooding", "rates-analysis"]
+
+    # Relevance alone keeps the score order, except for the duplicate
+    picked = mmr_select(results, 3, diversity_lambda=1.0, duplicate_threshold=0.95)
+    assert [result.id for result in picked] == ["rates", "rates-analysis", "flooding"]
+
+
+def test_merge_adjacent_joins_consecutive_chunks_in_article_order():
+    url = "https://example.com/a"
+    results = [
+        chunk("a2", 0.9, [1, 0], url, 2),
+        chunk("b0", 0.8, [0, 1], "https://example.com/b", 0),
+        chunk("a1", 0.7, [1, 1], url, 1),
+        chunk("a5", 0.6, [1, 0], url, 5),
+    ]
+    merged = merge_adjacent(results)
+    assert [result.id for result in merged] == ["a2", "b0", "a5"]
+    assert merged[0].text == "Text of a1\n\nText of a2"
+    assert merged[0].score == 0.9
+    assert merged[0].meta["chunk_ids"] == ["a1", "a2"]
+    assert context_chunk_ids(merged) == ["a1", "a2", "b0", "a5"]
+
+
+def test_ingested_chunk_meta_allows_merging():
+    chunks = [TextChunk(f"Part {i}", "https://example.com/a", "Title", position=i) for i in range(2)]
+    results = [
+        SearchResult(id=chunk.id, text=chunk.text, score=1.0, meta=chunk.get_meta()) for chunk in chunks
+    ]
+    assert [result.text for result in merge_adjacent(results)] == ["Part 0\n\nPart 1"]
+
+
+def test_select_context_uses_stored_embeddings(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    vectors = np.eye(3, 8, dtype=np.float32)
+    vectors[1] = vectors[0]
+    store.store(["first", "copy", "other"], list(vectors), ids=["first", "copy", "other"])
+
+    results = store.search(vectors[0] + 0.5 * vectors[2], top_k=3, with_vectors=True)
+    assert all(len(result.embedding) == 8 for result in results)
+    assert "embedding" not in results[0].model_dump()
+    assert sorted(result.id for result in select_context(results, 3)) in (["first", "other"], ["copy", "other"])
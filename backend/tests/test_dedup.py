@@ -0,0 +1,17 @@
+from app.rag.dedup import MinHasher, similarity
+
+
+def test_minhash_estimates_shingle_similarity():
+    hasher = MinHasher(num_perm=256)
+    text = " ".join(f"word{i}" for i in range(200))
+    edited = text.replace("word100", "changed")
+    unrelated = " ".join(f"other{i}" for i in range(200))
+
+    assert similarity(hasher.signature(text), hasher.signature(text)) == 1.0
+    assert similarity(hasher.signature(text), hasher.signature(edited)) > 0.9
+    assert similarity(hasher.signature(text), hasher.signature(unrelated)) < 0.1
+
+
+def test_signatures_are_stable_across_instances():
+    text = "Officials said talks would continue through the week."
+    assert (MinHasher().signature(text) == MinHasher().signature(text)).all()
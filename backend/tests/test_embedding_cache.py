@@ -0,0 +1,101 @@
+import asyncio
+
+import numpy as np
+
+from app.rag.embedding_cache import DiskEmbeddingCache, EmbeddingCache, QueryEmbeddingCache
+from app.rag.embeddings import EmbeddingStats, JinaEmbeddingService
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskEmbeddingCache(str(tmp_path / "embeddings.sqlite3"), max_entries=2)
+    cache.set_many({"a": np.ones(4), "b": np.full(4, 2.0)})
+    cache.get_many(["a"])
+    cache.set_many({"c": np.full(4, 3.0)})
+
+    found = cache.get_many(["a", "b", "c"])
+    assert sorted(found) == ["a", "c"]
+    assert found["c"].dtype == np.float32
+    np.testing.assert_array_equal(found["c"], np.full(4, 3.0))
+
+
+def test_only_cache_misses_are_sent_to_api(tmp_path, monkeypatch):
+    service = JinaEmbeddingService(
+        cache=DiskEmbeddingCache(str(tmp_path / "embeddings.sqlite3"), max_entries=100)
+    )
+    requested = []
+
+    async def fake_request(batch, mode):
+        requested.append(list(batch))
+        return [np.full(768, len(text), dtype=np.float32) for text in batch]
+
+    monkeypatch.setattr(service, "_request_embeddings", fake_request)
+
+    asyncio.run(service.generate_embeddings(["one", "three"]))
+    stats = EmbeddingStats()
+    embeddings = asyncio.run(service.generate_embeddings(["one", "three", "eleven"], stats=stats))
+
+    assert requested == [["one", "three"], ["eleven"]]
+    assert [e[0] for e in embeddings] == [3, 5, 6]
+    assert (stats.hits, stats.misses, stats.api_calls) == (2, 1, 1)
+
+
+
+def test_unavailable_cache_falls_back_to_api(monkeypatch):
+    class UnavailableCache(EmbeddingCache):
+        def get_many(self, keys):
+            raise ConnectionError("Redis is down")
+
+        def set_many(self, items):
+            raise ConnectionError("Redis is down")
+
+    service = JinaEmbeddingService(cache=UnavailableCache())
+
+    async def fake_request(batch, mode):
+        return [np.full(768, len(text), dtype=np.float32) for text in batch]
+
+    monkeypatch.setattr(service, "_request_embeddings", fake_request)
+
+    embeddings = asyncio.run(service.generate_embeddings(["one", "three"]))
+    assert [e[0] for e in embeddings] == [3, 5]
+
+def test_query_cache_normalizes_and_counts():
+    async def run():
+        cache = QueryEmbeddingCache("model", max_size=2, ttl=60)
+        assert await cache.get("What's the latest news?") is None
+        await cache.set("What's the latest news?", np.ones(4))
+
+        assert await cache.get("  what's the LATEST news ") is not None
+        await cache.set("second", np.ones(4))
+        await cache.set("third", np.ones(4))
+        assert await cache.get("what's the latest news") is None
+        assert cache.get_stats() == {"hits": 1, "redis_hits": 0, "misses": 2, "size": 2}
+
+    asyncio.run(run())
+
+
+def test_query_cache_expires_entries():
+    async def run():
+        cache = QueryEmbeddingCache("model", max_size=2, ttl=0)
+        await cache.set("query", np.ones(4))
+        assert await cache.get("query") is None
+
+    asyncio.run(run())
+
+
+def test_concurrent_queries_share_one_api_call(monkeypatch):
+    service = JinaEmbeddingService()
+    requested = []
+
+    async def fake_request(batch, mode):
+        requested.append(list(batch))
+        return [np.full(768, len(text), dtype=np.float32) for text in batch]
+
+    monkeypatch.setattr(service, "_request_embeddings", fake_request)
+
+    async def run():
+        return await asyncio.gather(*(service.embed_query(q) for q in ["a", "bb", "a", "ccc"]))
+
+    embeddings = asyncio.run(run())
+    assert requested == [["a", "bb", "ccc"]]
+    assert [e[0] for e in embeddings] == [1, 2, 1, 3]
+    assert service.query_batcher.get_stats()["batch_sizes"] == {4: 1}
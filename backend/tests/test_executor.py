@@ -0,0 +1,39 @@
+import asyncio
+import sys
+
+from app.core import executor
+from app.parsing import SiteExtractor, extract_links
+
+
+def loaded_modules():
+    return set(sys.modules)
+
+
+def test_process_pool_does_not_fork_and_shuts_down(monkeypatch):
+    monkeypatch.setattr(executor.settings, "PROCESS_POOL_SIZE", 1)
+    monkeypatch.setattr(executor, "_process_executor", None)
+
+    assert asyncio.run(executor.run_in_process(pow, 2, 10)) == 1024
+    pool = executor._process_executor
+    assert pool._mp_context.get_start_method() in ("forkserver", "spawn")
+
+    executor.shutdown_process_executor()
+    assert executor._process_executor is None
+
+
+def test_parse_workers_do_not_build_the_rag_services(monkeypatch):
+    monkeypatch.setattr(executor.settings, "PROCESS_POOL_SIZE", 1)
+    monkeypatch.setattr(executor, "_process_executor", None)
+
+    async def run():
+        extractor = SiteExtractor("https://example.com/", link_pattern="/news/")
+        links = await executor.run_in_process(extract_links, '<a href="/news/1">1</a>', extractor.url, extractor)
+        return links, await executor.run_in_process(loaded_modules)
+
+    try:
+        links, modules = asyncio.run(run())
+    finally:
+        executor.shutdown_process_executor()
+    assert links == ["https://example.com/news/1"]
+    assert "app.parsing" in modules
+    assert not [name for name in modules if name.startswith("app.rag")]
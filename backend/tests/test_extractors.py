@@ -0,0 +1,53 @@
+import json
+import os
+from datetime import datetime, timezone
+
+from app.parsing import ExtractorRegistry, SiteExtractor, extract_article, extract_links
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "html")
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name)) as f:
+        return f.read()
+
+
+def test_links_are_filtered_absolute_and_unique():
+    extractor = SiteExtractor("https://example.com/world/", link_pattern="/news/")
+    links = extract_links(read_fixture("source_page.html"), extractor.url, extractor)
+    assert len(links) == 60
+    assert links[0] == "https://example.com/news/world-1000"
+
+
+def test_article_body_skips_boilerplate():
+    article = extract_article(read_fixture("article_page.html"), SiteExtractor("https://example.com/"))
+    assert article["title"] == "Talks continue as deadline approaches"
+    assert article["content"].startswith("Paragraph 0 of the report.")
+    assert "Related" not in article["content"]
+    assert len(article["content"].split("\n\n")) == 25
+    assert article["published_date"] == datetime(2024, 3, 5, 9, 30, tzinfo=timezone.utc)
+
+
+def test_generic_selectors_fall_back_in_order():
+    html = """
+    <html><head><meta property="article:published_time" content="2024-01-01T00:00:00Z"></head>
+    <body><h1>Title</h1><div class="nav">Menu</div>
+    <div class="story article-body"><p>Body text.</p></div>
+    <time datetime="2024-03-05T09:30:00Z">5 March</time></body></html>
+    """
+    article = extract_article(html, SiteExtractor("https://example.com/"))
+    assert article["content"] == "Body text."
+    # A time element is preferred over the meta tag that comes first
+    assert article["published_date"] == datetime(2024, 3, 5, 9, 30, tzinfo=timezone.utc)
+
+
+def test_registry_matches_sites_by_domain(tmp_path):
+    path = tmp_path / "news_sources.json"
+    path.write_text(json.dumps([
+        {"name": "NewsAPI", "type": "api"},
+        {"type": "scrape", "url": "https://www.example.com/world/", "body_selectors": ["div.story"]},
+    ]))
+    registry = ExtractorRegistry.load(str(path))
+    assert registry.sources == ["https://www.example.com/world/"]
+    assert registry.for_url("https://example.com/news/1").body_selectors == ["div.story"]
+    assert registry.for_url("https://other.org/news/1").body_selectors == ["article", "main", "div.article-body"]
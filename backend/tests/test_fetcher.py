@@ -0,0 +1,98 @@
+import asyncio
+import os
+import time
+
+import httpx
+import pytest
+
+from app.rag.fetcher import AsyncFetcher, TokenBucket, is_not_modified
+from app.rag.http_cache import HttpCache
+
+
+def test_token_bucket_limits_rate():
+    async def run():
+        bucket = TokenBucket(rate=20, capacity=1)
+        start = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    # First token is free, the remaining four wait 50ms each
+    assert asyncio.run(run()) >= 0.18
+
+
+def test_fetcher_fetches_domains_in_parallel():
+    async def handler(request):
+        await asyncio.sleep(0.1)
+        return httpx.Response(200, text=request.url.host)
+
+    async def run():
+        fetcher = AsyncFetcher(max_concurrency=10, domain_rate=1, domain_burst=1)
+        fetcher._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        fetcher._semaphore = asyncio.Semaphore(fetcher.max_concurrency)
+        start = time.monotonic()
+        responses = await asyncio.gather(
+            *(fetcher.get(f"https://site{i}.example/") for i in range(8))
+        )
+        elapsed = time.monotonic() - start
+        await fetcher.aclose()
+        return responses, elapsed
+
+    responses, elapsed = asyncio.run(run())
+    assert [r.text for r in responses] == [f"site{i}.example" for i in range(8)]
+    assert elapsed < 0.5
+
+
+def test_fetcher_raises_for_error_status():
+    async def run():
+        fetcher = AsyncFetcher()
+        fetcher._client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(503))
+        )
+        fetcher._semaphore = asyncio.Semaphore(fetcher.max_concurrency)
+        try:
+            await fetcher.get("https://example.com/")
+        finally:
+            await fetcher.aclose()
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(run())
+
+
+def test_fetcher_revalidates_with_cached_validators(tmp_path):
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text="<html>page</html>", headers={"ETag": '"v1"'})
+
+    async def run():
+        fetcher = AsyncFetcher(cache=HttpCache(str(tmp_path / "http.sqlite3"), max_bytes=1 << 20))
+        fetcher._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        fetcher._semaphore = asyncio.Semaphore(fetcher.max_concurrency)
+        first = await fetcher.get("https://example.com/")
+        second = await fetcher.get("https://example.com/")
+        await fetcher.aclose()
+        return first, second, fetcher.stats
+
+    first, second, stats = asyncio.run(run())
+    assert seen == [None, '"v1"']
+    assert not is_not_modified(first)
+    assert is_not_modified(second)
+    assert second.text == "<html>page</html>"
+    assert (stats.requests, stats.not_modified, stats.bytes_saved) == (2, 1, 17)
+
+
+def test_http_cache_evicts_least_recently_used(tmp_path):
+    body = os.urandom(1000)  # Incompressible
+    cache = HttpCache(str(tmp_path / "http.sqlite3"), max_bytes=2500)
+    cache.set("a", '"a"', None, body)
+    cache.set("b", '"b"', None, body)
+    cache.get_body("a")
+    cache.set("c", '"c"', None, body)
+
+    assert cache.get_validators("a") == ('"a"', None)
+    assert cache.get_validators("b") == (None, None)
+    assert cache.get_body("c") == body
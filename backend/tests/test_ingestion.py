@@ -0,0 +1,480 @@
+import asyncio
+
+import httpx
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base
+from app.parsing import ExtractorRegistry, SiteExtractor
+from app.rag import ingestion
+from app.rag.chunk_store import ChunkStore
+from app.rag.dedup import MinHasher, NearDuplicateIndex
+from app.rag.ingestion import Article, NewsIngestionService
+from app.rag.journal import IngestionJournal
+
+
+class FakeManifest:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, urls):
+        return {url: self.entries[url] for url in urls if url in self.entries}
+
+    def update(self, entries, partition=None):
+        self.entries.update(entries)
+
+
+class FakeVectorStore:
+    def __init__(self):
+        self.points = {}
+
+    def store(self, texts, embeddings, metas=None, ids=None):
+        for point_id, text in zip(ids, texts):
+            self.points[point_id] = text
+        return ids
+
+    def delete(self, ids):
+        for point_id in ids:
+            self.points.pop(point_id, None)
+
+    def flush(self):
+        pass
+
+    def write_partition(self):
+        return None
+
+
+class FakeEmbeddingService:
+    def __init__(self):
+        self.embedded = 0
+
+    async def generate_embeddings(self, texts, mode="passage", stats=None):
+        self.embedded += len(texts)
+        return [np.ones(768, dtype=np.float32) for _ in texts]
+
+
+class FakeAnswerCache:
+    def __init__(self):
+        self.epoch = 0
+
+    async def bump_epoch(self):
+        self.epoch += 1
+        return self.epoch
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture(autouse=True)
+def duplicate_index(session_factory, monkeypatch):
+    index = NearDuplicateIndex(MinHasher(), bands=16, threshold=0.8,
+                               session_factory=session_factory)
+    monkeypatch.setattr(ingestion, "duplicate_index", index)
+    return index
+
+
+@pytest.fixture(autouse=True)
+def chunk_store(session_factory, monkeypatch):
+    store = ChunkStore(session_factory)
+    monkeypatch.setattr(ingestion, "chunk_store", store)
+    return store
+
+
+@pytest.fixture(autouse=True)
+def journal(session_factory, monkeypatch):
+    journal = IngestionJournal(session_factory)
+    monkeypatch.setattr(ingestion, "ingestion_journal", journal)
+    return journal
+
+
+def make_article(content):
+    return Article(
+        title="Election results",
+        content=content,
+        url="https://example.com/news/election",
+        source="example.com"
+    )
+
+
+def test_chunk_ids_are_deterministic():
+    service = NewsIngestionService()
+    article = make_article("First paragraph.\n\nSecond paragraph.")
+    first = [chunk.id for chunk in service._chunk_article(article)]
+    second = [chunk.id for chunk in service._chunk_article(article)]
+    assert first == second
+    assert len(set(first)) == len(first)
+
+
+def test_ingestion_skips_unchanged_and_replaces_changed(monkeypatch):
+    manifest = FakeManifest()
+    store = FakeVectorStore()
+    embeddings = FakeEmbeddingService()
+    answers = FakeAnswerCache()
+    monkeypatch.setattr(ingestion, "answer_cache", answers)
+    monkeypatch.setattr(ingestion, "ingestion_manifest", manifest)
+    monkeypatch.setattr(ingestion, "vector_store", store)
+    monkeypatch.setattr(ingestion, "embedding_service", embeddings)
+
+    service = NewsIngestionService()
+    service.news_sources = ["https://example.com/news/"]
+    pages = {"https://example.com/news/election": "Votes are being counted."}
+
+    async def discover(source, outbox, run):
+        for url in pages:
+            await outbox.put(url)
+
+    async def fetch(url, run):
+        return f"<h1>Election results</h1><article><p>{pages[url]}</p></article>"
+
+    monkeypatch.setattr(service, "_discover", discover)
+    monkeypatch.setattr(service, "_fetch_article", fetch)
+
+    asyncio.run(service.ingest_news())
+    assert embeddings.embedded == 2
+    assert len(store.points) == 2
+    assert answers.epoch == 1
+
+    # Unchanged content is not embedded again
+    asyncio.run(service.ingest_news())
+    assert embeddings.embedded == 2
+    assert len(store.points) == 2
+    assert answers.epoch == 1
+
+    # Changed content replaces the article's chunks
+    pages["https://example.com/news/election"] = "The winner has been declared."
+    asyncio.run(service.ingest_news())
+    assert embeddings.embedded == 4
+    assert answers.epoch == 2
+    assert sorted(store.points.values()) == [
+        "The winner has been declared.",
+        "Title: Election results",
+    ]
+
+
+def test_pipeline_upserts_in_batches_as_chunks_arrive(monkeypatch):
+    manifest = FakeManifest()
+    store = FakeVectorStore()
+    batches = []
+    original_store = store.store
+
+    def store_batch(texts, embeddings, metas=None, ids=None):
+        batches.append(len(texts))
+        return original_store(texts, embeddings, metas, ids)
+
+    store.store = store_batch
+    monkeypatch.setattr(ingestion, "answer_cache", FakeAnswerCache())
+    monkeypatch.setattr(ingestion, "ingestion_manifest", manifest)
+    monkeypatch.setattr(ingestion, "vector_store", store)
+    monkeypatch.setattr(ingestion, "embedding_service", FakeEmbeddingService())
+    monkeypatch.setattr(ingestion.settings, "INGEST_UPSERT_BATCH_SIZE", 4)
+    monkeypatch.setattr(ingestion.settings, "INGEST_QUEUE_SIZE", 2)
+
+    service = NewsIngestionService()
+    service.news_sources = ["https://example.com/news/"]
+    urls = [f"https://example.com/news/{i}" for i in range(5)]
+
+    async def discover(source, outbox, run):
+        for url in urls:
+            await outbox.put(url)
+
+    async def fetch(url, run):
+        return f"<h1>Story {url[-1]}</h1><article><p>Body of {url}.</p></article>"
+
+    monkeypatch.setattr(service, "_discover", discover)
+    monkeypatch.setattr(service, "_fetch_article", fetch)
+
+    asyncio.run(service.ingest_news())
+    assert len(store.points) == 10
+    assert batches == [4, 4, 2]
+    assert sorted(manifest.entries) == sorted(urls)
+
+
+def test_interrupted_run_resumes_without_refetching_or_reembedding(monkeypatch, journal):
+    manifest = FakeManifest()
+    store = FakeVectorStore()
+    monkeypatch.setattr(ingestion, "answer_cache", FakeAnswerCache())
+    monkeypatch.setattr(ingestion, "ingestion_manifest", manifest)
+    monkeypatch.setattr(ingestion, "vector_store", store)
+
+    embeddings = FakeEmbeddingService()
+    monkeypatch.setattr(ingestion, "embedding_service", embeddings)
+
+    service = NewsIngestionService()
+    service.news_sources = ["https://example.com/news/"]
+    fetched = []
+
+    async def discover(source, outbox, run):
+        if "https://example.com/news/election" not in run.seen_urls:
+            await outbox.put("https://example.com/news/election")
+
+    async def fetch(url, run):
+        fetched.append(url)
+        return "<h1>Election results</h1><article><p>Votes are being counted.</p></article>"
+
+    monkeypatch.setattr(service, "_discover", discover)
+    monkeypatch.setattr(service, "_fetch_article", fetch)
+
+    # The vector store is down, the run ends with the article embedded but not stored
+    original_store = store.store
+    available = {"store": False}
+
+    def store_batch(texts, embeddings, metas=None, ids=None):
+        if not available["store"]:
+            raise ConnectionError("Qdrant is unavailable")
+        return original_store(texts, embeddings, metas, ids)
+
+    store.store = store_batch
+    asyncio.run(service.ingest_news())
+    assert fetched == ["https://example.com/news/election"]
+    assert embeddings.embedded == 2
+    assert not manifest.entries
+    assert len(journal.pending(3600)) == 1
+
+    available["store"] = True
+    run = asyncio.run(service.ingest_news())
+    assert run.resumed == 1
+    assert fetched == ["https://example.com/news/election"]
+    assert embeddings.embedded == 2
+    assert len(store.points) == 2
+    assert "https://example.com/news/election" in manifest.entries
+    assert journal.pending(3600) == []
+
+
+def test_failed_embeddings_are_not_stored_and_retried(monkeypatch):
+    manifest = FakeManifest()
+    store = FakeVectorStore()
+    monkeypatch.setattr(ingestion, "answer_cache", FakeAnswerCache())
+    monkeypatch.setattr(ingestion, "ingestion_manifest", manifest)
+    monkeypatch.setattr(ingestion, "vector_store", store)
+
+    class FlakyEmbeddings(FakeEmbeddingService):
+        available = False
+
+        async def generate_embeddings(self, texts, mode="passage", stats=None):
+            vectors = await super().generate_embeddings(texts, mode, stats)
+            # Jina failures come back as zero-vector placeholders
+            return vectors if self.available else [np.zeros_like(v) for v in vectors]
+
+    embeddings = FlakyEmbeddings()
+    monkeypatch.setattr(ingestion, "embedding_service", embeddings)
+
+    service = NewsIngestionService()
+    service.news_sources = ["https://example.com/news/"]
+
+    async def discover(source, outbox, run):
+        if "https://example.com/news/election" not in run.seen_urls:
+            await outbox.put("https://example.com/news/election")
+
+    async def fetch(url, run):
+        return "<h1>Election results</h1><article><p>Votes are being counted.</p></article>"
+
+    monkeypatch.setattr(service, "_discover", discover)
+    monkeypatch.setattr(service, "_fetch_article", fetch)
+
+    run = asyncio.run(service.ingest_news())
+    assert run.failed_articles == 1
+    assert store.points == {}
+    assert not manifest.entries
+
+    # The article is not taken for unchanged once embeddings work again
+    embeddings.available = True
+    run = asyncio.run(service.ingest_news())
+    assert run.failed_articles == 0
+    assert len(store.points) == 2
+    assert "https://example.com/news/election" in manifest.entries
+
+
+def test_article_with_a_failed_embedding_stays_journaled(monkeypatch, journal):
+    manifest = FakeManifest()
+    store = FakeVectorStore()
+    monkeypatch.setattr(ingestion, "answer_cache", FakeAnswerCache())
+    monkeypatch.setattr(ingestion, "ingestion_manifest", manifest)
+    monkeypatch.setattr(ingestion, "vector_store", store)
+
+    class TitleOutage(FakeEmbeddingService):
+        outage = True
+
+        async def generate_embeddings(self, texts, mode="passage", stats=None):
+            vectors = await super().generate_embeddings(texts, mode, stats)
+            return [
+                np.zeros_like(vector) if self.outage and text.startswith("Title:") else vector
+                for text, vector in zip(texts, vectors)
+            ]
+
+    embeddings = TitleOutage()
+    monkeypatch.setattr(ingestion, "embedding_service", embeddings)
+    monkeypatch.setattr(ingestion.settings, "INGEST_EMBED_BATCH_SIZE", 1)
+
+    service = NewsIngestionService()
+    service.news_sources = ["https://example.com/news/"]
+
+    async def discover(source, outbox, run):
+        if "https://example.com/news/election" not in run.seen_urls:
+            await outbox.put("https://example.com/news/election")
+
+    async def fetch(url, run):
+        return "<h1>Election results</h1><article><p>Votes are being counted.</p></article>"
+
+    monkeypatch.setattr(service, "_discover", discover)
+    monkeypatch.setattr(service, "_fetch_article", fetch)
+
+    # The body chunk was embedded but is held back with its article
+    asyncio.run(service.ingest_news())
+    assert store.points == {}
+    assert len(journal.pending(3600)) == 1
+
+    # The resumed article only needs its failed chunk embedded
+    embeddings.outage = False
+    run = asyncio.run(service.ingest_news())
+    assert run.resumed == 1
+    assert embeddings.embedded == 3
+    assert len(store.points) == 2
+    assert journal.pending(3600) == []
+
+
+RSS = """<?xml version="1.0"?>
+<rss version="2.0"><channel><title>World</title>
+<item><guid>story-1</guid><link>https://example.com/news/1</link>
+<pubDate>Tue, 05 Mar 2024 09:00:00 GMT</pubDate></item>
+<item><guid>story-2</guid><link>https://example.com/news/2</link>
+<pubDate>{updated}</pubDate></item>
+</channel></rss>"""
+
+
+class FakeFeedState:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, guids):
+        return {guid: self.entries[guid]["updated"] for guid in guids if guid in self.entries}
+
+    def update(self, entries, partition=None):
+        self.entries.update(entries)
+
+
+def test_feed_entries_are_queued_only_when_new_or_updated(monkeypatch):
+    feeds = FakeFeedState()
+    monkeypatch.setattr(ingestion, "answer_cache", FakeAnswerCache())
+    monkeypatch.setattr(ingestion, "ingestion_manifest", FakeManifest())
+    monkeypatch.setattr(ingestion, "vector_store", FakeVectorStore())
+    monkeypatch.setattr(ingestion, "embedding_service", FakeEmbeddingService())
+    monkeypatch.setattr(ingestion, "feed_state", feeds)
+
+    service = NewsIngestionService()
+    service.extractors = ExtractorRegistry([
+        SiteExtractor("https://example.com/news/", feed="https://example.com/rss")
+    ])
+    service.news_sources = service.extractors.sources
+    feed = {"updated": "Tue, 05 Mar 2024 09:00:00 GMT"}
+    fetched = []
+
+    async def get(url):
+        assert url == "https://example.com/rss"
+        return httpx.Response(200, text=RSS.format(**feed))
+
+    async def fetch(url, run):
+        fetched.append(url)
+        return f"<h1>Story {url[-1]}</h1><article><p>Body of {url}.</p></article>"
+
+    monkeypatch.setattr(service.fetcher, "get", get)
+    monkeypatch.setattr(service, "_fetch_article", fetch)
+
+    asyncio.run(service.ingest_news())
+    assert sorted(fetched) == ["https://example.com/news/1", "https://example.com/news/2"]
+    assert sorted(feeds.entries) == ["story-1", "story-2"]
+
+    # Only the entry with a new updated timestamp is fetched again
+    feed["updated"] = "Tue, 05 Mar 2024 11:00:00 GMT"
+    fetched.clear()
+    asyncio.run(service.ingest_news())
+    assert fetched == ["https://example.com/news/2"]
+
+
+def test_unchanged_source_page_requeues_articles_that_failed(monkeypatch):
+    manifest = FakeManifest()
+    monkeypatch.setattr(ingestion, "answer_cache", FakeAnswerCache())
+    monkeypatch.setattr(ingestion, "ingestion_manifest", manifest)
+    monkeypatch.setattr(ingestion, "vector_store", FakeVectorStore())
+    monkeypatch.setattr(ingestion, "embedding_service", FakeEmbeddingService())
+    monkeypatch.setattr(ingestion.settings, "PROCESS_POOL_SIZE", 0)
+
+    service = NewsIngestionService()
+    service.extractors = ExtractorRegistry([SiteExtractor("https://example.com/news/", link_pattern="/news/")])
+    service.news_sources = service.extractors.sources
+    page = '<a href="/news/1">One</a><a href="/news/2">Two</a>'
+    responses = [httpx.Response(200, text=page), httpx.Response(200, text=page, extensions={"not_modified": True})]
+    down = {"https://example.com/news/2"}
+    fetched = []
+
+    async def get(url):
+        return responses.pop(0)
+
+    async def fetch(url, run):
+        fetched.append(url)
+        if url in down:
+            return None
+        return f"<h1>Story {url[-1]}</h1><article><p>Body of {url}.</p></article>"
+
+    monkeypatch.setattr(service.fetcher, "get", get)
+    monkeypatch.setattr(service, "_fetch_article", fetch)
+
+    asyncio.run(service.ingest_news())
+    assert sorted(manifest.entries) == ["https://example.com/news/1"]
+
+    # The page answers 304, its links are read from the cached copy
+    down.clear()
+    fetched.clear()
+    asyncio.run(service.ingest_news())
+    assert "https://example.com/news/2" in fetched
+    assert sorted(manifest.entries) == ["https://example.com/news/1", "https://example.com/news/2"]
+
+
+STORY = " ".join(
+    f"Sentence {i} of the wire story says that negotiators met again on Tuesday." for i in range(30)
+)
+
+
+def test_near_duplicates_keep_the_preferred_source(monkeypatch):
+    manifest = FakeManifest()
+    store = FakeVectorStore()
+    monkeypatch.setattr(ingestion, "answer_cache", FakeAnswerCache())
+    monkeypatch.setattr(ingestion, "ingestion_manifest", manifest)
+    monkeypatch.setattr(ingestion, "vector_store", store)
+    monkeypatch.setattr(ingestion, "embedding_service", FakeEmbeddingService())
+
+    service = NewsIngestionService()
+    service.extractors = ExtractorRegistry([
+        SiteExtractor("https://wire.example/", priority=10),
+        SiteExtractor("https://copy.example/"),
+        SiteExtractor("https://other.example/"),
+    ])
+    service.news_sources = ["https://news.example/"]
+    pages = {}
+
+    async def discover(source, outbox, run):
+        for url in pages:
+            await outbox.put(url)
+
+    async def fetch(url, run):
+        return f"<h1>Talks</h1><article><p>{pages[url]}</p></article>"
+
+    monkeypatch.setattr(service, "_discover", discover)
+    monkeypatch.setattr(service, "_fetch_article", fetch)
+
+    # The lower-priority copy arrives first and is replaced by the wire story
+    pages["https://copy.example/talks"] = STORY + " Reporting by our staff."
+    asyncio.run(service.ingest_news())
+    pages["https://wire.example/talks"] = STORY
+    pages["https://other.example/talks"] = STORY + " Additional reporting."
+    asyncio.run(service.ingest_news())
+
+    urls = {ingestion.make_chunk_id(url, 0, "Title: Talks"): url for url in pages}
+    assert {urls[i] for i in store.points if i in urls} == {"https://wire.example/talks"}
+    assert manifest.entries["https://copy.example/talks"][1] == []
+    assert manifest.entries["https://other.example/talks"][1] == []
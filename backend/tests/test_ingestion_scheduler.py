@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from app.services import ingestion_scheduler as scheduler_module
+from app.services.ingestion_scheduler import LEASE_KEY, IngestionScheduler
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+
+async def wait_for_status(scheduler, job_id, status):
+    for _ in range(100):
+        job = await scheduler.get_status(job_id)
+        if job["status"] == status:
+            return job
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"Job never reached {status}: {job}")
+
+
+def test_queued_job_runs_in_background_and_reports_progress(monkeypatch):
+    async def fake_ingest(run):
+        run.articles = 3
+        await asyncio.sleep(0.05)
+        return run
+
+    monkeypatch.setattr(scheduler_module.news_service, "ingest_news", fake_ingest)
+
+    async def run():
+        scheduler = IngestionScheduler(interval=3600)
+        scheduler.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        job = await scheduler.enqueue()
+        assert (await scheduler.get_status(job.id))["status"] == "queued"
+
+        scheduler.start()
+        try:
+            status = await wait_for_status(scheduler, job.id, "completed")
+        finally:
+            await scheduler.stop()
+        assert status["progress"]["articles"] == 3
+        assert not await scheduler.redis.exists(LEASE_KEY)
+
+    asyncio.run(run())
+
+
+def test_job_is_skipped_while_another_replica_holds_the_lease(monkeypatch):
+    async def fake_ingest(run):
+        raise AssertionError("Ingestion must not run")
+
+    monkeypatch.setattr(scheduler_module.news_service, "ingest_news", fake_ingest)
+
+    async def run():
+        scheduler = IngestionScheduler(interval=3600)
+        scheduler.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        await scheduler.redis.set(LEASE_KEY, "other-replica", ex=60)
+        job = await scheduler.enqueue()
+        scheduler.start()
+        try:
+            await wait_for_status(scheduler, job.id, "skipped")
+        finally:
+            await scheduler.stop()
+
+    asyncio.run(run())
+
+
+def test_run_is_cancelled_when_the_lease_is_lost(monkeypatch):
+    cancelled = asyncio.Event()
+
+    async def fake_ingest(run):
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    monkeypatch.setattr(scheduler_module.news_service, "ingest_news", fake_ingest)
+    monkeypatch.setattr(scheduler_module.settings, "INGEST_STATUS_INTERVAL", 0.05)
+
+    async def run():
+        scheduler = IngestionScheduler(interval=3600)
+        scheduler.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        job = await scheduler.enqueue()
+        scheduler.start()
+        try:
+            await wait_for_status(scheduler, job.id, "running")
+            # The lease expired during a Redis outage and another replica took it
+            await scheduler.redis.set(LEASE_KEY, "other-replica", ex=60)
+            status = await wait_for_status(scheduler, job.id, "failed")
+        finally:
+            await scheduler.stop()
+        assert cancelled.is_set()
+        assert "lease" in status["error"]
+        assert await scheduler.redis.get(LEASE_KEY) == "other-replica"
+
+    asyncio.run(run())
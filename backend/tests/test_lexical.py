@@ -0,0 +1,164 @@
+import asyncio
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.rag import embeddings, local_store
+from app.rag.lexical import BM25Index, reciprocal_rank_fusion, tokenize
+from app.rag.local_store import LocalVectorStore
+
+# The package re-exports the store instance under the module's name
+vector_store_module = sys.modules["app.rag.vector_store"]
+
+TEXTS = [
+    "Nvidia shares rose after the chipmaker reported record data center revenue.",
+    "Markets were mixed on Tuesday as investors weighed interest rate expectations.",
+    "The central bank left interest rates unchanged and signalled cuts later this year.",
+    "Flooding in Valencia forced thousands of residents to leave their homes.",
+]
+
+
+def test_tokenize_drops_stopwords_and_keeps_entities():
+    assert tokenize("The NVDA rally in the U.S. market") == ["nvda", "rally", "u", "s", "market"]
+
+
+def test_search_ranks_exact_entity_matches_first():
+    index = BM25Index()
+    index.add([str(i) for i in range(len(TEXTS))], TEXTS)
+
+    results = index.search("Nvidia revenue", top_k=3)
+    assert [doc_id for doc_id, _ in results] == ["0"]
+
+    results = index.search("interest rates", top_k=3)
+    assert {doc_id for doc_id, _ in results} == {"1", "2"}
+    assert results[0][1] >= results[1][1] > 0
+    assert index.search("weather in Oslo") == []
+
+
+def test_replace_delete_and_reload(tmp_path):
+    index = BM25Index(str(tmp_path))
+    assert index.is_new
+    index.add(["a", "b"], ["Valencia flooding", "Nvidia earnings"])
+    index.add(["a"], ["Madrid heatwave"])
+    index.delete(["b"])
+    assert index.search("Valencia") == []
+    assert [doc_id for doc_id, _ in index.search("Madrid")] == ["a"]
+
+    reopened = BM25Index(str(tmp_path))
+    assert not reopened.is_new
+    assert len(reopened) == 1
+    assert [doc_id for doc_id, _ in reopened.search("Madrid")] == ["a"]
+    assert reopened.search("Nvidia") == []
+
+
+def test_compaction_keeps_live_documents(tmp_path):
+    index = BM25Index(str(tmp_path))
+    for i in range(3000):
+        index.add(["story"], [f"Revision {i} of the Valencia flooding story"])
+    index.add(["other"], ["Nvidia earnings"])
+
+    # Tombstones were dropped along the way
+    assert len(index._doc_ids) < 3000
+    assert [doc_id for doc_id, _ in index.search("revision 2999")] == ["story"]
+    reopened = BM25Index(str(tmp_path))
+    assert len(reopened) == 2
+    assert [doc_id for doc_id, _ in reopened.search("Nvidia")] == ["other"]
+
+
+def test_readers_pick_up_changes_of_the_writer(tmp_path):
+    writer = BM25Index(str(tmp_path))
+    reader = BM25Index(str(tmp_path))
+    writer.add(["a", "b"], ["Valencia flooding", "Nvidia earnings"])
+    writer.delete(["b"])
+    assert [doc_id for doc_id, _ in reader.search("Valencia")] == ["a"]
+    assert reader.search("Nvidia") == []
+
+    # A compaction rewrites the log, the reader reloads it
+    for i in range(3000):
+        writer.add(["story"], [f"Revision {i} of the Madrid heatwave story"])
+    assert [doc_id for doc_id, _ in reader.search("revision 2999")] == ["story"]
+    assert len(reader) == 2
+
+    # The reader writes on top of the compacted log
+    reader.add(["c"], ["Oslo weather"])
+    assert [doc_id for doc_id, _ in writer.search("Oslo")] == ["c"]
+    assert len(BM25Index(str(tmp_path))) == 3
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=60)
+    assert [doc_id for doc_id, _ in fused] == ["a", "c", "b"]
+
+
+def test_hybrid_search_finds_lexical_only_matches(tmp_path, monkeypatch):
+    vectors = np.eye(len(TEXTS), 16, dtype=np.float32)
+    store = LocalVectorStore(str(tmp_path))
+    store.lexical_index = BM25Index()
+    ids = store.store(TEXTS, list(vectors), [{"source": "example.com"}] * len(TEXTS))
+
+    class FakeEmbeddingService:
+        async def embed_query(self, query):
+            # Close to the rates stories, orthogonal to the Nvidia one
+            return vectors[2] + 0.5 * vectors[1]
+
+    monkeypatch.setattr(vector_store_module, "vector_store", store)
+    monkeypatch.setattr(embeddings, "embedding_service", FakeEmbeddingService())
+    monkeypatch.setattr(vector_store_module.settings, "HYBRID_CANDIDATES", 2)
+    monkeypatch.setattr(vector_store_module.settings, "CHUNK_STORE_ENABLED", False)
+
+    results = asyncio.run(vector_store_module.search_similar_articles("Nvidia revenue", top_k=3))
+    result_ids = [result.id for result in results]
+    assert set(result_ids) == {ids[0], ids[1], ids[2]}
+    nvidia = results[result_ids.index(ids[0])]
+    assert nvidia.text == TEXTS[0]
+    assert nvidia.meta == {"source": "example.com"}
+
+    # Deleted chunks leave the lexical index too
+    store.delete([ids[0]])
+    results = asyncio.run(vector_store_module.search_similar_articles("Nvidia revenue", top_k=3))
+    assert ids[0] not in [result.id for result in results]
+
+
+def test_filtered_hybrid_search_fills_top_k_with_matching_chunks(tmp_path, monkeypatch):
+    vectors = np.eye(len(TEXTS), 16, dtype=np.float32)
+    store = LocalVectorStore(str(tmp_path))
+    store.lexical_index = BM25Index()
+    dates = ["2020-01-01T00:00:00+00:00"] * 2 + ["2024-03-05T09:00:00+00:00"] * 2
+    ids = store.store(
+        ["Nvidia shares rose.", "Nvidia earnings beat forecasts.", TEXTS[1], TEXTS[2]],
+        list(vectors), [{"published_date": date} for date in dates]
+    )
+
+    class FakeEmbeddingService:
+        async def embed_query(self, query):
+            return vectors[2] + 0.5 * vectors[3]
+
+    monkeypatch.setattr(vector_store_module, "vector_store", store)
+    monkeypatch.setattr(embeddings, "embedding_service", FakeEmbeddingService())
+    monkeypatch.setattr(vector_store_module.settings, "HYBRID_CANDIDATES", 4)
+    monkeypatch.setattr(vector_store_module.settings, "CHUNK_STORE_ENABLED", False)
+
+    # The old Nvidia stories rank high lexically but are outside the window
+    since = vector_store_module.SearchFilter(since=datetime(2024, 3, 1, tzinfo=timezone.utc))
+    results = asyncio.run(vector_store_module.search_similar_articles("latest Nvidia news", 2, since))
+    assert [result.id for result in results] == [ids[2], ids[3]]
+
+
+def test_lexical_index_is_rebuilt_from_the_chunk_store(tmp_path, monkeypatch):
+    store = LocalVectorStore(str(tmp_path / "vectors"))
+    store.payload_text = False
+    store.store(TEXTS[:1], [np.eye(1, 16, dtype=np.float32)[0]], [{}], ["chunk-0"])
+
+    class FakeChunkStore:
+        def texts(self, ids):
+            return {"chunk-0": TEXTS[0]} if "chunk-0" in ids else {}
+
+    monkeypatch.setattr(local_store, "LocalVectorStore", lambda path: store)
+    monkeypatch.setattr(vector_store_module, "chunk_store", FakeChunkStore())
+    monkeypatch.setattr(vector_store_module.settings, "VECTOR_PARTITIONING", "none")
+    monkeypatch.setattr(vector_store_module.settings, "VECTOR_STORE_BACKEND", "local")
+    monkeypatch.setattr(vector_store_module.settings, "LEXICAL_INDEX_PATH", str(tmp_path / "lexical"))
+
+    rebuilt = vector_store_module.create_vector_store()
+    assert [doc_id for doc_id, _ in rebuilt.lexical_index.search("nvidia")] == ["chunk-0"]
@@ -0,0 +1,177 @@
+import os
+import subprocess
+import sys
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from app.rag.ann import IVFIndex
+from app.rag.local_store import LocalVectorStore
+from app.rag.vector_store import SearchFilter
+
+
+def random_vectors(count, dim=16, seed=0):
+    return list(np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32))
+
+
+def test_search_returns_nearest_neighbours(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    vectors = random_vectors(50)
+    ids = store.store(
+        [f"text {i}" for i in range(50)],
+        vectors,
+        [{"source": "example.com"} for _ in range(50)]
+    )
+
+    results = store.search(vectors[7], top_k=3)
+    assert results[0].id == ids[7]
+    assert results[0].text == "text 7"
+    assert results[0].meta == {"source": "example.com"}
+    assert results[0].score > results[1].score > results[2].score
+
+
+def test_store_persists_and_replaces_in_place(tmp_path):
+    vectors = random_vectors(3)
+    store = LocalVectorStore(str(tmp_path))
+    store.store(["a", "b", "c"], vectors, ids=["1", "2", "3"])
+    store.store(["b2"], [vectors[1]], ids=["2"])
+    store.delete(["1"])
+
+    reopened = LocalVectorStore(str(tmp_path))
+    assert reopened.count == 2
+    results = reopened.search(vectors[1], top_k=5)
+    assert [r.id for r in results][0] == "2"
+    assert results[0].text == "b2"
+    assert sorted(r.id for r in results) == ["2", "3"]
+
+
+def test_store_grows_past_initial_capacity(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    vectors = random_vectors(3000, dim=8)
+    store.store([str(i) for i in range(3000)], vectors)
+    assert store.count == 3000
+    assert store.search(vectors[2999], top_k=1)[0].text == "2999"
+
+
+def test_ivf_index_finds_neighbours_and_survives_reopen(tmp_path):
+    rng = np.random.default_rng(1)
+    centers = rng.normal(size=(20, 16))
+    vectors = list((centers[rng.integers(0, 20, 2000)] + 0.1 * rng.normal(size=(2000, 16))).astype(np.float32))
+    store = LocalVectorStore(str(tmp_path), ann_min_vectors=1000, ann_nprobe=4)
+    ids = store.store([str(i) for i in range(2000)], vectors)
+    assert store.index.is_trained
+    store.flush()
+
+    # Writes leave saving the index to the next flush
+    saved_at = os.path.getmtime(tmp_path / "ann.npz")
+    extra = store.store(["extra"], [vectors[5] * 1.01])
+    store.delete([ids[0]])
+    assert os.path.getmtime(tmp_path / "ann.npz") == saved_at
+
+    reopened = LocalVectorStore(str(tmp_path), ann_min_vectors=1000, ann_nprobe=4)
+    assert reopened.index.is_trained
+    found = {r.id for r in reopened.search(vectors[5], top_k=2)}
+    assert found == {ids[5], extra[0]}
+
+
+def test_searches_are_not_blocked_while_the_index_is_retrained(tmp_path, monkeypatch):
+    vectors = random_vectors(300)
+    store = LocalVectorStore(str(tmp_path), ann_min_vectors=200)
+    store.store([str(i) for i in range(100)], vectors[:100])
+
+    training, release = threading.Event(), threading.Event()
+    original_train = IVFIndex.train
+
+    def slow_train(self, *args, **kwargs):
+        training.set()
+        assert release.wait(5)
+        original_train(self, *args, **kwargs)
+
+    monkeypatch.setattr(IVFIndex, "train", slow_train)
+    writer = threading.Thread(target=store.store, args=([str(i) for i in range(100, 300)], vectors[100:]))
+    writer.start()
+    assert training.wait(5)
+
+    # The store is fully written and searched exactly while the index trains
+    assert store.search(vectors[250], top_k=1)[0].text == "250"
+    store.store(["late"], [vectors[0] * 1.01], ids=["late"])
+    release.set()
+    writer.join()
+
+    assert store.index.is_trained
+    assert store.index.size >= store.count
+    assert {r.id for r in store.search(vectors[0], top_k=2)} >= {"late"}
+
+
+def test_quantized_store_rescores_exactly(tmp_path):
+    vectors = random_vectors(500, dim=32)
+    store = LocalVectorStore(str(tmp_path), quantization="int8")
+    ids = store.store([str(i) for i in range(500)], vectors)
+    exact = LocalVectorStore(str(tmp_path / "exact"))
+    exact.store([str(i) for i in range(500)], vectors, ids=ids)
+
+    for query in vectors[:20]:
+        quantized_results = store.search(query, top_k=5)
+        exact_results = exact.search(query, top_k=5)
+        assert [r.id for r in quantized_results] == [r.id for r in exact_results]
+        assert quantized_results[0].score == exact_results[0].score
+
+    # Reopening in another mode re-encodes the stored vectors
+    reopened = LocalVectorStore(str(tmp_path), quantization="float16")
+    assert reopened.search(vectors[3], top_k=1)[0].id == ids[3]
+
+
+def test_filtered_search_only_scores_matching_rows(tmp_path):
+    vectors = random_vectors(6)
+    metas = [
+        {"source": "bbc.com", "published_date": "2024-03-01T09:00:00+00:00"},
+        {"source": "bbc.com", "published_date": "2024-03-04T09:00:00+00:00"},
+        {"source": "reuters.com", "published_date": "2024-03-05T09:00:00Z"},
+        {"source": "reuters.com", "published_date": "2024-03-06T09:00:00"},
+        {"source": "reuters.com", "published_date": None},
+        {"source": None, "published_date": "2024-03-06T10:00:00+00:00"},
+    ]
+    store = LocalVectorStore(str(tmp_path))
+    ids = store.store([str(i) for i in range(6)], vectors, metas)
+
+    since = SearchFilter(since=datetime(2024, 3, 4, tzinfo=timezone.utc))
+    found = {r.id for r in store.search(vectors[0], top_k=6, filters=since)}
+    assert found == {ids[1], ids[2], ids[3], ids[5]}
+
+    window = SearchFilter(since=datetime(2024, 3, 4), until=datetime(2024, 3, 5, 9),
+                          sources=["reuters.com"])
+    assert [r.id for r in store.search(vectors[0], top_k=6, filters=window)] == [ids[2]]
+    assert store.search(vectors[0], filters=SearchFilter(sources=["cnn.com"])) == []
+
+    # Deleting moves the last row, the date index follows
+    store.delete([ids[1]])
+    found = {r.id for r in store.search(vectors[0], top_k=6, filters=since)}
+    assert found == {ids[2], ids[3], ids[5]}
+
+    reopened = LocalVectorStore(str(tmp_path))
+    found = {r.id for r in reopened.search(vectors[0], top_k=6, filters=SearchFilter(sources=["reuters.com"]))}
+    assert found == {ids[2], ids[3], ids[4]}
+
+
+def test_store_is_not_opened_by_a_second_process(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    store.store(["text"], random_vectors(1), ids=["a"])
+    store.close()
+
+    # Another process holding the store, as a second API worker would
+    holder = subprocess.Popen(
+        [sys.executable, "-c",
+         "import fcntl, sys; f = open(sys.argv[1], 'a'); "
+         "fcntl.lockf(f, fcntl.LOCK_EX); print('locked', flush=True); sys.stdin.read()",
+         os.path.join(tmp_path, "lock")],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+    )
+    try:
+        assert holder.stdout.readline().strip() == "locked"
+        with pytest.raises(RuntimeError, match="another process"):
+            LocalVectorStore(str(tmp_path))
+    finally:
+        holder.communicate("")
+    assert LocalVectorStore(str(tmp_path)).retrieve(["a"])[0].text == "text"
@@ -0,0 +1,126 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base
+from app.rag import ingestion, partitions
+from app.rag.chunk_store import ChunkStore
+from app.rag.dedup import MinHasher, NearDuplicateIndex
+from app.rag.ingestion import NewsIngestionService
+from app.rag.manifest import IngestionManifest
+from app.rag.partitions import LocalPartitionedStore, partition_end, partition_key
+from app.rag.vector_store import SearchFilter
+
+
+class FakeClock(datetime):
+    current = datetime(2024, 3, 4, 12, tzinfo=timezone.utc)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.setattr(partitions, "datetime", FakeClock)
+    return FakeClock
+
+
+def vector(i, dim=8):
+    return np.eye(dim, dtype=np.float32)[i]
+
+
+def test_partition_keys():
+    moment = datetime(2024, 12, 30, 8, tzinfo=timezone.utc)
+    assert partition_key(moment, "day") == "20241230"
+    assert partition_key(moment, "week") == "2025w01"
+    assert partition_end("20241230") == datetime(2024, 12, 31, tzinfo=timezone.utc)
+    assert partition_end("2025w01") == datetime(2025, 1, 6, tzinfo=timezone.utc)
+    assert partition_end("news_articles") is None
+
+
+def test_partitions_fan_out_and_expire(tmp_path, clock):
+    vectors, lexical = tmp_path / "vectors", tmp_path / "lexical"
+    store = LocalPartitionedStore(str(vectors), granularity="week", search_partitions=2,
+                                  retention_days=14, lexical_path=str(lexical))
+
+    # One chunk per week, the first one re-ingested in the last week
+    for week, i in enumerate([0, 1, 2]):
+        clock.current = datetime(2024, 3, 4 + 7 * week, 12, tzinfo=timezone.utc)
+        store.store([f"story {i}"], [vector(i)], [{"published_date": clock.current.isoformat()}], [f"chunk-{i}"])
+        if week == 0:
+            store.store(["archived story"], [vector(3)], ids=["chunk-old"])
+    store.store(["story 0 updated"], [vector(0)], [{"published_date": clock.current.isoformat()}], ["chunk-0"])
+    assert store.write_partition() == "2024w12"
+    assert sorted(os.listdir(vectors)) == sorted(os.listdir(lexical)) == ["2024w10", "2024w11", "2024w12"]
+
+    # Only the two most recent weeks are searched, and the moved chunk is found once
+    query = vector(0) + vector(1) + vector(2)
+    results = store.search(query, top_k=5)
+    assert sorted(result.id for result in results) == ["chunk-0", "chunk-1", "chunk-2"]
+    assert [r.text for r in results if r.id == "chunk-0"] == ["story 0 updated"]
+    assert sorted(doc_id for doc_id, _ in store.lexical_index.search("story")) == ["chunk-0", "chunk-1", "chunk-2"]
+
+    # Partitions that ended before a time window are skipped
+    since = SearchFilter(since=datetime(2024, 3, 18, tzinfo=timezone.utc))
+    results = asyncio.run(store.asearch(query, top_k=5, filters=since))
+    assert sorted(result.id for result in results) == ["chunk-0", "chunk-2"]
+
+    # Lexical matches are only fetched from the searched partitions
+    assert [result.id for result in store.retrieve_matches(["chunk-old", "chunk-1"])] == ["chunk-1"]
+    assert store.retrieve_matches(["chunk-old", "chunk-1"], since) == []
+
+    # Whole partitions past the retention window are dropped, with their lexical index
+    assert store.prune(now=datetime(2024, 3, 26, tzinfo=timezone.utc)) == ["2024w10"]
+    assert sorted(os.listdir(vectors)) == sorted(os.listdir(lexical)) == ["2024w11", "2024w12"]
+    assert store.retrieve(["chunk-old"]) == []
+    assert store.retrieve(["chunk-1"])[0].text == "story 1"
+
+    store.delete(["chunk-1"])
+    assert store.retrieve(["chunk-1"]) == []
+    assert "chunk-1" not in [doc_id for doc_id, _ in store.lexical_index.search("story")]
+
+
+def test_articles_of_dropped_partitions_are_forgotten(tmp_path, clock, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    chunk_store = ChunkStore(session_factory)
+    manifest = IngestionManifest(session_factory)
+    duplicate_index = NearDuplicateIndex(MinHasher(), bands=16, threshold=0.8, session_factory=session_factory)
+    store = LocalPartitionedStore(str(tmp_path / "vectors"), granularity="week", retention_days=14)
+    store.payload_text = False
+    monkeypatch.setattr(ingestion, "vector_store", store)
+    monkeypatch.setattr(ingestion, "chunk_store", chunk_store)
+    monkeypatch.setattr(ingestion, "ingestion_manifest", manifest)
+    monkeypatch.setattr(ingestion, "duplicate_index", duplicate_index)
+    monkeypatch.setattr(ingestion.settings, "CHUNK_STORE_ENABLED", True)
+
+    def ingest(i):
+        url = f"https://example.com/{i}"
+        chunk_store.put([{
+            "id": f"chunk-{i}", "text": f"story {i}", "position": 0,
+            "article_url": url, "article_title": f"Story {i}",
+        }])
+        store.store([f"story {i}"], [vector(i)], [{}], [f"chunk-{i}"])
+        manifest.update({url: (f"hash-{i}", [f"chunk-{i}"])}, store.write_partition())
+        duplicate_index.add(url, duplicate_index.hasher.signature(f"story {i}"))
+
+    # Both articles are stored long ago, the second one is re-ingested in the live partition
+    clock.current = datetime(2024, 3, 4, 12, tzinfo=timezone.utc)
+    ingest(0)
+    ingest(1)
+    clock.current = datetime(2024, 3, 18, 12, tzinfo=timezone.utc)
+    ingest(1)
+
+    clock.current = datetime(2024, 3, 26, tzinfo=timezone.utc)
+    assert asyncio.run(NewsIngestionService().prune()) == ["2024w10"]
+    assert list(chunk_store.get(["chunk-0", "chunk-1"])) == ["chunk-1"]
+    assert list(manifest.get(["https://example.com/0", "https://example.com/1"])) == ["https://example.com/1"]
+    signature = duplicate_index.hasher.signature("story 0")
+    assert duplicate_index.find("https://example.com/other", signature) is None
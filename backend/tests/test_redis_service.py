@@ -0,0 +1,93 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.core.config import settings
+from app.schemas.message import Message
+from app.services.redis_service import RedisService
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def make_message(i):
+    return Message(id=str(i), content=f"message {i}", role="user", timestamp=datetime.utcnow())
+
+
+def make_service():
+    service = RedisService()
+    service.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    return service
+
+
+def test_history_is_trimmed_to_newest_messages(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_SESSION_MESSAGES", 3)
+
+    async def run():
+        service = make_service()
+        await service.create_session("s")
+        for i in range(5):
+            await service.add_message("s", make_message(i))
+        messages, next_cursor = await service.get_session_messages("s")
+        assert [m.id for m in messages] == ["2", "3", "4"]
+        assert next_cursor is None
+        assert await service.redis.ttl("session:s:messages") > 0
+
+    asyncio.run(run())
+
+
+def test_messages_are_paginated():
+    async def run():
+        service = make_service()
+        await service.create_session("s")
+        for i in range(5):
+            await service.add_message("s", make_message(i))
+
+        pages, cursor = [], 0
+        while cursor is not None:
+            messages, cursor = await service.get_session_messages("s", cursor, limit=2)
+            pages.append([m.id for m in messages])
+        assert pages == [["0", "1"], ["2", "3"], ["4"]]
+
+    asyncio.run(run())
+
+
+def test_cursor_survives_trimming(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_SESSION_MESSAGES", 4)
+
+    async def run():
+        service = make_service()
+        await service.create_session("s")
+        for i in range(4):
+            await service.add_message("s", make_message(i))
+        messages, cursor = await service.get_session_messages("s", 0, limit=2)
+        assert [m.id for m in messages] == ["0", "1"]
+
+        # Trimming the two oldest messages doesn't shift the next page
+        for i in range(4, 6):
+            await service.add_message("s", make_message(i))
+        messages, cursor = await service.get_session_messages("s", cursor, limit=2)
+        assert [m.id for m in messages] == ["2", "3"]
+
+        # Messages trimmed before they were read are skipped
+        for i in range(6, 10):
+            await service.add_message("s", make_message(i))
+        messages, cursor = await service.get_session_messages("s", cursor, limit=3)
+        assert [m.id for m in messages] == ["6", "7", "8"]
+        messages, cursor = await service.get_session_messages("s", cursor, limit=3)
+        assert [m.id for m in messages] == ["9"]
+        assert cursor is None
+
+    asyncio.run(run())
+
+
+def test_cleared_session_still_exists():
+    async def run():
+        service = make_service()
+        await service.create_session("s")
+        await service.add_message("s", make_message(0))
+        await service.clear_session("s")
+        assert await service.session_exists("s")
+        assert await service.get_session_messages("s") == ([], None)
+
+    asyncio.run(run())
@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+
+def test_workers_share_result_through_redis():
+    calls = []
+
+    async def answer():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return {"content": "shared"}
+
+    async def run():
+        server = fakeredis.FakeServer()
+        # Two workers, each with its own client and in-process state
+        workers = [
+            SingleFlight(fakeredis.FakeAsyncRedis(server=server, decode_responses=True), timeout=2)
+            for _ in range(2)
+        ]
+        return await asyncio.gather(*(worker.do("question", answer) for worker in workers))
+
+    assert asyncio.run(run()) == [{"content": "shared"}, {"content": "shared"}]
+    assert len(calls) == 1
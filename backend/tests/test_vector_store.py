@@ -0,0 +1,31 @@
+from datetime import datetime, timezone
+
+from app.rag.vector_store import SearchFilter, apply_recency_decay
+from app.schemas.message import SearchResult
+
+NOW = datetime(2024, 3, 6, 12, tzinfo=timezone.utc)
+
+
+def make_result(result_id, score, published_date):
+    return SearchResult(id=result_id, text="", score=score, meta={"published_date": published_date})
+
+
+def test_filter_matches_window_and_sources():
+    search_filter = SearchFilter(since=datetime(2024, 3, 5), sources=["bbc.com"])
+    assert search_filter.matches({"source": "bbc.com", "published_date": "2024-03-05T08:00:00Z"})
+    assert not search_filter.matches({"source": "bbc.com", "published_date": "2024-03-04T23:00:00Z"})
+    assert not search_filter.matches({"source": "cnn.com", "published_date": "2024-03-05T08:00:00Z"})
+    # Undated chunks never match a time window
+    assert not search_filter.matches({"source": "bbc.com", "published_date": None})
+    assert SearchFilter(sources=["bbc.com"]).matches({"source": "bbc.com"})
+
+
+def test_recency_decay_prefers_fresh_results():
+    results = [
+        make_result("old", 0.9, "2024-03-04T12:00:00+00:00"),
+        make_result("fresh", 0.6, "2024-03-06T06:00:00+00:00"),
+        make_result("undated", 0.8, None),
+    ]
+    decayed = apply_recency_decay(results, half_life_hours=24, now=NOW)
+    assert [result.id for result in decayed] == ["fresh", "undated", "old"]
+    assert abs(decayed[-1].score - 0.9 / 4) < 1e-9